@@ -1,20 +1,193 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 import pandas as pd
 from collections import Counter
 import re
 from urllib.parse import unquote
 import numpy as np
 import json
+import os
+import threading
+import time
+import figures
+import density
+import peers
+import similarity
+import spatial
+import earnings
+import funding
+import export
+import history
+import cache
+import dataset
+import metrics
+import profiler
 
 app = Flask(__name__)
 
-# Load the data
-df = pd.read_excel('company_information_full.xlsx')
+# The workbook written by company.py/logos.py, or a .parquet table with the same columns
+DATA_FILE = os.getenv('COMPANY_DATA_FILE', 'company_information_full.xlsx')
+
+# Seconds between checks of DATA_FILE for a new version, 0 disables hot reload
+DATASET_WATCH_INTERVAL = float(os.getenv('DATASET_WATCH_INTERVAL', '5'))
+
+# Opt-in sampling profiler: requests slower than PROFILE_SLOW_REQUEST_MS (or with ?profile=1)
+# dump collapsed stacks into PROFILE_DIR for flame graph tools
+PROFILE_SLOW_REQUEST_MS = float(os.getenv('PROFILE_SLOW_REQUEST_MS', '0'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
+# Largest k accepted by /api/similar
+MAX_SIMILAR = 50
+
+# SQLite file shared by every worker and instance on this machine, holding computed aggregates
+# so a freshly started worker reads them instead of computing them; '' turns it off
+AGGREGATE_CACHE_FILE = os.getenv('AGGREGATE_CACHE_FILE', 'aggregate_cache.sqlite')
+# Aggregates each dataset version keeps in process; the least recently used are dropped first
+AGGREGATE_CACHE_ENTRIES = int(os.getenv('AGGREGATE_CACHE_ENTRIES', str(cache.CACHE_ENTRIES)))
+
+# Crawl-by-crawl history of follower counts and headcounts, appended by pipeline.py or history.py
+HISTORY_DIR = os.getenv('COMPANY_HISTORY_DIR', history.HISTORY_DIR)
+MAX_LEADERBOARD = 100
+
+# With METRICS_DIR set (gunicorn.conf.py sets it), /metrics adds up every worker's values
+registry = metrics.Registry(os.getenv('METRICS_DIR') or None)
+request_latency = registry.histogram('api_request_duration_seconds', 'Request latency by route',
+                                     ('route', 'method', 'status'))
+response_size = registry.histogram('api_response_size_bytes', 'Response payload size by route',
+                                   ('route',), metrics.SIZE_BUCKETS)
+request_errors = registry.counter('api_request_exceptions_total', 'Unhandled exceptions by route',
+                                  ('route', 'exception'))
+cache_requests = registry.counter('api_aggregate_cache_requests_total',
+                                  'Aggregate cache lookups: hit (in process), coalesced (waited for another thread), '
+                                  'shared (read from the shared store), waited (another process computed it), miss',
+                                  ('aggregate', 'result'))
+dataset_loads = registry.counter('api_dataset_loads_total', 'Dataset loads and reloads', ('result',))
+dataset_load_seconds = registry.histogram('api_dataset_load_seconds', 'Time to read the workbook into a Dataset')
+dataset_precompute_seconds = registry.histogram('api_dataset_precompute_seconds',
+                                                'Time to precompute the aggregates of a Dataset')
+dataset_info = registry.gauge('api_dataset_info', 'Active dataset version', ('version',))
+sample_profiler = profiler.SamplingProfiler() if PROFILE_SLOW_REQUEST_MS > 0 else None
+
+# Source files whose code determines the aggregates: part of every shared cache key
+CODE_VERSION = cache.code_version([os.path.join(os.path.dirname(os.path.abspath(__file__)), name) for name in
+                                   ['app.py', 'dataset.py', 'figures.py', 'density.py', 'peers.py', 'similarity.py',
+                                    'spatial.py', 'earnings.py', 'funding.py']])
+shared_cache = cache.SharedStore(AGGREGATE_CACHE_FILE) if AGGREGATE_CACHE_FILE else None
+
+def cache_namespace(ds):
+    return f'{ds.version}-{CODE_VERSION}'
+
+def load_dataset(path):
+    try:
+        ds = dataset.load_dataset(path, AGGREGATE_CACHE_ENTRIES)
+    except Exception:
+        dataset_loads.inc('error')
+        raise
+    dataset_loads.inc('ok')
+    dataset_load_seconds.observe(value=ds.load_seconds)
+    return ds
+
+def set_dataset_info(ds):
+    dataset_info.clear()
+    dataset_info.set(ds.version, value=1)
+
+# Load the data, keeping only the columns the API uses (see dataset.py)
+current_dataset = load_dataset(DATA_FILE)
+set_dataset_info(current_dataset)
+reload_lock = threading.Lock()
+reload_status = {'reloads': 0, 'last_error': None, 'previous_version': None}
+
+def active_dataset():
+    # Handlers read this once per request and use that snapshot throughout,
+    # so a concurrent reload can never mix two versions in one response
+    return current_dataset
+
+# Set by asgi.py: cache misses are computed in this bounded pool, so CPU-heavy aggregations
+# cannot occupy every request thread. None computes them in the request's own thread.
+aggregate_executor = None
+aggregate_thread = threading.local()
+
+def compute_in_executor(compute, frame):
+    # Marks the pool thread, so an aggregate built from another one does not wait on its own pool
+    aggregate_thread.active = True
+    try:
+        return compute(frame)
+    finally:
+        aggregate_thread.active = False
+
+def compute_aggregate(ds, compute):
+    if aggregate_executor is None or getattr(aggregate_thread, 'active', False):
+        return compute(ds.frame)
+    return aggregate_executor.submit(compute_in_executor, compute, ds.frame).result()
+
+def shared_aggregate(ds, key, compute):
+    # Second tier: read the aggregate from the shared store, or compute it under the store's
+    # lease so other processes missing it at the same time wait for this one
+    namespace = cache_namespace(ds)
+    value = shared_cache.get(namespace, key)
+    if value is not cache.MISSING:
+        cache_requests.inc(key[0], 'shared')
+        return value
+    while not shared_cache.claim(namespace, key):
+        value = shared_cache.wait(namespace, key)
+        if value is not cache.MISSING:
+            cache_requests.inc(key[0], 'waited')
+            return value
+        # The other process's lease ended without a value: compete for the lease again
+    try:
+        cache_requests.inc(key[0], 'miss')
+        value = compute_aggregate(ds, compute)
+        shared_cache.set(namespace, key, value)
+    finally:
+        shared_cache.release(namespace, key)
+    return value
+
+def cached_aggregate(ds, key, compute, per_request=False):
+    # Aggregates and serialized figures live on the dataset version they were computed from.
+    # per_request: the key holds values a client picked, so the aggregate is only kept in a
+    # small LRU of its own, where it can neither fill the shared store nor evict the others
+    aggregates = ds.request_aggregates if per_request else ds.aggregates
+    value = aggregates.get(key)
+    if value is not cache.MISSING:
+        cache_requests.inc(key[0], 'hit')
+        return value
+    # Single flight: requests that miss while another one is computing the same key
+    # wait for its result instead of computing it again
+    with ds.aggregate_locks_lock:
+        lock, waiting = ds.aggregate_locks.get(key, (threading.Lock(), 0))
+        ds.aggregate_locks[key] = (lock, waiting + 1)
+    try:
+        with lock:
+            value = aggregates.get(key)
+            if value is not cache.MISSING:
+                cache_requests.inc(key[0], 'coalesced')
+            elif shared_cache is not None and not per_request:
+                value = shared_aggregate(ds, key, compute)
+            else:
+                cache_requests.inc(key[0], 'miss')
+                value = compute_aggregate(ds, compute)
+            aggregates[key] = value
+    finally:
+        # The lock only lives while requests are computing or waiting for the key
+        with ds.aggregate_locks_lock:
+            lock, waiting = ds.aggregate_locks[key]
+            if waiting == 1:
+                del ds.aggregate_locks[key]
+            else:
+                ds.aggregate_locks[key] = (lock, waiting - 1)
+    return value
+
+def cached_json(ds, key, compute, per_request=False):
+    # Serialize once; jsonify would re-encode the cached payload on every request
+    body = cached_aggregate(ds, key + ('json',), lambda df: app.json.response(compute(df)).get_data(), per_request)
+    return Response(body, mimetype=app.json.mimetype)
 
 # Load Australian states GeoJSON
 with open('data/map/australian-states.json', 'r') as f:
     australia_geojson = json.load(f)
 
+# City coordinates for the office density tiles
+city_gazetteer = spatial.CityGazetteer('data/map/au.csv')
+
 # Mapping of state codes to names
 state_code_to_name = {
     feature['properties']['STATE_CODE']: feature['properties']['STATE_NAME']
@@ -142,8 +315,7 @@ country_map = {
     'YE': 'Yemen'
 }
 
-@app.route('/api/company_size_distribution')
-def company_size_distribution():
+def company_size_data(df):
     def categorize_size(size):
         if size < 30:
             return "Micro (< 30)"
@@ -154,24 +326,27 @@ def company_size_distribution():
         else:
             return "Large (500+)"
 
-    # Use company_size_on_linkedin and convert to numeric, ignoring non-numeric values
-    sizes = pd.to_numeric(df['company_size_on_linkedin'], errors='coerce')
+    # company_size_on_linkedin is parsed to numbers when the dataset is loaded
+    sizes = df['company_size_on_linkedin']
     
     # Categorize sizes
     categorized_sizes = sizes.apply(categorize_size)
     
     # Count occurrences of each category
-    size_distribution = categorized_sizes.value_counts().sort_index().to_dict()
-    
-    return jsonify(size_distribution)
+    return categorized_sizes.value_counts().sort_index().to_dict()
+
+def industry_breakdown_data(df):
+    return df['industry'].value_counts().to_dict()
+
+@app.route('/api/company_size_distribution')
+def company_size_distribution():
+    return cached_json(active_dataset(), ('company_size_distribution',), company_size_data)
 
 @app.route('/api/industry_breakdown')
 def industry_breakdown():
-    industry_breakdown = df['industry'].value_counts().to_dict()
-    return jsonify(industry_breakdown)
+    return cached_json(active_dataset(), ('industry_breakdown',), industry_breakdown_data)
 
-@app.route('/api/geographical_distribution')
-def geographical_distribution():
+def geographical_data(df):
     def extract_locations(row):
         if pd.isna(row['locations']):
             return []
@@ -185,11 +360,11 @@ def geographical_distribution():
             print(f"Error processing location: {row['locations']}. Error: {str(e)}")
             return []
 
-    # Apply the function to create a new column with extracted countries and states
-    df['extracted_locations'] = df.apply(extract_locations, axis=1)
+    # Extract countries and states into a new column (on a copy, df itself is never modified)
+    located_df = df.assign(extracted_locations=df.apply(extract_locations, axis=1))
 
     # Explode the dataframe so each location is on a separate row
-    exploded_df = df.explode('extracted_locations')
+    exploded_df = located_df.explode('extracted_locations')
 
     # Split the extracted_locations into separate columns
     exploded_df[['country', 'state']] = pd.DataFrame(exploded_df['extracted_locations'].tolist(), index=exploded_df.index)
@@ -232,40 +407,76 @@ def geographical_distribution():
     # Map state codes to names
     state_grouped['state_name'] = state_grouped['state_code'].map(state_code_to_name)
 
-    return jsonify({
+    return {
         'countries': grouped.to_dict(orient='records'),
         'australia_states': state_grouped.to_dict(orient='records'),
         'australia_geojson': australia_geojson
-    })
+    }
+
+@app.route('/api/geographical_distribution')
+def geographical_distribution():
+    return cached_json(active_dataset(), ('geographical_distribution',), geographical_data)
+
+def tile_aggregates_data(df):
+    # Australian offices binned into map tiles at every zoom level
+    offices = spatial.locate_offices(df['locations'], city_gazetteer)
+    return spatial.TileAggregates(offices, df['follower_count'], len(df))
+
+@app.route('/api/geo_tiles')
+def geo_tiles():
+    # zoom picks the tile level; bbox=west,south,east,north keeps only the tiles in view
+    ds = active_dataset()
+    tiles = cached_aggregate(ds, ('tile_aggregates',), tile_aggregates_data)
+    zoom = request.args.get('zoom', default=spatial.MIN_ZOOM + 2, type=int)
+    if zoom not in tiles.levels:
+        return jsonify({"error": f"zoom must be between {spatial.MIN_ZOOM} and {spatial.MAX_ZOOM}"}), 400
+
+    bbox = request.args.get('bbox')
+    if bbox is None:
+        return cached_json(ds, ('geo_tiles', zoom), lambda df: tiles.level(zoom))
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(','))
+    except ValueError:
+        return jsonify({"error": "bbox must be west,south,east,north"}), 400
+    return jsonify(tiles.level(zoom, (west, south, east, north)))
+
+def follower_count_data(df):
+    return df['follower_count'].dropna().tolist()
+
+def top_companies_by_followers_data(df):
+    # Sort companies by follower count and get top 20
+    top_companies = df.sort_values('follower_count', ascending=False).head(20)
+    
+    # Prepare data for API response
+    return top_companies[['name', 'follower_count', 'industry']].to_dict('records')
 
 @app.route('/api/follower_count_analysis')
 def follower_count_analysis():
-    follower_counts = df['follower_count'].dropna().tolist()
-    return jsonify(follower_counts)
+    return cached_json(active_dataset(), ('follower_count_analysis',), follower_count_data)
 
 @app.route('/api/top_companies_by_followers')
 def top_companies_by_followers():
-    # Sort companies by follower count and get top 20
-    top_companies = df.sort_values('follower_count', ascending=False).head(20)
-    
-    # Prepare data for API response
-    result = top_companies[['name', 'follower_count', 'industry']].to_dict('records')
-    
-    return jsonify(result)
+    return cached_json(active_dataset(), ('top_companies_by_followers',), top_companies_by_followers_data)
+
+def founded_year_data(df):
+    return df['founded_year'].value_counts().sort_index().to_dict()
 
 @app.route('/api/founded_year_timeline')
 def founded_year_timeline():
-    year_counts = df['founded_year'].value_counts().sort_index().to_dict()
-    return jsonify(year_counts)
+    return cached_json(active_dataset(), ('founded_year_timeline',), founded_year_data)
+
+def follower_ranking_data(df):
+    # Companies by follower count, each name once: the workbook from company.py is not deduplicated
+    ranking = df[['name', 'follower_count']].sort_values('follower_count', ascending=False, kind='stable')
+    return ranking.dropna(subset=['follower_count']).drop_duplicates('name').reset_index(drop=True)
 
 @app.route('/api/top_companies_followers')
 def top_companies_followers():
     top_n = request.args.get('n', default=10, type=int)
-    top_companies = df.nlargest(top_n, 'follower_count')[['name', 'follower_count']]
-    return jsonify(top_companies.to_dict(orient='records'))
+    ranking = cached_aggregate(active_dataset(), ('follower_ranking',), follower_ranking_data)
+    return jsonify(ranking.head(max(top_n, 0)).to_dict(orient='records'))
 
-@app.route('/api/specialties_wordcloud')
-def specialties_wordcloud():
+def specialties_data(df):
     # Combine all specialties into a single string
     all_specialties = ' '.join(df['specialities'].dropna().astype(str))
     
@@ -283,76 +494,207 @@ def specialties_wordcloud():
     word_freq = {word: count for word, count in word_freq.items() if word not in stop_words}
     
     # Sort by frequency and take top 100
-    top_100 = dict(sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:100])
-    
-    return jsonify(top_100)
+    return dict(sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:100])
+
+@app.route('/api/specialties_wordcloud')
+def specialties_wordcloud():
+    return cached_json(active_dataset(), ('specialties_wordcloud',), specialties_data)
+
+def company_type_data(df):
+    return df['company_type'].value_counts().to_dict()
+
+def funding_data(df):
+    funding = df[['name', 'extra_number_of_funding_rounds', 'extra_total_funding_amount']].dropna()
+    return funding.to_dict(orient='records')
+
+def employee_follower_data(df):
+    correlation_data = df[['company_size', 'follower_count']].dropna()
+    return correlation_data.to_dict(orient='records')
+
+def funding_density_data(df, bins=density.DEFAULT_BINS):
+    return density.log_histogram2d(df['extra_number_of_funding_rounds'], df['extra_total_funding_amount'], bins)
+
+def employee_follower_density_data(df, bins=density.DEFAULT_BINS):
+    return density.log_histogram2d(df['company_size_on_linkedin'], df['follower_count'], bins)
+
+def funding_sample_data(df, n=density.DEFAULT_SAMPLE_SIZE):
+    funding = df[['name', 'extra_number_of_funding_rounds', 'extra_total_funding_amount']].dropna()
+    positions = density.stratified_sample(funding['extra_number_of_funding_rounds'], funding['extra_total_funding_amount'], n)
+    return funding.iloc[positions].to_dict(orient='records')
+
+def employee_follower_sample_data(df, n=density.DEFAULT_SAMPLE_SIZE):
+    correlation_data = df[['company_size', 'company_size_on_linkedin', 'follower_count']].dropna()
+    positions = density.stratified_sample(correlation_data['company_size_on_linkedin'], correlation_data['follower_count'], n)
+    return correlation_data.iloc[positions][['company_size', 'follower_count']].to_dict(orient='records')
+
+def scatter_response(name, raw_data, density_data, sample_data):
+    # mode=raw (default) sends every point, mode=bins log-scaled 2-D histogram cells,
+    # mode=sample a stratified sample that keeps the outliers
+    ds = active_dataset()
+    mode = request.args.get('mode', default='raw')
+    if mode == 'bins':
+        bins = min(max(request.args.get('bins', default=density.DEFAULT_BINS, type=int), 5), 200)
+        return cached_json(ds, (name, 'bins', bins), lambda df: density_data(df, bins),
+                           per_request=bins != density.DEFAULT_BINS)
+    if mode == 'sample':
+        n = min(max(request.args.get('n', default=density.DEFAULT_SAMPLE_SIZE, type=int), 100), 20000)
+        return cached_json(ds, (name, 'sample', n), lambda df: sample_data(df, n),
+                           per_request=n != density.DEFAULT_SAMPLE_SIZE)
+    if mode != 'raw':
+        return jsonify({"error": "mode must be one of raw, bins, sample"}), 400
+    return cached_json(ds, (name,), raw_data)
 
 @app.route('/api/company_type_distribution')
 def company_type_distribution():
-    type_distribution = df['company_type'].value_counts().to_dict()
-    return jsonify(type_distribution)
+    return cached_json(active_dataset(), ('company_type_distribution',), company_type_data)
 
 @app.route('/api/funding_analysis')
 def funding_analysis():
-    funding_data = df[['name', 'extra_number_of_funding_rounds', 'extra_total_funding_amount']].dropna()
-    return jsonify(funding_data.to_dict(orient='records'))
+    return scatter_response('funding_analysis', funding_data, funding_density_data, funding_sample_data)
 
 @app.route('/api/employee_follower_correlation')
 def employee_follower_correlation():
-    correlation_data = df[['company_size', 'follower_count']].dropna()
-    return jsonify(correlation_data.to_dict(orient='records'))
+    return scatter_response('employee_follower_correlation', employee_follower_data,
+                            employee_follower_density_data, employee_follower_sample_data)
+
+# Funding aggregates over the round-level tables parsed when the dataset was loaded (ds.funding)
+def funding_by_industry_year_data(ds):
+    return funding.records(funding.funding_by_industry_year(ds.funding, ds.frame['industry']))
+
+def funding_round_sizes_data(ds):
+    return funding.records(funding.round_sizes(ds.funding))
+
+def investor_frequency_data(ds):
+    return funding.records(funding.investor_frequency(ds.funding))
+
+def acquisitions_by_year_data(ds):
+    return funding.records(funding.acquisitions_by_year(ds.funding))
+
+FUNDING_AGGREGATES = {
+    ('funding_by_industry_year',): funding_by_industry_year_data,
+    ('funding_round_sizes',): funding_round_sizes_data,
+    ('acquisitions_by_year',): acquisitions_by_year_data,
+}
+
+@app.route('/api/funding_by_industry_year')
+def funding_by_industry_year():
+    ds = active_dataset()
+    return cached_json(ds, ('funding_by_industry_year',), lambda df: funding_by_industry_year_data(ds))
+
+@app.route('/api/funding_round_sizes')
+def funding_round_sizes():
+    ds = active_dataset()
+    return cached_json(ds, ('funding_round_sizes',), lambda df: funding_round_sizes_data(ds))
+
+@app.route('/api/investor_frequency')
+def investor_frequency():
+    # The most active investors first; limit=N keeps the first N (default 50)
+    ds = active_dataset()
+    limit = max(request.args.get('limit', default=50, type=int), 1)
+    investors = cached_aggregate(ds, ('investor_frequency',), lambda df: investor_frequency_data(ds))
+    return jsonify(investors[:limit])
+
+@app.route('/api/acquisitions_by_year')
+def acquisitions_by_year():
+    ds = active_dataset()
+    return cached_json(ds, ('acquisitions_by_year',), lambda df: acquisitions_by_year_data(ds))
+
+# Chart name -> (payload function, figure builder)
+FIGURES = {
+    'company_size': (company_size_data, figures.company_size_figure),
+    'industry': (industry_breakdown_data, figures.industry_figure),
+    'founded_year': (founded_year_data, figures.founded_year_figure),
+    'company_type': (company_type_data, figures.company_type_figure),
+    'funding': (funding_data, figures.funding_figure),
+    'employee_follower': (employee_follower_data, figures.employee_follower_figure),
+    'funding_density': (funding_density_data, figures.funding_density_figure),
+    'employee_follower_density': (employee_follower_density_data, figures.employee_follower_density_figure),
+}
+
+@app.route('/api/figures/<chart>')
+def chart_figure(chart):
+    if chart not in FIGURES:
+        return jsonify({"error": "Unknown chart"}), 404
+
+    ds = active_dataset()
+    data_function, build_figure = FIGURES[chart]
+    figure_json = cached_aggregate(ds, ('figure', chart), lambda df: build_figure(data_function(df)).to_json())
+
+    response = Response(figure_json, mimetype='application/json')
+    response.set_etag(f'{cache_namespace(ds)}-{chart}')
+    return response.make_conditional(request)
+
+def safe_int(value):
+    try:
+        return int(value) if pd.notnull(value) else None
+    except:
+        return None
+
+def count_specialties(specialties):
+    if pd.isna(specialties):
+        return 0
+    return len(str(specialties).split(','))
+
+def count_countries(locations):
+    if pd.isna(locations):
+        return 0
+    try:
+        # Try parsing as JSON
+        locations_list = json.loads(locations)
+    except json.JSONDecodeError:
+        # If not JSON, try splitting by comma
+        return len(set(str(locations).split(',')))
+    
+    if isinstance(locations_list, list):
+        return len(set(loc.get('country') for loc in locations_list if isinstance(loc, dict) and 'country' in loc))
+    else:
+        return 1  # If it's not a list, assume it's a single location
+
+def company_index_data(df):
+    # First row position for every company name, used instead of scanning df per request
+    names = df['name']
+    return {name: position for position, name in reversed(list(enumerate(names))) if pd.notnull(name)}
+
+def company_averages_data(df):
+    # Calculate mean of numeric columns only
+    numeric_columns = df.select_dtypes(include=[np.number]).columns
+    averages = df[numeric_columns].mean().to_dict()
+
+    # Calculate average number of specialties and countries
+    averages['num_specialties'] = df['specialities'].apply(count_specialties).mean()
+    averages['num_countries'] = df['locations'].apply(count_countries).mean()
+    return averages
+
+def peer_table_data(df):
+    # Percentile ranks within industry and size bucket, for every company at once
+    locations = df['locations']
+    countries = {value: count_countries(value) for value in locations.dropna().unique()}
+    peer_metrics = {
+        'follower_count': df['follower_count'],
+        'company_size': df['company_size_on_linkedin'],
+        'founded_year': df['founded_year'],
+        'num_specialties': df['specialities'].str.count(',').add(1).fillna(0),
+        'num_countries': locations.map(countries).fillna(0),
+    }
+    return peers.PeerTable(peer_metrics, df['industry'], df['company_size_on_linkedin'])
 
 @app.route('/api/company_details/<path:company_name>')
 def company_details(company_name):
     decoded_name = unquote(company_name)
+    ds = active_dataset()
     
-    company = df[df['name'] == decoded_name]
+    position = cached_aggregate(ds, ('company_index',), company_index_data).get(decoded_name)
     
-    if company.empty:
+    if position is None:
         return jsonify({"error": "Company not found"}), 404
     
-    company = company.iloc[0]
-    
-    # Calculate mean of numeric columns only
-    numeric_columns = df.select_dtypes(include=[np.number]).columns
-    avg_data = df[numeric_columns].mean()
-    
-    def safe_int(value):
-        try:
-            return int(value) if pd.notnull(value) else None
-        except:
-            return None
-
-    def count_specialties(specialties):
-        if pd.isna(specialties):
-            return 0
-        return len(str(specialties).split(','))
-
-    def count_countries(locations):
-        if pd.isna(locations):
-            return 0
-        try:
-            # Try parsing as JSON
-            locations_list = json.loads(locations)
-        except json.JSONDecodeError:
-            # If not JSON, try splitting by comma
-            return len(set(str(locations).split(',')))
-        
-        if isinstance(locations_list, list):
-            return len(set(loc.get('country') for loc in locations_list if isinstance(loc, dict) and 'country' in loc))
-        else:
-            return 1  # If it's not a list, assume it's a single location
-
-    # Calculate average number of specialties and countries
-    df['num_specialties'] = df['specialities'].apply(count_specialties)
-    df['num_countries'] = df['locations'].apply(count_countries)
-    avg_specialties = df['num_specialties'].mean()
-    avg_countries = df['num_countries'].mean()
+    company = ds.frame.iloc[position]
+    avg_data = cached_aggregate(ds, ('company_averages',), company_averages_data)
 
     details = {
         'name': company['name'],
         'industry': company['industry'],
-        'description': company['description'],
+        'description': ds.side_stores['description'].get(position),
         'website': company['website'],
         'follower_count': safe_int(company['follower_count']),
         'avg_follower_count': safe_int(avg_data.get('follower_count')),
@@ -361,22 +703,297 @@ def company_details(company_name):
         'founded_year': safe_int(company['founded_year']),
         'avg_founded_year': safe_int(avg_data.get('founded_year')),
         'num_specialties': count_specialties(company['specialities']),
-        'avg_num_specialties': round(avg_specialties),  # Rounded to integer
+        'avg_num_specialties': round(avg_data['num_specialties']),  # Rounded to integer
         'num_countries': count_countries(company['locations']),
-        'avg_num_countries': round(avg_countries),  # Rounded to integer
-        'Image_Path': company['Image_Path'] if pd.notnull(company['Image_Path']) else None
+        'avg_num_countries': round(avg_data['num_countries']),  # Rounded to integer
+        'Image_Path': company['Image_Path'] if pd.notnull(company['Image_Path']) else None,
+        'peers': cached_aggregate(ds, ('peer_table',), peer_table_data).company(position)
     }
     
     return jsonify(details)
 
+def similarity_index_data(df):
+    # Nearest-neighbour index over specialities, industry, size and office countries
+    return similarity.SimilarityIndex(df)
+
+@app.route('/api/similar/<path:company_name>')
+def similar_companies(company_name):
+    decoded_name = unquote(company_name)
+    ds = active_dataset()
+
+    position = cached_aggregate(ds, ('company_index',), company_index_data).get(decoded_name)
+
+    if position is None:
+        return jsonify({"error": "Company not found"}), 404
+
+    k = min(max(request.args.get('k', similarity.DEFAULT_K, type=int), 1), MAX_SIMILAR)
+    neighbours = cached_aggregate(ds, ('similarity_index',), similarity_index_data).query(position, k)
+    positions = [other for other, _ in neighbours]
+    columns = ['name', 'industry', 'company_size_on_linkedin', 'follower_count']
+    rows = zip(*(ds.frame[column].take(positions).tolist() for column in columns))
+    return jsonify([
+        {
+            'name': name,
+            'industry': industry if pd.notnull(industry) else None,
+            'company_size': safe_int(size),
+            'follower_count': safe_int(followers),
+            'similarity': round(score, 4),
+        }
+        for (name, industry, size, followers), (_, score) in zip(rows, neighbours)
+    ])
+
+def earnings_data(df):
+    # The ABS series are read with each dataset version, so an export never mixes two loads
+    return earnings.load_earnings('data')
+
+@app.route('/api/export/<table>')
+def export_table(table):
+    # format=arrow|parquet, columns=a,b (default all), filter=<column><op><value> (repeatable)
+    ds = active_dataset()
+    if table == 'companies':
+        frame, text_columns = ds.frame, ds.side_stores
+        available = list(frame.columns) + list(text_columns)
+    elif table == 'earnings':
+        frame, text_columns = cached_aggregate(ds, ('earnings',), earnings_data), {}
+        available = list(frame.columns)
+    else:
+        return jsonify({"error": "table must be companies or earnings"}), 404
+
+    fmt = request.args.get('format', default='arrow')
+    if fmt not in export.FORMATS:
+        return jsonify({"error": "format must be arrow or parquet"}), 400
+    columns = request.args.get('columns')
+    columns = [c.strip() for c in columns.split(',')] if columns else available
+    unknown = [c for c in columns if c not in available]
+    if unknown:
+        return jsonify({"error": f"Unknown columns: {', '.join(unknown)}", "columns": available}), 400
+    try:
+        filters = export.parse_filters(request.args.getlist('filter'), frame, [c for c in available if c in frame])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The generator keeps ds, so the whole export comes from one version even if a reload happens meanwhile
+    metadata = {'dataset_version': ds.version, 'table': table}
+    body = export.stream(frame, columns, filters, fmt, {c: text_columns[c] for c in columns if c in text_columns},
+                         metadata=metadata)
+    response = Response(body, mimetype=export.FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={table}-{ds.version}.{fmt}'
+    response.headers['X-Dataset-Version'] = ds.version
+    return response
+
+snapshot_history = history.SnapshotHistory(HISTORY_DIR)
+
+def crawl_date_arg(name):
+    # A YYYY-MM-DD query parameter, None if absent; ValueError if it is not a date
+    value = request.args.get(name)
+    return None if value is None else pd.Timestamp(value).strftime('%Y-%m-%d')
+
+@app.route('/api/company_history/<path:company_name>')
+def company_history(company_name):
+    # since/until=YYYY-MM-DD limit the crawls returned, and the partitions read
+    decoded_name = unquote(company_name)
+    if not snapshot_history.refresh():
+        return jsonify({"error": "No snapshot history"}), 404
+    try:
+        since, until = crawl_date_arg('since'), crawl_date_arg('until')
+    except ValueError:
+        return jsonify({"error": "since and until must be dates (YYYY-MM-DD)"}), 400
+
+    snapshots = snapshot_history.company(decoded_name, since, until)
+    if not snapshots:
+        return jsonify({"error": "Company not found"}), 404
+    return jsonify({
+        'name': decoded_name,
+        'snapshots': [
+            {'crawl_date': s['crawl_date'], **{metric: safe_int(s[metric]) for metric in history.HISTORY_METRICS}}
+            for s in snapshots
+        ],
+    })
+
+@app.route('/api/growth_leaderboard')
+def growth_leaderboard():
+    # Companies ranked by the change of a metric between two crawls (default the first and the latest)
+    if not snapshot_history.refresh():
+        return jsonify({"error": "No snapshot history"}), 404
+    metric = request.args.get('metric', default='follower_count')
+    if metric not in history.HISTORY_METRICS:
+        return jsonify({"error": f"metric must be one of {', '.join(history.HISTORY_METRICS)}"}), 400
+    by = request.args.get('by', default='change')
+    if by not in ('change', 'change_percent'):
+        return jsonify({"error": "by must be change or change_percent"}), 400
+    try:
+        since = crawl_date_arg('since') or snapshot_history.dates[0]
+        until = crawl_date_arg('until') or snapshot_history.dates[-1]
+    except ValueError:
+        return jsonify({"error": "since and until must be dates (YYYY-MM-DD)"}), 400
+    limit = min(max(request.args.get('limit', default=20, type=int), 1), MAX_LEADERBOARD)
+    # Small companies make huge percentages; min_start leaves them out
+    min_start = request.args.get('min_start', default=0, type=float)
+
+    growth = snapshot_history.growth(metric, since, until)
+    growth = growth[growth['start'] >= min_start].dropna(subset=[by])
+    top = growth.nlargest(limit, by)
+    return jsonify({
+        'metric': metric,
+        'since': since,
+        'until': until,
+        'companies': len(growth),
+        'leaders': [
+            {'name': name, 'start': safe_int(start), 'end': safe_int(end), 'change': safe_int(change),
+             'change_percent': None if pd.isna(percent) else round(percent, 2)}
+            for name, start, end, change, percent in zip(top['name'], top['start'], top['end'], top['change'],
+                                                        top['change_percent'])
+        ],
+    })
+
+def company_names_data(df):
+    return df['name'].tolist()
+
 @app.route('/api/company_names')
 def company_names():
-    names = df['name'].tolist()
-    return jsonify(names)
+    return cached_json(active_dataset(), ('company_names',), company_names_data)
+
+# Aggregates built ahead of time by precompute_aggregates(); with gunicorn's preload_app
+# this happens once in the master and the results are shared with every forked worker
+PRECOMPUTED = {
+    ('company_size_distribution',): company_size_data,
+    ('industry_breakdown',): industry_breakdown_data,
+    ('geographical_distribution',): geographical_data,
+    ('follower_count_analysis',): follower_count_data,
+    ('top_companies_by_followers',): top_companies_by_followers_data,
+    ('founded_year_timeline',): founded_year_data,
+    ('specialties_wordcloud',): specialties_data,
+    ('company_type_distribution',): company_type_data,
+    ('funding_analysis',): funding_data,
+    ('employee_follower_correlation',): employee_follower_data,
+    ('company_names',): company_names_data,
+}
+
+def precompute_aggregates(ds=None):
+    ds = ds or active_dataset()
+    start = time.perf_counter()
+    for key, compute in PRECOMPUTED.items():
+        cached_json(ds, key, compute)
+    cached_aggregate(ds, ('company_index',), company_index_data)
+    cached_aggregate(ds, ('company_averages',), company_averages_data)
+    cached_aggregate(ds, ('follower_ranking',), follower_ranking_data)
+    cached_aggregate(ds, ('peer_table',), peer_table_data)
+    cached_aggregate(ds, ('similarity_index',), similarity_index_data)
+    cached_aggregate(ds, ('tile_aggregates',), tile_aggregates_data)
+    for key, compute in FUNDING_AGGREGATES.items():
+        cached_json(ds, key, lambda df, compute=compute: compute(ds))
+    cached_aggregate(ds, ('investor_frequency',), lambda df: investor_frequency_data(ds))
+    for chart, (data_function, build_figure) in FIGURES.items():
+        cached_aggregate(ds, ('figure', chart), lambda df: build_figure(data_function(df)).to_json())
+    dataset_precompute_seconds.observe(value=time.perf_counter() - start)
+
+def reload_dataset(path=DATA_FILE):
+    """Build a new dataset version with all its aggregates, then swap it in with one assignment."""
+    global current_dataset
+    with reload_lock:
+        try:
+            new_dataset = load_dataset(path)
+            if new_dataset.version == current_dataset.version:
+                return current_dataset
+            precompute_aggregates(new_dataset)
+        except Exception as e:
+            # A half-written workbook (company.py saves after every company) just waits for the next change
+            reload_status['last_error'] = f"{type(e).__name__}: {e}"
+            app.logger.warning("Dataset reload from %s failed: %s", path, reload_status['last_error'])
+            return current_dataset
+
+        reload_status['previous_version'] = current_dataset.version
+        reload_status['reloads'] += 1
+        reload_status['last_error'] = None
+        if shared_cache is not None:
+            # Workers still on the previous version keep reading its entries until they reload too
+            shared_cache.prune([cache_namespace(new_dataset), cache_namespace(current_dataset)])
+        current_dataset = new_dataset
+        set_dataset_info(new_dataset)
+        app.logger.info("Dataset reloaded: %s -> %s", reload_status['previous_version'], new_dataset.version)
+        return new_dataset
+
+def start_dataset_watcher(path=DATA_FILE, interval=DATASET_WATCH_INTERVAL):
+    """Reload the dataset in a background thread whenever the workbook changes."""
+    if interval <= 0:
+        return None
+    watcher = dataset.DatasetWatcher(path, reload_dataset, interval)
+    watcher.start()
+    return watcher
+
+@app.route('/api/admin/dataset')
+def admin_dataset():
+    ds = active_dataset()
+    return jsonify({
+        'version': ds.version,
+        'path': ds.path,
+        'rows': len(ds.frame),
+        'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(ds.loaded_at)),
+        'load_seconds': round(ds.load_seconds, 3),
+        'cached_aggregates': len(ds.aggregates),
+        'reloads': reload_status['reloads'],
+        'previous_version': reload_status['previous_version'],
+        'last_error': reload_status['last_error']
+    })
+
+@app.route('/api/admin/cache')
+def admin_cache():
+    ds = active_dataset()
+    results = {}
+    for (_, result), count in cache_requests.snapshot():
+        results[result] = results.get(result, 0) + count
+    lookups = sum(results.values())
+    local = results.get('hit', 0) + results.get('coalesced', 0)
+    shared = results.get('shared', 0) + results.get('waited', 0)
+    return jsonify({
+        'namespace': cache_namespace(ds),
+        'lookups': results,
+        'local_hit_rate': round(local / lookups, 4) if lookups else None,
+        'shared_hit_rate': (round(shared / (lookups - local), 4)
+                            if shared_cache is not None and lookups > local else None),
+        'local': {'entries': len(ds.aggregates), 'max_entries': ds.aggregates.maxsize,
+                  'evictions': ds.aggregates.evictions},
+        'per_request': {'entries': len(ds.request_aggregates), 'max_entries': ds.request_aggregates.maxsize,
+                        'evictions': ds.request_aggregates.evictions},
+        'shared': shared_cache.stats() if shared_cache is not None else None,
+    })
+
+def route_label():
+    # The URL rule, not the path, so /api/company_details/<name> is one series
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if sample_profiler:
+        sample_profiler.start()
+
+@app.after_request
+def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.get('request_start', time.perf_counter())
+    route = route_label()
+    request_latency.observe(route, request.method, response.status_code, value=elapsed)
+    if not response.is_streamed:
+        response_size.observe(route, value=response.calculate_content_length() or 0)
+
+    if sample_profiler:
+        samples = sample_profiler.stop()
+        slow = elapsed * 1000 >= PROFILE_SLOW_REQUEST_MS
+        if samples and (slow or request.args.get('profile') == '1'):
+            path = profiler.write_collapsed(samples, PROFILE_DIR, f'{route}-{elapsed * 1000:.0f}ms')
+            app.logger.info("Profile of %s (%.0f ms) written to %s", request.path, elapsed * 1000, path)
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
 
 @app.errorhandler(500)
 def internal_error(error):
+    original = getattr(error, 'original_exception', None) or error
+    request_errors.inc(route_label(), type(original).__name__)
     return jsonify({"error": "Internal Server Error"}), 500
 
 if __name__ == '__main__':
+    start_dataset_watcher()
     app.run(host='0.0.0.0', port=5050, debug=True)
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""
+ASGI serving mode for the API: the Flask app behind an event loop that accepts every
+connection, runs the handlers in a bounded thread pool and turns requests away with a 503
+once too many are waiting, instead of letting them queue behind slow ones.
+
+    gunicorn -c gunicorn.conf.py  (with SERVING_MODE=async)
+    uvicorn asgi:application --port 5050
+
+Concurrent requests that miss the same aggregate are coalesced by app.cached_aggregate, so
+a burst of requests for an uncached payload computes it once while the other threads wait.
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import app as api
+
+# Threads running Flask handlers; pandas releases the GIL for much of its work
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', '8'))
+# Threads computing uncached aggregates; requests that miss wait for one of these
+ASGI_AGGREGATE_THREADS = int(os.getenv('ASGI_AGGREGATE_THREADS', '1'))
+# Requests accepted (running or waiting for a thread) before new ones get a 503
+ASGI_MAX_PENDING = int(os.getenv('ASGI_MAX_PENDING', '32'))
+RETRY_AFTER_SECONDS = 1
+# Body chunks a handler thread may get ahead of the client before it waits for them to be sent
+STREAM_BUFFER_CHUNKS = 2
+
+requests_pending = api.registry.gauge('api_requests_pending', 'Requests running or waiting for a handler thread')
+requests_rejected = api.registry.counter('api_requests_rejected_total',
+                                         'Requests turned away with 503 because too many were pending')
+
+def wsgi_environ(scope, body):
+    """The WSGI environ of an ASGI HTTP scope."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        # WSGI strings are bytes decoded as latin-1
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+def call_wsgi(wsgi_app, environ, put):
+    # Runs in a pool thread: hands (status, headers) and then each chunk of the body to put(),
+    # so streamed responses reach the client chunk by chunk instead of being joined first
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+    chunks = wsgi_app(environ, start_response)
+    try:
+        started = False
+        for chunk in chunks:
+            if not started:
+                put((response['status'], response['headers']))
+                started = True
+            if chunk:
+                put(bytes(chunk))
+        if not started:
+            put((response['status'], response['headers']))
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+class AsyncApi:
+    """
+    ASGI application running a WSGI app in a bounded thread pool, with backpressure. Cache misses
+    of app.cached_aggregate run in a second, smaller pool, so slow aggregations leave most
+    handler threads free for requests that are already cached.
+    """
+
+    def __init__(self, wsgi_app, threads=ASGI_THREADS, aggregate_threads=ASGI_AGGREGATE_THREADS,
+                 max_pending=ASGI_MAX_PENDING):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self.aggregate_threads = aggregate_threads
+        self.max_pending = max_pending
+        self.pending = 0
+        self.executor = None
+
+    def start(self):
+        # Pools are created in the serving process: gunicorn forks after importing this
+        # module, and threads do not survive a fork
+        self.executor = ThreadPoolExecutor(self.threads, thread_name_prefix='api')
+        api.aggregate_executor = ThreadPoolExecutor(self.aggregate_threads, thread_name_prefix='aggregate')
+
+    def stop(self):
+        self.executor.shutdown(wait=True)
+        api.aggregate_executor.shutdown(wait=True)
+        self.executor = api.aggregate_executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.executor:
+                    self.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        # The event loop only counts requests, so pending needs no lock
+        if self.pending >= self.max_pending:
+            requests_rejected.inc()
+            body = json.dumps({'error': 'Server busy, retry later'}).encode('utf-8')
+            await self.respond(send, 503, [(b'content-type', b'application/json'),
+                                           (b'retry-after', str(RETRY_AFTER_SECONDS).encode('ascii'))], body)
+            return
+
+        self.pending += 1
+        requests_pending.set(value=self.pending)
+        try:
+            body = await read_body(receive)
+            if self.executor is None:
+                # Servers that do not send lifespan events
+                self.start()
+            await self.stream(send, wsgi_environ(scope, body))
+        finally:
+            self.pending -= 1
+            requests_pending.set(value=self.pending)
+
+    async def stream(self, send, environ):
+        # The handler thread blocks once STREAM_BUFFER_CHUNKS chunks are waiting, so memory stays
+        # bounded by a few chunks however large the response; it counts as pending until done
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(STREAM_BUFFER_CHUNKS)
+        disconnected = threading.Event()
+
+        def put(item):
+            if disconnected.is_set():
+                raise ConnectionAbortedError('client went away')
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def run():
+            try:
+                call_wsgi(self.wsgi_app, environ, put)
+            finally:
+                if not disconnected.is_set():
+                    asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+
+        handler = loop.run_in_executor(self.executor, run)
+        try:
+            while (item := await queue.get()) is not None:
+                if isinstance(item, tuple):
+                    await send({'type': 'http.response.start', 'status': item[0], 'headers': item[1]})
+                else:
+                    await send({'type': 'http.response.body', 'body': item, 'more_body': True})
+        except BaseException:
+            # Unblock the handler thread and let it stop at its next chunk
+            disconnected.set()
+            while not queue.empty():
+                queue.get_nowait()
+            raise
+        await handler
+        await send({'type': 'http.response.body', 'body': b''})
+
+    @staticmethod
+    async def respond(send, status, headers, body):
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+application = AsyncApi(api.app)
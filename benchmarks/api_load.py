@@ -0,0 +1,250 @@
+"""
+Load test for every /api route at several dataset sizes.
+
+For each scale factor a synthetic dataset of scale x the real row count is generated
+(benchmarks/synthetic_data.py), the API is started on it under gunicorn, and concurrent
+clients drive every route for a fixed duration. Throughput and p50/p95/p99 latency are
+reported per route and dataset size. Each dataset is served with a crawl history of a few
+weekly crawls (history.py), so the history routes answer too.
+
+    python -m benchmarks.api_load --scales 1 10 100 --concurrency 16 --duration 20
+    python -m benchmarks.api_load --output results.json
+    python -m benchmarks.api_load --baseline results.json --max-regression 0.25
+
+With --baseline the run exits non-zero when any route's p95 is more than
+--max-regression slower than in the baseline file, so it can gate a deploy.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import requests
+
+import history
+from benchmarks.synthetic_data import DEFAULT_TEMPLATE, generate_companies, write_dataset
+from dataset import read_company_table
+
+# Route templates; {company} is replaced with a random company name per request
+ROUTES = [
+    '/api/company_size_distribution',
+    '/api/industry_breakdown',
+    '/api/geographical_distribution',
+    '/api/follower_count_analysis',
+    '/api/top_companies_by_followers',
+    '/api/founded_year_timeline',
+    '/api/top_companies_followers?n=10',
+    '/api/specialties_wordcloud',
+    '/api/company_type_distribution',
+    '/api/funding_analysis',
+    '/api/funding_analysis?mode=bins',
+    '/api/funding_analysis?mode=sample',
+    '/api/employee_follower_correlation',
+    '/api/employee_follower_correlation?mode=bins',
+    '/api/employee_follower_correlation?mode=sample',
+    '/api/figures/industry',
+    '/api/figures/employee_follower_density',
+    '/api/company_details/{company}',
+    '/api/similar/{company}',
+    '/api/similar/{company}?k=50',
+    '/api/geo_tiles',
+    '/api/geo_tiles?zoom=12&bbox=150.9,-34.0,151.4,-33.7',
+    '/api/export/companies?columns=name,industry,follower_count&filter=follower_count>=1000',
+    '/api/export/companies?format=parquet&columns=name,industry,follower_count',
+    '/api/export/earnings',
+    '/api/funding_by_industry_year',
+    '/api/funding_round_sizes',
+    '/api/investor_frequency?limit=50',
+    '/api/acquisitions_by_year',
+    '/api/admin/cache',
+    '/api/company_names',
+    '/api/admin/dataset',
+    '/api/company_history/{company}',
+    '/api/growth_leaderboard',
+    '/api/growth_leaderboard?by=change_percent&min_start=100',
+]
+# Weekly crawls written to the crawl history each dataset is served with
+HISTORY_CRAWLS = 12
+
+# How to start each server, given a port; extra environment comes from start_server
+SERVERS = {
+    'gunicorn': lambda port, workers: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                       '-b', f'127.0.0.1:{port}', '-w', str(workers)],
+    'gunicorn-async': lambda port, workers: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                             '-b', f'127.0.0.1:{port}', '-w', str(workers),
+                                             '-k', 'uvicorn.workers.UvicornWorker', 'asgi:application'],
+}
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def write_history(data_file, directory, crawls=HISTORY_CRAWLS, seed=0):
+    # The dataset crawled weekly with drifting follower counts, for the history routes
+    frame = read_company_table(data_file, ['name'] + history.HISTORY_METRICS)
+    frame['follower_count'] = pd.to_numeric(frame['follower_count'], errors='coerce')
+    snapshots = history.SnapshotHistory(directory)
+    rng = np.random.default_rng(seed)
+    for date in pd.date_range('2024-01-01', periods=crawls, freq='7D').strftime('%Y-%m-%d'):
+        snapshots.append(frame, date)
+        frame['follower_count'] = np.round(frame['follower_count'] * rng.uniform(0.98, 1.1, len(frame)))
+
+def start_server(kind, data_file, workers, history_dir=None, cache_dir=None):
+    # The shared aggregate cache starts empty in cache_dir, or is off: never warm from an earlier run
+    port = free_port()
+    env = dict(os.environ, COMPANY_DATA_FILE=data_file, DATASET_WATCH_INTERVAL='0',
+               AGGREGATE_CACHE_FILE=os.path.join(cache_dir, f'aggregates-{port}.sqlite') if cache_dir else '')
+    if history_dir:
+        env['COMPANY_HISTORY_DIR'] = history_dir
+    process = subprocess.Popen(SERVERS[kind](port, workers), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 300
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{kind} server exited with {process.returncode}')
+        try:
+            if requests.get(f'{base_url}/api/admin/dataset', timeout=60).ok:
+                return process, base_url
+        except (requests.ConnectionError, requests.Timeout):
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f'{kind} server did not become ready')
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000 if values else float('nan')
+
+def drive(base_url, company_names, concurrency, duration):
+    """Every client picks routes round-robin from a random offset until the time is up."""
+    latencies = {route: [] for route in ROUTES}
+    errors = {route: 0 for route in ROUTES}
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        session = requests.Session()
+        i = rng.randrange(len(ROUTES))
+        while time.time() < stop_at:
+            route = ROUTES[i % len(ROUTES)]
+            i += 1
+            url = base_url + route.replace('{company}', quote(rng.choice(company_names), safe=''))
+            start = time.perf_counter()
+            try:
+                ok = session.get(url, timeout=60).status_code < 500
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies[route].append(elapsed)
+                if not ok:
+                    errors[route] += 1
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+
+    return {
+        route: {
+            'requests': len(latencies[route]),
+            'errors': errors[route],
+            'throughput': len(latencies[route]) / duration,
+            'p50_ms': percentile(latencies[route], 50),
+            'p95_ms': percentile(latencies[route], 95),
+            'p99_ms': percentile(latencies[route], 99),
+        }
+        for route in ROUTES
+    }
+
+def run(scales, concurrency, duration, workers, server, data_dir):
+    os.makedirs(data_dir, exist_ok=True)
+    base_rows = len(pd.read_excel(DEFAULT_TEMPLATE))
+    results = []
+    for scale in scales:
+        if scale == 1:
+            data_file = DEFAULT_TEMPLATE
+        else:
+            data_file = os.path.join(data_dir, f'companies_{scale}x.parquet')
+            if not os.path.exists(data_file):
+                write_dataset(generate_companies(base_rows * scale, seed=scale), data_file)
+        history_dir = os.path.join(data_dir, f'history_{scale}x')
+        if not os.path.exists(history_dir):
+            write_history(data_file, history_dir)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            process, base_url = start_server(server, data_file, workers, history_dir, cache_dir)
+            try:
+                rows = requests.get(f'{base_url}/api/admin/dataset').json()['rows']
+                names = [n for n in requests.get(f'{base_url}/api/company_names').json() if isinstance(n, str)]
+                # One warm-up pass so lazily built aggregates are not counted
+                for route in ROUTES:
+                    requests.get(base_url + route.replace('{company}', quote(names[0], safe='')))
+                routes = drive(base_url, names, concurrency, duration)
+            finally:
+                process.terminate()
+                process.wait()
+
+        results.append({'scale': scale, 'rows': rows, 'server': server, 'workers': workers,
+                        'concurrency': concurrency, 'routes': routes})
+        report(results[-1])
+    return results
+
+def report(result):
+    total = sum(r['throughput'] for r in result['routes'].values())
+    print(f"\n{result['server']}, {result['rows']} companies ({result['scale']}x), "
+          f"{result['workers']} workers, {result['concurrency']} clients: {total:.0f} req/s")
+    print(f"{'route':<50} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for route, r in result['routes'].items():
+        print(f"{route:<50} {r['throughput']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>7}")
+
+def regressions(results, baseline, max_regression):
+    """(scale, route, baseline p95, current p95) for every route slower than allowed."""
+    previous = {(r['scale'], r['server']): r['routes'] for r in baseline}
+    found = []
+    for result in results:
+        for route, r in result['routes'].items():
+            before = previous.get((result['scale'], result['server']), {}).get(route)
+            if before and r['p95_ms'] > before['p95_ms'] * (1 + max_regression):
+                found.append((result['scale'], route, before['p95_ms'], r['p95_ms']))
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20, help='seconds per dataset size')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--server', choices=sorted(SERVERS), default='gunicorn')
+    parser.add_argument('--data-dir', default=None, help='where generated datasets are kept (default: temp dir)')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='results JSON from an earlier run to compare p95 against')
+    parser.add_argument('--max-regression', type=float, default=0.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args.scales, args.concurrency, args.duration, args.workers, args.server, args.data_dir or tmp)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.max_regression)
+        for scale, route, before, after in found:
+            print(f'REGRESSION {scale}x {route}: p95 {before:.1f} ms -> {after:.1f} ms')
+        if found:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
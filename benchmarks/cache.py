@@ -0,0 +1,71 @@
+"""
+Benchmark of the shared aggregate cache in cache.py on a synthetic table (benchmarks/synthetic_data.py).
+Starts fresh worker processes that load the dataset and run precompute_aggregates(), the way a
+gunicorn worker or a new instance starts, and reports their precompute time and where each
+aggregate came from: without the shared store, with an empty one and with one another worker
+has filled. Then starts --workers processes at once on an empty store, where the leases should
+leave one process computing each aggregate while the others wait for it.
+
+    python -m benchmarks.cache --rows 100000 --workers 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_data import generate_companies, write_dataset
+
+def worker():
+    # One worker start: load the dataset, precompute everything, report where aggregates came from
+    import app
+    start = time.perf_counter()
+    app.precompute_aggregates()
+    results = {}
+    for (_, result), count in app.cache_requests.snapshot():
+        results[result] = results.get(result, 0) + count
+    print(json.dumps({'seconds': time.perf_counter() - start, 'results': results}))
+
+def start_workers(path, cache_file, count):
+    env = dict(os.environ, COMPANY_DATA_FILE=path, AGGREGATE_CACHE_FILE=cache_file, DATASET_WATCH_INTERVAL='0')
+    start = time.perf_counter()
+    processes = [subprocess.Popen([sys.executable, '-m', 'benchmarks.cache', '--worker'], env=env,
+                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+                 for _ in range(count)]
+    reports = [json.loads(process.communicate()[0].strip().splitlines()[-1]) for process in processes]
+    return time.perf_counter() - start, reports
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return worker()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_dataset(generate_companies(args.rows), os.path.join(directory, 'companies.parquet'))
+        cache_file = os.path.join(directory, 'aggregates.sqlite')
+        concurrent_file = os.path.join(directory, 'concurrent.sqlite')
+        scenarios = [
+            ('no shared store', '', 1),
+            ('empty shared store', cache_file, 1),
+            ('warm shared store', cache_file, 1),
+            (f'{args.workers} workers, no shared store', '', args.workers),
+            (f'{args.workers} workers, empty shared store', concurrent_file, args.workers),
+        ]
+        print(f"\n{args.rows} companies")
+        print(f"{'worker start':<34} {'wall s':>7} {'precompute s':>13} {'computed':>9} {'shared':>7} {'waited':>7}")
+        for label, store, count in scenarios:
+            wall, reports = start_workers(path, store, count)
+            totals = {result: sum(r['results'].get(result, 0) for r in reports) for result in ('miss', 'shared', 'waited')}
+            precompute = max(r['seconds'] for r in reports)
+            print(f"{label:<34} {wall:>7.2f} {precompute:>13.2f} {totals['miss']:>9} {totals['shared']:>7} "
+                  f"{totals['waited']:>7}")
+        print(f"shared store: {os.path.getsize(cache_file) / 2**20:.1f} MB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark of cleaning.clean_companies on large synthetic tables with known duplicates.
+
+A synthetic table (benchmarks/synthetic_data.py) is generated with --duplicate-rate re-crawled
+companies (same LinkedIn URL, edited name); then the LinkedIn URL of --missing-url-rate of the
+rows is removed, so those duplicates can only be found by name. The original URLs are the
+ground truth for pairwise precision and recall.
+
+Also timed, for comparison:
+  - the notebook's whole-row drop_duplicates(), which finds none of the edited re-crawls;
+  - all-pairs name comparison on --all-pairs-rows rows, extrapolated to the full table.
+
+    python -m benchmarks.cleaning --rows 100000 200000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import cleaning
+from benchmarks.synthetic_data import generate_companies
+
+def _pairs(sizes):
+    sizes = np.asarray(sizes, dtype=np.int64)
+    return int((sizes * (sizes - 1) // 2).sum())
+
+def pairwise_scores(truth, labels):
+    """Precision and recall of the same-company pairs in labels against the truth labels."""
+    frame = pd.DataFrame({'truth': truth, 'label': labels})
+    true_pairs = _pairs(frame.groupby('truth').size())
+    found_pairs = _pairs(frame.groupby('label').size())
+    correct_pairs = _pairs(frame.groupby(['truth', 'label']).size())
+    return (correct_pairs / found_pairs if found_pairs else 1.0,
+            correct_pairs / true_pairs if true_pairs else 1.0)
+
+def all_pairs_seconds(keys, rows, threshold):
+    # Every name against every other name, on a subset; the cost grows with the square of the rows
+    sample = [k for k in keys[:rows] if isinstance(k, str)]
+    start = time.perf_counter()
+    for i, a in enumerate(sample):
+        for b in sample[i + 1:]:
+            cleaning._similar(a, b, threshold)
+    return time.perf_counter() - start
+
+def run(rows, duplicate_rate, missing_url_rate, window, threshold, all_pairs_rows, seed=0):
+    df = generate_companies(rows, seed=seed, duplicate_rate=duplicate_rate)
+    rng = np.random.default_rng(seed)
+    truth = df['LinkedIn URL'].to_numpy()
+    df.loc[rng.random(len(df)) < missing_url_rate, 'LinkedIn URL'] = np.nan
+
+    start = time.perf_counter()
+    notebook_rows = len(df.drop_duplicates())
+    notebook_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clean, report = cleaning.clean_companies(df, window, threshold)
+    seconds = time.perf_counter() - start
+    del clean
+
+    # Labels again on just the matching columns, for scoring against the truth
+    keyed = cleaning.add_match_keys(df[['name', 'Company Name', 'website', 'LinkedIn URL']].copy())
+    labels, _ = cleaning.duplicate_labels(keyed, window, threshold)
+    precision, recall = pairwise_scores(truth, labels)
+
+    pairs_seconds = all_pairs_seconds(keyed['name_key'].to_numpy(dtype=object), all_pairs_rows, threshold)
+    return {
+        'rows': rows,
+        'expected_rows': len(pd.unique(truth)),
+        'rows_out': report['rows_out'],
+        'seconds': seconds,
+        'steps': report['seconds'],
+        'precision': precision,
+        'recall': recall,
+        'notebook_rows_out': notebook_rows,
+        'notebook_seconds': notebook_seconds,
+        'all_pairs_estimate_seconds': pairs_seconds * (rows / all_pairs_rows) ** 2,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000])
+    parser.add_argument('--duplicate-rate', type=float, default=0.05)
+    parser.add_argument('--missing-url-rate', type=float, default=0.2)
+    parser.add_argument('--window', type=int, default=cleaning.DEFAULT_WINDOW)
+    parser.add_argument('--threshold', type=float, default=cleaning.DEFAULT_THRESHOLD)
+    parser.add_argument('--all-pairs-rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        r = run(rows, args.duplicate_rate, args.missing_url_rate, args.window, args.threshold, args.all_pairs_rows)
+        print(f"\n{r['rows']} rows, {r['expected_rows']} companies")
+        print(f"  clean_companies: {r['seconds']:.2f}s -> {r['rows_out']} rows, "
+              f"pair precision {r['precision']:.3f}, recall {r['recall']:.3f}")
+        print('  steps: ' + ', '.join(f'{step} {s:.2f}s' for step, s in r['steps'].items()))
+        print(f"  notebook drop_duplicates: {r['notebook_seconds']:.2f}s -> {r['notebook_rows_out']} rows")
+        print(f"  all-pairs name matching (estimated): {r['all_pairs_estimate_seconds'] / 3600:.1f}h")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Cold-start cost of the dashboard pages. Each page module is imported in a fresh interpreter,
+after streamlit (which visualization.py always imports), and the time to import it and the
+top-level packages it pulled in are reported. "all pages" imports every page module, which
+is what every session paid before pages were loaded lazily.
+With --importtime the slowest packages of each page are listed from python -X importtime.
+
+    python -m benchmarks.dashboard_startup --repeat 3 --importtime
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+import dashboard
+
+PROBE = '''
+import json, sys, time
+import streamlit
+import dashboard
+start = time.perf_counter()
+for module in sys.argv[1:]:
+    dashboard.timed_import(module)
+seconds = time.perf_counter() - start
+packages = sorted({p for t in dashboard.import_times.values() for p in t['packages']})
+print(json.dumps({'seconds': seconds, 'packages': packages}))
+'''
+
+def page_modules():
+    modules = {}
+    for title, (module, function) in dashboard.PAGES.items():
+        modules.setdefault(f'dashboard.{module}', []).append(title)
+    return modules
+
+def cold_import(modules):
+    output = subprocess.run([sys.executable, '-c', PROBE, *modules], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def slowest_packages(modules, top):
+    # Cumulative import time per top-level package, from the -X importtime lines on stderr
+    statement = 'import streamlit, dashboard, importlib; ' + '; '.join(f'importlib.import_module({m!r})' for m in modules)
+    baseline = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import streamlit, dashboard'],
+                              capture_output=True, text=True, check=True).stderr
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, check=True).stderr
+    already = {line.split('|')[2].strip() for line in baseline.splitlines() if line.startswith('import time:')}
+    totals = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        if name in already or '.' in name:
+            continue
+        totals[name] = totals.get(name, 0) + int(cumulative) / 1e6
+    return sorted(totals.items(), key=lambda item: -item[1])[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='fresh interpreters per page; the fastest is reported')
+    parser.add_argument('--importtime', action='store_true', help='list the slowest packages of each page')
+    parser.add_argument('--top', type=int, default=5)
+    args = parser.parse_args()
+
+    modules = page_modules()
+    cases = [(module, [module], ', '.join(titles)) for module, titles in modules.items()]
+    cases.append(('all pages', list(modules), 'every page'))
+
+    print(f"{'module':<24} {'import s':>9}  packages")
+    for label, names, titles in cases:
+        runs = [cold_import(names) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run['seconds'])
+        packages = ', '.join(best['packages']) or '-'
+        print(f"{label:<24} {best['seconds']:>9.3f}  {packages}")
+        print(f"{'':<24} {'':>9}  pages: {titles}")
+        if args.importtime:
+            for package, seconds in slowest_packages(names, args.top):
+                print(f"{'':<24} {seconds:>9.3f}    {package}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+End-to-end benchmark of the enrichment scripts against the fake API server.
+
+company.py, logos.py and location_money.py each run through their main() in a subprocess, in a
+scratch directory, with their base URLs pointed at benchmarks/fake_api.py. The input for
+each is built from the first N companies of company_information_full.xlsx. Per script the
+report shows companies per minute, API calls spent per company and wasted calls (429s and
+5xx errors that had to be retried or were dropped).
+
+The client-side limits the scripts use in production (2 req/min for company.py, 5/min for
+logos.py) would make a run take hours, so they are raised by default; pass the production
+values to measure the real schedule.
+
+    python -m benchmarks.enrichment --companies 20
+    python -m benchmarks.enrichment --latency-ms 300 --error-rate 0.05 --burst-probability 0.02
+    python -m benchmarks.enrichment --server-rate-limit 120 --client-rate-limit 100 --backoff-seconds 1
+    python -m benchmarks.enrichment --replay fixtures/enrichment.jsonl --output results.json
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.fake_api import TEMPLATE_FILE, FakeApiServer, FaultConfig
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# How each script is driven from its scratch directory: (prepare inputs, python statement)
+def _prepare_company(workdir, companies):
+    pd.DataFrame({'Company Name': companies}).to_excel(os.path.join(workdir, 'input.xlsx'), sheet_name='Sheet2', index=False)
+    return "import company; company.main('input.xlsx', 'Sheet2', 'company_information_full.xlsx')"
+
+def _prepare_logos(workdir, companies):
+    template = pd.read_excel(os.path.join(REPO_ROOT, TEMPLATE_FILE))
+    template = template[template['Company Name'].isin(companies)]
+    template[['Company Name', 'LinkedIn URL']].to_excel(os.path.join(workdir, 'company_information_full.xlsx'), index=False)
+    return "import logos; logos.main('company_information_full.xlsx')"
+
+def _prepare_location_money(workdir, companies):
+    with open(os.path.join(workdir, 'companies.json'), 'w') as f:
+        json.dump(companies, f)
+    return ("import json, location_money; "
+            "location_money.main(json.load(open('companies.json')), 'australian_companies_data.xlsx')")
+
+SCRIPTS = {
+    'company': _prepare_company,
+    'logos': _prepare_logos,
+    'location_money': _prepare_location_money,
+}
+
+def client_env(client_rate_limit, backoff_seconds, request_interval):
+    return {
+        'PROXYCURL_RATE_LIMIT': str(client_rate_limit),
+        'LOGO_RATE_LIMIT_PER_MINUTE': str(client_rate_limit),
+        'PROXYCURL_BACKOFF_SECONDS': str(backoff_seconds),
+        'GOOGLE_REQUEST_INTERVAL': str(request_interval),
+    }
+
+def run_script(name, server, companies, extra_env):
+    with tempfile.TemporaryDirectory() as workdir:
+        statement = SCRIPTS[name](workdir, companies)
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT, **server.env(), **extra_env)
+        server.reset_stats()
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-c', statement], cwd=workdir, env=env,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        elapsed = time.perf_counter() - start
+        if process.returncode != 0:
+            raise RuntimeError(f'{name} failed:\n{process.stderr[-2000:]}')
+
+    stats = dict(server.stats)
+    api_calls = sum(count for (api, _, _), count in stats.items() if api != 'images')
+    wasted = sum(count for (api, _, status), count in stats.items() if api != 'images' and (status == 429 or status >= 500))
+    return {
+        'script': name,
+        'companies': len(companies),
+        'seconds': elapsed,
+        'companies_per_minute': len(companies) / elapsed * 60,
+        'api_calls': api_calls,
+        'calls_per_company': api_calls / len(companies),
+        'wasted_calls': wasted,
+        'by_status': {f'{api}/{endpoint} {status}': count for (api, endpoint, status), count in sorted(stats.items())},
+    }
+
+def report(results):
+    print(f"{'script':<16} {'companies':>9} {'seconds':>8} {'co/min':>8} {'calls':>6} {'calls/co':>8} {'wasted':>6}")
+    for r in results:
+        print(f"{r['script']:<16} {r['companies']:>9} {r['seconds']:>8.1f} {r['companies_per_minute']:>8.1f} "
+              f"{r['api_calls']:>6} {r['calls_per_company']:>8.2f} {r['wasted_calls']:>6}")
+    for r in results:
+        print(f"\n{r['script']}:")
+        for key, count in r['by_status'].items():
+            print(f'  {key:<40} {count:>6}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scripts', nargs='+', choices=sorted(SCRIPTS), default=list(SCRIPTS))
+    parser.add_argument('--companies', type=int, default=20)
+    parser.add_argument('--replay', help='fixture file recorded with benchmarks.fake_api --record')
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--server-rate-limit', type=float, default=None, help='requests per minute per API')
+    parser.add_argument('--burst-probability', type=float, default=0)
+    parser.add_argument('--burst-length', type=int, default=3)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--not-found-rate', type=float, default=0.05)
+    parser.add_argument('--client-rate-limit', type=float, default=600, help='requests per minute (company.py, logos.py)')
+    parser.add_argument('--backoff-seconds', type=float, default=1, help="company.py's first backoff after a 429")
+    parser.add_argument('--request-interval', type=float, default=0.05, help='location_money.py pause between companies')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args()
+
+    template = pd.read_excel(TEMPLATE_FILE)
+    companies = template['Company Name'].dropna().drop_duplicates().head(args.companies).tolist()
+
+    faults = FaultConfig(args.latency_ms, args.jitter_ms, args.server_rate_limit, args.burst_probability,
+                         args.burst_length, args.error_rate, args.not_found_rate, args.seed)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = FakeApiServer(faults, replay=args.replay).start()
+    try:
+        extra_env = client_env(args.client_rate_limit, args.backoff_seconds, args.request_interval)
+        results = [run_script(name, server, companies, extra_env) for name in args.scripts]
+    finally:
+        server.stop()
+
+    report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
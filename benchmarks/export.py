@@ -0,0 +1,95 @@
+"""
+Benchmark of /api/export/companies on a synthetic table: for Arrow and Parquet, the full table,
+a column projection and a filtered projection, reports the response size, the time to stream
+it through Flask's test client, the time for a client to read it back into pandas and the
+most Arrow memory held at once while streaming, sampled after every chunk (bounded by one
+chunk, not by the size of the export).
+With --xlsx the same table is also written as a workbook and timed with pd.read_excel, the
+way analysts read company_information_full.xlsx today.
+
+    python -m benchmarks.export --rows 100000 --xlsx
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic_data import generate_companies, write_dataset
+
+QUERIES = {
+    'all columns': '',
+    'projection': '&columns=name,industry,company_size_on_linkedin,follower_count',
+    'filter + projection': '&columns=name,industry,follower_count&filter=follower_count>=10000'
+                           '&filter=industry==Software Development',
+}
+
+def read_back(fmt, body):
+    if fmt == 'parquet':
+        return pq.read_table(io.BytesIO(body)).to_pandas()
+    return pa.ipc.open_stream(io.BytesIO(body)).read_all().to_pandas()
+
+def run(path, formats):
+    os.environ['COMPANY_DATA_FILE'] = path
+    os.environ['DATASET_WATCH_INTERVAL'] = '0'
+    # Compute everything here: no shared aggregate cache left over from another run
+    os.environ['AGGREGATE_CACHE_FILE'] = ''
+    import app
+    app.reload_dataset(path)
+    client = app.app.test_client()
+    pool = pa.default_memory_pool()
+
+    results = []
+    for label, query in QUERIES.items():
+        for fmt in formats:
+            baseline = pool.bytes_allocated()
+            peak = 0
+            start = time.perf_counter()
+            response = client.get(f'/api/export/companies?format={fmt}{query}', buffered=False)
+            chunks = []
+            for chunk in response.response:
+                chunks.append(chunk)
+                peak = max(peak, pool.bytes_allocated() - baseline)
+            body = b''.join(chunks)
+            stream_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            rows = len(read_back(fmt, body))
+            results.append({'query': label, 'format': fmt, 'rows': rows, 'bytes': len(body),
+                            'stream_seconds': stream_seconds, 'read_seconds': time.perf_counter() - start,
+                            'peak_arrow_bytes': peak})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--formats', nargs='+', default=['arrow', 'parquet'])
+    parser.add_argument('--xlsx', action='store_true', help='also time reading the table from a workbook')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        df = generate_companies(args.rows)
+        path = write_dataset(df, os.path.join(directory, 'companies.parquet'))
+        xlsx_seconds = None
+        if args.xlsx:
+            xlsx_path = write_dataset(df, os.path.join(directory, 'companies.xlsx'))
+            start = time.perf_counter()
+            pd.read_excel(xlsx_path)
+            xlsx_seconds = time.perf_counter() - start
+        del df
+        results = run(path, args.formats)
+
+    print(f"\n{args.rows} companies")
+    print(f"{'query':<22} {'format':<8} {'rows':>7} {'MB':>8} {'stream s':>9} {'read s':>7} {'Arrow MB':>14}")
+    for r in results:
+        print(f"{r['query']:<22} {r['format']:<8} {r['rows']:>7} {r['bytes'] / 2**20:>8.1f} {r['stream_seconds']:>9.2f} "
+              f"{r['read_seconds']:>7.2f} {r['peak_arrow_bytes'] / 2**20:>14.1f}")
+    if xlsx_seconds is not None:
+        print(f"pd.read_excel of the same table: {xlsx_seconds:.1f}s")
+
+if __name__ == '__main__':
+    main()
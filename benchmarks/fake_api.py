@@ -0,0 +1,331 @@
+"""
+Local stand-in for the paid APIs the enrichment scripts call (ProxyCurl and Google Maps).
+
+Responses come from, in order:
+  1. a fixture file recorded from the real APIs (--replay), keyed by path and query string;
+  2. synthesized responses shaped like the real ones, built from company_information_full.xlsx
+     and data/map/au.csv.
+
+In record mode (--record) requests are forwarded to the real APIs with the caller's own
+credentials and every response is appended to the fixture file, with the API key and
+Authorization header stripped.
+
+Latency, rate limiting (429 with Retry-After), bursts of 429s and random 5xx errors can be
+injected to see how the scripts' rate limiting and retry logic behave. Every response is
+counted in server.stats.
+
+Point the scripts at it with:
+    PROXYCURL_BASE_URL=http://127.0.0.1:8089/proxycurl/api
+    GOOGLE_MAPS_BASE_URL=http://127.0.0.1:8089/maps/api
+
+    python -m benchmarks.fake_api --port 8089 --latency-ms 300 --rate-limit 300 --error-rate 0.02
+    python -m benchmarks.fake_api --port 8089 --record fixtures/enrichment.jsonl
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+
+import pandas as pd
+import requests
+from flask import Flask, Response, jsonify, request, send_file
+from werkzeug.serving import make_server
+
+TEMPLATE_FILE = 'company_information_full.xlsx'
+CITIES_FILE = 'data/map/au.csv'
+IMAGE_FOLDER = 'company_images'
+
+UPSTREAMS = {
+    'proxycurl': 'https://nubela.co/proxycurl/api',
+    'maps': 'https://maps.googleapis.com/maps/api',
+}
+# Query parameters and headers that carry credentials and never go into fixtures
+SECRET_PARAMS = {'key'}
+
+class FaultConfig:
+    """What the fake server does to requests before answering them."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, rate_limit=None, burst_probability=0.0,
+                 burst_length=5, error_rate=0.0, not_found_rate=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit  # requests per minute per API, None for unlimited
+        self.burst_probability = burst_probability  # chance a request starts a run of 429s
+        self.burst_length = burst_length
+        self.error_rate = error_rate  # chance of a 500
+        self.not_found_rate = not_found_rate  # chance a company lookup finds nothing
+        self.random = random.Random(seed)
+
+# Error bodies in each API's own shape: ProxyCurl sends a description, Google a status field
+ERROR_BODIES = {
+    'proxycurl': {429: {'description': 'Too many requests'}, 500: {'description': 'Internal error'}},
+    'maps': {429: {'status': 'OVER_QUERY_LIMIT', 'results': []}, 500: {'status': 'UNKNOWN_ERROR', 'results': []}},
+}
+
+def fixture_key(path, params):
+    query = sorted((k, v) for k, v in params.items() if k not in SECRET_PARAMS)
+    return f"{path}?{json.dumps(query)}"
+
+def _stable_index(text, size):
+    return int(hashlib.md5(text.encode('utf-8')).hexdigest(), 16) % size
+
+def _json_or_none(text):
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        return None
+
+class FakeApiServer:
+    def __init__(self, faults=None, replay=None, record=None, port=0):
+        self.faults = faults or FaultConfig()
+        self.fixtures = {}
+        self.record_path = record
+        self.record_lock = threading.Lock()
+        if replay:
+            self.load_fixtures(replay)
+
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+        self.recent = {api: deque() for api in UPSTREAMS}
+        self.burst_remaining = {api: 0 for api in UPSTREAMS}
+        self.fault_lock = threading.Lock()
+
+        template = pd.read_excel(TEMPLATE_FILE)
+        self.profiles = template[template['name'].notna()].reset_index(drop=True)
+        self.cities = pd.read_csv(CITIES_FILE)
+        self.image_folder = os.path.abspath(IMAGE_FOLDER)
+        self.images = sorted(f for f in os.listdir(self.image_folder) if f.endswith('.jpg')) if os.path.isdir(self.image_folder) else []
+
+        self.app = self._build_app()
+        self.server = make_server('127.0.0.1', port, self.app, threaded=True)
+        self.port = self.server.server_port
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def env(self):
+        """Environment variables that point company.py, logos.py and location_money.py here."""
+        return {
+            'PROXYCURL_BASE_URL': f'{self.base_url}/proxycurl/api',
+            'GOOGLE_MAPS_BASE_URL': f'{self.base_url}/maps/api',
+            'PROXYCURL_API': os.getenv('PROXYCURL_API', 'fake-proxycurl-key'),
+            'GOOGLE_API_KEY': os.getenv('GOOGLE_API_KEY', 'fake-google-key'),
+        }
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='fake-api', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats.clear()
+
+    def count(self, api, endpoint, status):
+        with self.stats_lock:
+            self.stats[(api, endpoint, status)] += 1
+
+    def load_fixtures(self, path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.fixtures[fixture_key(entry['path'], entry['params'])] = entry
+
+    # Faults
+
+    def _fault(self, api):
+        """Return a (status, body, headers) fault for this request, or None to answer normally."""
+        faults = self.faults
+        delay = faults.latency_ms + faults.random.uniform(-faults.jitter_ms, faults.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        with self.fault_lock:
+            now = time.monotonic()
+            if faults.rate_limit:
+                recent = self.recent[api]
+                while recent and now - recent[0] > 60:
+                    recent.popleft()
+                if len(recent) >= faults.rate_limit:
+                    retry_after = max(1, int(60 - (now - recent[0])) + 1)
+                    return 429, ERROR_BODIES[api][429], {'Retry-After': str(retry_after)}
+                recent.append(now)
+
+            if self.burst_remaining[api] > 0:
+                self.burst_remaining[api] -= 1
+                return 429, ERROR_BODIES[api][429], {'Retry-After': '1'}
+            if faults.random.random() < faults.burst_probability:
+                self.burst_remaining[api] = faults.burst_length - 1
+                return 429, ERROR_BODIES[api][429], {'Retry-After': '1'}
+
+            if faults.random.random() < faults.error_rate:
+                return 500, ERROR_BODIES[api][500], {}
+        return None
+
+    # Responses
+
+    def _proxy(self, api, path, params):
+        upstream = UPSTREAMS[api] + path
+        headers = {k: v for k, v in request.headers.items() if k.lower() == 'authorization'}
+        response = requests.get(upstream, params=request.args.to_dict(), headers=headers, timeout=60)
+        body = _json_or_none(response.text)
+        with self.record_lock:
+            with open(self.record_path, 'a') as f:
+                f.write(json.dumps({'path': request.path, 'params': params,
+                                    'status': response.status_code, 'body': body}) + '\n')
+        return response.status_code, body
+
+    def _synthesize(self, endpoint, params):
+        if endpoint == 'resolve':
+            name = params.get('company_name', '')
+            if self.faults.random.random() < self.faults.not_found_rate:
+                return 404, {'description': 'Company not found'}
+            slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+            return 200, {'url': f'https://www.linkedin.com/company/{slug}'}
+        if endpoint == 'profile':
+            return 200, self._profile(params.get('url', ''))
+        if endpoint == 'picture':
+            url = params.get('linkedin_company_profile_url', '')
+            if not self.images:
+                return 200, {'tmp_profile_pic_url': None}
+            image = self.images[_stable_index(url, len(self.images))]
+            return 200, {'tmp_profile_pic_url': f'{self.base_url}/images/{image}'}
+        if endpoint == 'geocode':
+            city = self.cities.iloc[_stable_index(params.get('address', ''), len(self.cities))]
+            return 200, {'status': 'OK', 'results': [{'geometry': {'location': {'lat': city['lat'], 'lng': city['lng']}}}]}
+        if endpoint == 'nearby':
+            count = _stable_index(json.dumps(sorted(params.items())), 20)
+            return 200, {'status': 'OK', 'results': [{'name': f"{params.get('type', 'place')} {i}"} for i in range(count)]}
+        return 404, {'description': 'Unknown endpoint'}
+
+    def _profile(self, url):
+        # A ProxyCurl-shaped company profile built from a real row of the workbook
+        row = self.profiles.iloc[_stable_index(url, len(self.profiles))]
+
+        def value(column):
+            v = row.get(column)
+            return None if pd.isna(v) else v
+
+        def number(column):
+            v = value(column)
+            return None if v is None else int(float(v))
+
+        return {
+            'linkedin_internal_id': str(number('linkedin_internal_id')),
+            'description': value('description'),
+            'website': value('website'),
+            'industry': value('industry'),
+            'company_size': _json_or_none(value('company_size')),
+            'company_size_on_linkedin': number('company_size_on_linkedin'),
+            'hq': {'country': value('hq_country'), 'city': value('hq_city'), 'postal_code': value('hq_postal_code'),
+                   'line_1': value('hq_line_1'), 'is_hq': True, 'state': value('hq_state')},
+            'company_type': value('company_type'),
+            'founded_year': number('founded_year'),
+            'specialities': _json_or_none(value('specialities')) or [],
+            'locations': _json_or_none(value('locations')) or [],
+            'name': value('name'),
+            'tagline': value('tagline'),
+            'universal_name_id': url.rstrip('/').rsplit('/', 1)[-1],
+            'profile_pic_url': value('profile_pic_url'),
+            'background_cover_image_url': value('background_cover_image_url'),
+            'search_id': value('search_id'),
+            'similar_companies': _json_or_none(value('similar_companies')) or [],
+            'affiliated_companies': _json_or_none(value('affiliated_companies')) or [],
+            'updates': _json_or_none(value('updates')) or [],
+            'follower_count': number('follower_count'),
+            'acquisitions': {'acquired': _json_or_none(value('acquisitions_acquired')) or [], 'acquired_by': None},
+            'exit_data': _json_or_none(value('exit_data')) or [],
+            'extra': {
+                'crunchbase_profile_url': value('extra_crunchbase_profile_url'),
+                'ipo_status': value('extra_ipo_status'),
+                'number_of_funding_rounds': number('extra_number_of_funding_rounds'),
+                'total_funding_amount': number('extra_total_funding_amount'),
+                'number_of_investors': number('extra_number_of_investors'),
+            },
+            'funding_data': _json_or_none(value('funding_data')) or [],
+            'categories': _json_or_none(value('categories')) or [],
+            'customer_list': None,
+        }
+
+    def _handle(self, api, endpoint, path):
+        params = {k: v for k, v in request.args.items() if k not in SECRET_PARAMS}
+        fault = self._fault(api)
+        if fault:
+            status, body, headers = fault
+        elif self.record_path:
+            status, body = self._proxy(api, path, params)
+            headers = {}
+        else:
+            fixture = self.fixtures.get(fixture_key(request.path, params))
+            status, body = (fixture['status'], fixture['body']) if fixture else self._synthesize(endpoint, params)
+            headers = {}
+        self.count(api, endpoint, status)
+        response = jsonify(body)
+        response.status_code = status
+        response.headers.update(headers)
+        return response
+
+    def _build_app(self):
+        app = Flask(__name__)
+        routes = [
+            ('proxycurl', 'resolve', '/linkedin/company/resolve'),
+            ('proxycurl', 'profile', '/linkedin/company'),
+            ('proxycurl', 'picture', '/linkedin/company/profile-picture'),
+            ('maps', 'geocode', '/geocode/json'),
+            ('maps', 'nearby', '/place/nearbysearch/json'),
+        ]
+        for api, endpoint, path in routes:
+            prefix = '/proxycurl/api' if api == 'proxycurl' else '/maps/api'
+            app.add_url_rule(prefix + path, endpoint,
+                             lambda api=api, endpoint=endpoint, path=path: self._handle(api, endpoint, path))
+
+        @app.route('/images/<name>')
+        def image(name):
+            self.count('images', 'image', 200)
+            return send_file(os.path.join(self.image_folder, os.path.basename(name)), mimetype='image/jpeg')
+
+        @app.route('/stats')
+        def stats():
+            with self.stats_lock:
+                return Response(json.dumps([{'api': a, 'endpoint': e, 'status': s, 'count': c}
+                                            for (a, e, s), c in sorted(self.stats.items())]),
+                                mimetype='application/json')
+
+        return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--replay', help='fixture file to answer from')
+    parser.add_argument('--record', help='forward to the real APIs and append responses to this fixture file')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--rate-limit', type=float, default=None, help='requests per minute per API')
+    parser.add_argument('--burst-probability', type=float, default=0)
+    parser.add_argument('--burst-length', type=int, default=5)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--not-found-rate', type=float, default=0)
+    args = parser.parse_args()
+
+    faults = FaultConfig(args.latency_ms, args.jitter_ms, args.rate_limit, args.burst_probability,
+                         args.burst_length, args.error_rate, args.not_found_rate)
+    server = FakeApiServer(faults, replay=args.replay, record=args.record, port=args.port)
+    print(f'Fake API listening on {server.base_url}')
+    for name, value in server.env().items():
+        if name.endswith('_URL'):
+            print(f'  {name}={value}')
+    server.server.serve_forever()
+
+if __name__ == '__main__':
+    main()
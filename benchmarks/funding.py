@@ -0,0 +1,108 @@
+"""
+Benchmark of the funding tables in funding.py on synthetic tables (benchmarks/synthetic_data.py,
+whose rows carry the real `funding_data` and `acquisitions_acquired` lists). For each --rows size,
+reports the time to parse the lists into round-level tables at load and their memory, the time
+to compute each aggregate from them, and the latency of the endpoints through Flask's test
+client, against parsing the JSON and aggregating in Python on every request.
+
+    python -m benchmarks.funding --rows 10000 100000
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+import funding
+from benchmarks.synthetic_data import generate_companies, write_dataset
+
+ENDPOINTS = ['funding_by_industry_year', 'funding_round_sizes', 'investor_frequency', 'acquisitions_by_year']
+
+def request_time_round_sizes(funding_data):
+    # What an endpoint without the tables does: parse every cell, then group in Python
+    sizes = {}
+    for text in funding_data:
+        if not isinstance(text, str):
+            continue
+        for round_ in json.loads(text):
+            if round_.get('money_raised') is not None:
+                sizes.setdefault(round_.get('funding_type'), []).append(round_['money_raised'])
+    return {funding_type: statistics.median(values) for funding_type, values in sizes.items()}
+
+def request_time_investors(funding_data):
+    counts = Counter()
+    for text in funding_data:
+        if isinstance(text, str):
+            counts.update(i['name'] for round_ in json.loads(text) for i in round_.get('investor_list') or [])
+    return counts.most_common(50)
+
+def timed(function, repeat=1):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return float(np.median(seconds))
+
+def run(rows, repeat):
+    df = generate_companies(rows)
+    funding_data, acquisitions = df['funding_data'], df['acquisitions_acquired']
+    start = time.perf_counter()
+    tables = funding.FundingTables(funding_data, acquisitions, len(df))
+    parse_seconds = time.perf_counter() - start
+    result = {
+        'rows': rows,
+        'rounds': len(tables.rounds),
+        'investor_rows': len(tables.round_investors),
+        'acquisitions': len(tables.acquisitions),
+        'parse_seconds': parse_seconds,
+        'table_bytes': tables.nbytes,
+        'aggregate_seconds': {
+            'funding_by_industry_year': timed(lambda: funding.funding_by_industry_year(tables, df['industry'])),
+            'funding_round_sizes': timed(lambda: funding.round_sizes(tables)),
+            'investor_frequency': timed(lambda: funding.investor_frequency(tables)),
+            'acquisitions_by_year': timed(lambda: funding.acquisitions_by_year(tables)),
+        },
+        'request_time_seconds': {
+            'funding_round_sizes': timed(lambda: request_time_round_sizes(funding_data)),
+            'investor_frequency': timed(lambda: request_time_investors(funding_data)),
+        },
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_dataset(df, os.path.join(directory, 'companies.parquet'))
+        del df
+        os.environ['COMPANY_DATA_FILE'] = path
+        os.environ['DATASET_WATCH_INTERVAL'] = '0'
+        # Compute everything here: no shared aggregate cache left over from another run
+        os.environ['AGGREGATE_CACHE_FILE'] = ''
+        import app
+        app.reload_dataset(path)
+        client = app.app.test_client()
+        result['endpoint_ms'] = {endpoint: timed(lambda: client.get(f'/api/{endpoint}'), repeat) * 1000
+                                 for endpoint in ENDPOINTS}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        r = run(rows, args.repeat)
+        print(f"\n{r['rows']} companies: {r['rounds']} rounds, {r['investor_rows']} round investors, "
+              f"{r['acquisitions']} acquisitions")
+        print(f"parse at load: {r['parse_seconds']:.2f}s, tables {r['table_bytes'] / 2**20:.1f} MB")
+        print(f"{'endpoint':<26} {'compute ms':>11} {'request ms':>11} {'parse per request ms':>21}")
+        for endpoint in ENDPOINTS:
+            request_time = r['request_time_seconds'].get(endpoint)
+            print(f"{endpoint:<26} {r['aggregate_seconds'][endpoint] * 1000:>11.1f} {r['endpoint_ms'][endpoint]:>11.2f} "
+                  f"{'-' if request_time is None else f'{request_time * 1000:.0f}':>21}")
+
+if __name__ == '__main__':
+    main()
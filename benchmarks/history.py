@@ -0,0 +1,105 @@
+"""
+Benchmark of the crawl history in history.py. A synthetic table (benchmarks/synthetic_data.py)
+is crawled --crawls times, with --change-rate of the companies changing follower count and a
+few companies appearing and disappearing each time. Reports the append time, the size on disk
+against keeping a full Parquet snapshot per crawl, and the latency of a company's history and
+of a growth leaderboard through the API, against answering them from the full snapshots.
+
+    python -m benchmarks.history --rows 100000 --crawls 52
+"""
+import argparse
+import os
+import tempfile
+import time
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+import history
+from benchmarks.synthetic_data import generate_companies
+
+def crawls(df, count, change_rate, seed=0):
+    # (crawl date, table) of each crawl: follower counts drift, companies come and go
+    rng = np.random.default_rng(seed)
+    frame = history.history_table(df)
+    for index, date in enumerate(pd.date_range('2024-01-01', periods=count, freq='7D').strftime('%Y-%m-%d')):
+        if index:
+            changed = rng.random(len(frame)) < change_rate
+            frame = frame.assign(follower_count=np.where(
+                changed, np.round(frame['follower_count'] * rng.uniform(0.98, 1.1, len(frame))), frame['follower_count']))
+            frame = frame[rng.random(len(frame)) >= 0.001]
+            new = pd.DataFrame({'name': [f'New company {index}-{i}' for i in range(10)],
+                                'follower_count': rng.integers(1, 1000, 10).astype(float),
+                                'company_size_on_linkedin': np.nan})
+            frame = pd.concat([frame, new], ignore_index=True)
+        yield date, frame
+
+def latency_ms(function, repeat):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return float(np.median(seconds)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--crawls', type=int, default=52)
+    parser.add_argument('--change-rate', type=float, default=0.05, help='share of companies changing per crawl')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    df = generate_companies(args.rows)
+    with tempfile.TemporaryDirectory() as directory:
+        history_dir, full_dir = os.path.join(directory, 'history'), os.path.join(directory, 'full')
+        os.makedirs(full_dir)
+        snapshots = history.SnapshotHistory(history_dir)
+        append_seconds, full_paths = [], {}
+        for date, frame in crawls(df, args.crawls, args.change_rate):
+            start = time.perf_counter()
+            snapshots.append(frame, date)
+            append_seconds.append(time.perf_counter() - start)
+            full_paths[date] = os.path.join(full_dir, f'{date}.parquet')
+            frame.to_parquet(full_paths[date], index=False, compression='zstd')
+
+        history_bytes = sum(os.path.getsize(snapshots.path(p)) for p in snapshots.partitions)
+        full_bytes = sum(os.path.getsize(path) for path in full_paths.values())
+        deltas = [p['rows'] for p in snapshots.partitions if p['kind'] == 'delta']
+        print(f"\n{args.rows} companies, {args.crawls} crawls, {args.change_rate:.0%} changing per crawl")
+        print(f"append: median {np.median(append_seconds) * 1000:.0f}ms; "
+              f"{len(deltas)} deltas of about {np.median(deltas):.0f} rows")
+        print(f"on disk: {history_bytes / 2**20:.1f} MB, full snapshots {full_bytes / 2**20:.1f} MB")
+
+        os.environ['COMPANY_HISTORY_DIR'] = history_dir
+        os.environ['DATASET_WATCH_INTERVAL'] = '0'
+        # Compute everything here: no shared aggregate cache left over from another run
+        os.environ['AGGREGATE_CACHE_FILE'] = ''
+        import app
+        client = app.app.test_client()
+        names = frame['name'].sample(args.repeat, random_state=0).tolist()
+        dates = snapshots.dates
+        since = dates[len(dates) // 2]
+
+        def full_history(name):
+            return [pd.read_parquet(path, filters=[('name', '==', name)]) for path in full_paths.values()]
+
+        def full_leaderboard():
+            start, end = pd.read_parquet(full_paths[since]), pd.read_parquet(full_paths[dates[-1]])
+            growth = start.merge(end, on='name')
+            return (growth['follower_count_y'] - growth['follower_count_x']).nlargest(20)
+
+        queries = iter(names * 2)
+        print(f"{'query':<34} {'API ms':>8} {'full snapshots ms':>18}")
+        print(f"{'company history, all crawls':<34} "
+              f"{latency_ms(lambda: client.get(f'/api/company_history/{quote(next(queries))}'), args.repeat):>8.1f} "
+              f"{latency_ms(lambda: full_history(next(queries)), args.repeat):>18.1f}")
+        leaderboard = f'/api/growth_leaderboard?since={since}'
+        history.read_partition.cache_clear()
+        print(f"{'growth leaderboard, cold':<34} {latency_ms(lambda: client.get(leaderboard), 1):>8.1f} "
+              f"{latency_ms(full_leaderboard, 1):>18.1f}")
+        print(f"{'growth leaderboard, cached':<34} {latency_ms(lambda: client.get(leaderboard), args.repeat):>8.1f}")
+
+if __name__ == '__main__':
+    main()
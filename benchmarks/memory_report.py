@@ -0,0 +1,67 @@
+"""
+Per-worker memory of the company frame: the full workbook as app.py used to hold it
+versus the compact load-time schema in dataset.py.
+
+Each layout is loaded in a fresh interpreter so the RSS numbers are not polluted by
+the other one. Run from the repository root:
+
+    python -m benchmarks.memory_report [path/to/company_information_full.xlsx]
+"""
+import json
+import subprocess
+import sys
+
+DEFAULT_DATA_FILE = 'company_information_full.xlsx'
+
+def rss_bytes():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def measure(layout, path):
+    import gc
+    import pandas as pd
+    import dataset
+
+    gc.collect()
+    before = rss_bytes()
+    if layout == 'full':
+        frame, side_stores = pd.read_excel(path), None
+    else:
+        frame, side_stores = dataset.load_company_frame(path)
+    gc.collect()
+    return {
+        'layout': layout,
+        'rows': len(frame),
+        'columns': frame.shape[1],
+        'frame_bytes': dataset.frame_memory(frame, side_stores),
+        'rss_before': before,
+        'rss_after': rss_bytes()
+    }
+
+def main(path):
+    results = []
+    for layout in ('full', 'compact'):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.memory_report', '--measure', layout, path],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    mb = 1024 * 1024
+    print(f"{'layout':<8} {'rows':>7} {'cols':>5} {'frame MB':>9} {'RSS before':>11} {'RSS after':>10} {'RSS delta':>10}")
+    for r in results:
+        print(f"{r['layout']:<8} {r['rows']:>7} {r['columns']:>5} {r['frame_bytes'] / mb:>9.2f} "
+              f"{r['rss_before'] / mb:>11.1f} {r['rss_after'] / mb:>10.1f} {(r['rss_after'] - r['rss_before']) / mb:>10.1f}")
+
+    full, compact = results
+    print(f"\nFrame memory reduced {full['frame_bytes'] / max(compact['frame_bytes'], 1):.1f}x, "
+          f"per-worker RSS after load {(full['rss_after'] - compact['rss_after']) / mb:.1f} MB lower")
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--measure':
+        print(json.dumps(measure(sys.argv[2], sys.argv[3])))
+    else:
+        main(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DATA_FILE)
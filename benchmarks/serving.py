@@ -0,0 +1,189 @@
+"""
+Sync gunicorn workers against the ASGI serving mode (asgi.py), with the same number of workers
+on the same synthetic dataset, in three scenarios:
+
+  mixed     --cheap-clients loop on cached routes while --slow-clients request uncached
+            stratified samples (a new ?n= every time); reports the cheap routes' latency,
+            which is what suffers when slow requests hold the workers
+  burst     --burst-size identical requests for one uncached key at once, --bursts times;
+            reports how long the whole burst takes (single-flight computes the key once)
+  overload  --overload-clients clients with a --timeout, more than the server can keep up with;
+            reports successes, 503s and timeouts (backpressure answers 503 at once instead of
+            letting requests queue until they time out)
+
+    python -m benchmarks.serving --rows 20000 --workers 2
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+
+from benchmarks.api_load import percentile, start_server
+from benchmarks.synthetic_data import generate_companies, write_dataset
+
+CHEAP_ROUTES = [
+    '/api/company_size_distribution',
+    '/api/industry_breakdown',
+    '/api/company_details/{company}',
+    '/api/similar/{company}',
+]
+# Uncached: every request asks for a sample size that has not been computed yet
+SLOW_ROUTE = '/api/employee_follower_correlation?mode=sample&n={n}'
+
+def clients(count, work):
+    with ThreadPoolExecutor(count) as pool:
+        list(pool.map(work, range(count)))
+
+def mixed(base_url, names, cheap_clients, slow_clients, duration):
+    cheap, slow, errors = [], [], []
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+    sample_sizes = iter(range(100, 20000))
+
+    def client(i):
+        rng = random.Random(i)
+        session = requests.Session()
+        while time.time() < stop_at:
+            is_slow = i < slow_clients
+            if is_slow:
+                with lock:
+                    url = base_url + SLOW_ROUTE.format(n=next(sample_sizes))
+            else:
+                route = rng.choice(CHEAP_ROUTES)
+                url = base_url + route.replace('{company}', quote(rng.choice(names), safe=''))
+            start = time.perf_counter()
+            try:
+                ok = session.get(url, timeout=60).ok
+            except requests.RequestException:
+                ok = False
+            with lock:
+                (slow if is_slow else cheap).append(time.perf_counter() - start)
+                if not ok:
+                    errors.append(url)
+
+    clients(cheap_clients + slow_clients, client)
+    return {
+        'cheap_throughput': len(cheap) / duration,
+        'cheap_p50_ms': percentile(cheap, 50),
+        'cheap_p95_ms': percentile(cheap, 95),
+        'cheap_p99_ms': percentile(cheap, 99),
+        'slow_throughput': len(slow) / duration,
+        'slow_p50_ms': percentile(slow, 50),
+        'errors': len(errors),
+    }
+
+def burst(base_url, size, bursts, first_n=30000):
+    seconds = []
+    for b in range(bursts):
+        url = base_url + SLOW_ROUTE.format(n=first_n + b)
+        barrier = threading.Barrier(size)
+
+        def client(i):
+            barrier.wait()
+            requests.get(url, timeout=120)
+
+        start = time.perf_counter()
+        clients(size, client)
+        seconds.append(time.perf_counter() - start)
+    return {'burst_p50_ms': percentile(seconds, 50), 'burst_max_ms': percentile(seconds, 100)}
+
+def overload(base_url, names, count, duration, timeout):
+    outcomes = {'ok': 0, 'rejected': 0, 'timeout': 0, 'error': 0}
+    ok_latencies = []
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+    sample_sizes = iter(range(40000, 10 ** 9))
+
+    def client(i):
+        rng = random.Random(i)
+        session = requests.Session()
+        while time.time() < stop_at:
+            if rng.random() < 0.2:
+                with lock:
+                    url = base_url + SLOW_ROUTE.format(n=next(sample_sizes))
+            else:
+                url = base_url + rng.choice(CHEAP_ROUTES).replace('{company}', quote(rng.choice(names), safe=''))
+            start = time.perf_counter()
+            try:
+                status = session.get(url, timeout=timeout).status_code
+                outcome = 'ok' if status < 400 else 'rejected' if status == 503 else 'error'
+            except requests.Timeout:
+                outcome = 'timeout'
+            except requests.RequestException:
+                outcome = 'error'
+            with lock:
+                outcomes[outcome] += 1
+                if outcome == 'ok':
+                    ok_latencies.append(time.perf_counter() - start)
+            if outcome == 'rejected':
+                time.sleep(0.05)
+
+    clients(count, client)
+    return dict(outcomes, ok_throughput=outcomes['ok'] / duration, ok_p99_ms=percentile(ok_latencies, 99))
+
+def run(server, data_file, args):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        process, base_url = start_server(server, data_file, args.workers, cache_dir=cache_dir)
+        try:
+            names = [n for n in requests.get(f'{base_url}/api/company_names').json() if isinstance(n, str)]
+            for route in CHEAP_ROUTES:
+                requests.get(base_url + route.replace('{company}', quote(names[0], safe='')))
+            result = {'server': server}
+            result.update(mixed(base_url, names, args.cheap_clients, args.slow_clients, args.duration))
+            result.update(burst(base_url, args.burst_size, args.bursts))
+            result.update(overload(base_url, names, args.overload_clients, args.duration, args.timeout))
+        finally:
+            process.terminate()
+            process.wait()
+    return result
+
+def report(results, args):
+    rows = [
+        (f'mixed: cheap req/s ({args.cheap_clients} clients)', 'cheap_throughput', '.0f'),
+        ('mixed: cheap p50 ms', 'cheap_p50_ms', '.1f'),
+        ('mixed: cheap p95 ms', 'cheap_p95_ms', '.1f'),
+        ('mixed: cheap p99 ms', 'cheap_p99_ms', '.1f'),
+        (f'mixed: slow req/s ({args.slow_clients} clients)', 'slow_throughput', '.1f'),
+        ('mixed: slow p50 ms', 'slow_p50_ms', '.1f'),
+        ('mixed: errors', 'errors', 'd'),
+        (f'burst of {args.burst_size}: p50 ms', 'burst_p50_ms', '.1f'),
+        (f'burst of {args.burst_size}: max ms', 'burst_max_ms', '.1f'),
+        (f'overload ({args.overload_clients} clients): ok req/s', 'ok_throughput', '.0f'),
+        ('overload: ok p99 ms', 'ok_p99_ms', '.1f'),
+        ('overload: 503', 'rejected', 'd'),
+        (f'overload: timed out (> {args.timeout:g}s)', 'timeout', 'd'),
+        ('overload: other errors', 'error', 'd'),
+    ]
+    print(f"\n{'':<40}" + ''.join(f"{r['server']:>16}" for r in results))
+    for label, key, spec in rows:
+        print(f'{label:<40}' + ''.join(f'{format(r[key], spec):>16}' for r in results))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--data-file', help='serve this table instead of a generated one')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--servers', nargs='+', default=['gunicorn', 'gunicorn-async'])
+    parser.add_argument('--duration', type=float, default=15, help='seconds per timed scenario')
+    parser.add_argument('--cheap-clients', type=int, default=16)
+    parser.add_argument('--slow-clients', type=int, default=4)
+    parser.add_argument('--burst-size', type=int, default=16)
+    parser.add_argument('--bursts', type=int, default=5)
+    parser.add_argument('--overload-clients', type=int, default=200)
+    parser.add_argument('--timeout', type=float, default=2.0, help='client timeout in the overload scenario')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = args.data_file or write_dataset(generate_companies(args.rows),
+                                                    os.path.join(directory, f'companies_{args.rows}.parquet'))
+        results = [run(server, data_file, args) for server in args.servers]
+    report(results, args)
+
+if __name__ == '__main__':
+    main()
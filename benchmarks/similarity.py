@@ -0,0 +1,110 @@
+"""
+Benchmark of /api/similar: the IVF index in similarity.py against scoring every company.
+
+For the real workbook and synthetic tables of each --rows size (benchmarks/synthetic_data.py),
+reports the index build time and memory, the per-query latency of brute force and of the index
+for each --probes setting, the index's recall@k against brute force (a result counts when it
+scores at least as high as the exact k-th neighbour, so ties do not count as misses), and the
+latency of the endpoint itself through Flask's test client.
+
+    python -m benchmarks.similarity --rows 10000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import dataset
+import similarity
+from benchmarks.synthetic_data import generate_companies, write_dataset
+
+DEFAULT_DATA_FILE = 'company_information_full.xlsx'
+
+def percentile_ms(seconds, q):
+    return float(np.percentile(seconds, q)) * 1000
+
+def timed(function, queries):
+    results, seconds = [], []
+    for position in queries:
+        start = time.perf_counter()
+        results.append(function(position))
+        seconds.append(time.perf_counter() - start)
+    return results, seconds
+
+def recall(results, exact):
+    hits = [sum(score >= truth[-1][1] - 1e-6 for _, score in found) / len(truth)
+            for found, truth in zip(results, exact) if truth]
+    return float(np.mean(hits))
+
+def endpoint_seconds(path, names, k):
+    # The whole route (name lookup, query, JSON) on a dataset loaded the way the API loads it,
+    # without a shared aggregate cache left over from another run
+    os.environ['AGGREGATE_CACHE_FILE'] = ''
+    import app
+    app.reload_dataset(path)
+    client = app.app.test_client()
+    seconds = []
+    for name in names:
+        start = time.perf_counter()
+        response = client.get(f'/api/similar/{name}?k={k}')
+        seconds.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+    return seconds
+
+def run(path, label, k, probes, queries, seed=0):
+    ds = dataset.load_dataset(path)
+    start = time.perf_counter()
+    index = similarity.SimilarityIndex(ds.frame, seed=seed)
+    build_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(index.n, min(queries, index.n), replace=False)
+    exact, brute_seconds = timed(lambda p: index.brute_force(p, k), positions)
+    result = {
+        'label': label,
+        'rows': index.n,
+        'terms': len(index.vocabulary),
+        'lists': len(index.centroids),
+        'build_seconds': build_seconds,
+        'index_bytes': index.nbytes,
+        'brute_force': (percentile_ms(brute_seconds, 50), percentile_ms(brute_seconds, 95)),
+        'index': {},
+    }
+    for n_probes in probes:
+        found, seconds = timed(lambda p: index.query(p, k, n_probes), positions)
+        result['index'][n_probes] = (percentile_ms(seconds, 50), percentile_ms(seconds, 95), recall(found, exact))
+
+    names = ds.frame['name'].iloc[positions].dropna().tolist()
+    del ds, index
+    seconds = endpoint_seconds(path, names, k)
+    result['endpoint'] = (percentile_ms(seconds, 50), percentile_ms(seconds, 95))
+    return result
+
+def report(r, k):
+    print(f"\n{r['label']}: {r['rows']} companies, {r['terms']} terms, {r['lists']} lists")
+    print(f"  build {r['build_seconds']:.2f}s, index {r['index_bytes'] / 2**20:.1f} MB")
+    print(f"  {'method':<16} {'p50 ms':>8} {'p95 ms':>8} {f'recall@{k}':>10}")
+    print(f"  {'brute force':<16} {r['brute_force'][0]:>8.2f} {r['brute_force'][1]:>8.2f} {1:>10.3f}")
+    for n_probes, (p50, p95, hits) in r['index'].items():
+        print(f"  {f'index, {n_probes} probes':<16} {p50:>8.2f} {p95:>8.2f} {hits:>10.3f}")
+    print(f"  {'endpoint':<16} {r['endpoint'][0]:>8.2f} {r['endpoint'][1]:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-file', default=DEFAULT_DATA_FILE)
+    parser.add_argument('--rows', type=int, nargs='*', default=[100_000], help='synthetic table sizes')
+    parser.add_argument('--k', type=int, default=similarity.DEFAULT_K)
+    parser.add_argument('--probes', type=int, nargs='+', default=[8, 16, similarity.DEFAULT_PROBES])
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    report(run(args.data_file, args.data_file, args.k, args.probes, args.queries), args.k)
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            path = write_dataset(generate_companies(rows), os.path.join(directory, f'companies_{rows}.parquet'))
+            report(run(path, f'synthetic {rows}', args.k, args.probes, args.queries), args.k)
+
+if __name__ == '__main__':
+    main()
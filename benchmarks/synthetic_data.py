@@ -0,0 +1,164 @@
+"""
+Synthetic company datasets with the same schema as company_information_full.xlsx.
+
+Rows are bootstrapped from the real workbook so every column company.py writes is present with
+realistic values, then the columns the API reads are regenerated so the copies are distinct:
+unique names and LinkedIn URLs, log-normal follower counts and sizes fitted to the real data,
+JSON `locations` built from data/map/au.csv plus the real mix of foreign offices, `specialities`
+drawn from the real vocabulary and jittered funding totals.
+
+    python -m benchmarks.synthetic_data 18000 /tmp/companies_100x.parquet
+"""
+import argparse
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TEMPLATE = 'company_information_full.xlsx'
+CITIES_FILE = 'data/map/au.csv'
+
+# LinkedIn's headcount ranges, as company.py stores them in company_size
+SIZE_RANGES = [(1, 10), (11, 50), (51, 200), (201, 500), (501, 1000), (1001, 5000), (5001, 10000), (10001, None)]
+NAME_SUFFIXES = ['Pty Ltd', 'Group', 'Australia', 'Holdings', 'Partners', 'Solutions', '']
+
+def _json_lists(series):
+    values = []
+    for text in series.dropna():
+        try:
+            parsed = json.loads(text)
+        except (TypeError, json.JSONDecodeError):
+            continue
+        if isinstance(parsed, list):
+            values.extend(parsed)
+    return values
+
+def _log_normal(rng, real, size):
+    # Fit log1p(values) of the real column and draw new values from it
+    logs = np.log1p(pd.to_numeric(real, errors='coerce').dropna().clip(lower=0))
+    return np.expm1(rng.normal(logs.mean(), logs.std() or 1.0, size)).round()
+
+def _size_range(employees):
+    for low, high in SIZE_RANGES:
+        if high is None or employees <= high:
+            return json.dumps([low, high])
+    return json.dumps([None, None])
+
+def _slug(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+def generate_companies(n, seed=0, template_path=DEFAULT_TEMPLATE, duplicate_rate=0.0):
+    """
+    Return a frame of n synthetic companies. duplicate_rate is the fraction of rows that are
+    re-crawls of another row: same LinkedIn URL and a slightly different name.
+    """
+    rng = np.random.default_rng(seed)
+    template = pd.read_excel(template_path)
+    template = template[template['name'].notna()].reset_index(drop=True)
+    df = template.iloc[rng.integers(0, len(template), n)].reset_index(drop=True)
+
+    # Names from the real name vocabulary, made unique with a numeric suffix where needed
+    words = sorted({w for name in template['name'] for w in re.findall(r'[A-Za-z]{3,}', name)})
+    word_picks = rng.choice(words, size=(n, 3))
+    word_counts = rng.integers(1, 4, n)
+    suffixes = rng.choice(NAME_SUFFIXES, n)
+    names, seen = [], set()
+    for i in range(n):
+        name = ' '.join(word_picks[i, :word_counts[i]]) + (f' {suffixes[i]}' if suffixes[i] else '')
+        if name in seen:
+            name = f'{name} {i}'
+        seen.add(name)
+        names.append(name)
+    df['name'] = names
+    df['Company Name'] = names
+    slugs = [_slug(name) for name in names]
+    df['LinkedIn URL'] = [f'https://www.linkedin.com/company/{slug}' for slug in slugs]
+    df['universal_name_id'] = slugs
+    df['website'] = [f'http://www.{slug.replace("-", "")}.com.au' for slug in slugs]
+    df['linkedin_internal_id'] = rng.permutation(n) + 1_000_000
+
+    employees = _log_normal(rng, template['company_size_on_linkedin'], n).clip(1)
+    df['company_size_on_linkedin'] = employees
+    df['company_size'] = [_size_range(e) for e in employees]
+    df['follower_count'] = _log_normal(rng, template['follower_count'], n)
+    founded = template['founded_year'].dropna().to_numpy()
+    df['founded_year'] = np.where(rng.random(n) < template['founded_year'].notna().mean(),
+                                  np.clip(rng.choice(founded, n) + rng.integers(-3, 4, n), 1800, 2024), np.nan)
+
+    # Funding totals keep the real presence pattern with +-50% jitter
+    df['extra_total_funding_amount'] = (pd.to_numeric(df['extra_total_funding_amount'], errors='coerce')
+                                        * rng.uniform(0.5, 1.5, n)).round()
+
+    # Specialities: 0-15 entries from the real vocabulary
+    vocabulary = sorted({str(s) for s in _json_lists(template['specialities'])})
+    counts = rng.integers(0, 16, n)
+    df['specialities'] = [json.dumps(list(rng.choice(vocabulary, k, replace=False))) for k in counts]
+
+    # Locations: mostly Australian cities from au.csv (with their state), plus real foreign offices
+    cities = pd.read_csv(CITIES_FILE)
+    city_weights = cities['population'].fillna(1).to_numpy(float)
+    city_weights /= city_weights.sum()
+    foreign = [loc for loc in _json_lists(template['locations']) if isinstance(loc, dict) and loc.get('country') != 'AU']
+    au_offices = [{'country': 'AU', 'city': city, 'postal_code': None, 'line_1': None, 'is_hq': False, 'state': state}
+                  for city, state in zip(cities['city'], cities['admin_name'])]
+    office_counts = np.minimum(rng.geometric(0.45, n), 25)
+    total = int(office_counts.sum())
+    is_foreign = (rng.random(total) < 0.35) & bool(foreign)
+    city_picks = rng.choice(len(au_offices), total, p=city_weights)
+    foreign_picks = rng.integers(max(len(foreign), 1), size=total)
+    locations, position = [], 0
+    for k in office_counts.tolist():
+        offices = []
+        for j in range(position, position + k):
+            office = dict(foreign[foreign_picks[j]] if is_foreign[j] else au_offices[city_picks[j]])
+            office['is_hq'] = j == position
+            offices.append(office)
+        locations.append(json.dumps(offices))
+        position += k
+    df['locations'] = locations
+    df['hq_country'] = [json.loads(l)[0]['country'] for l in locations]
+
+    df['Image_Path'] = [f'company_images/{i % 180}.jpg' for i in range(n)]
+
+    if duplicate_rate > 0:
+        df = _add_duplicates(df, rng, duplicate_rate)
+    return df
+
+def _add_duplicates(df, rng, rate):
+    # Overwrite some rows with another row's identity and a lightly edited name
+    count = int(len(df) * rate)
+    targets = rng.choice(len(df), count, replace=False)
+    sources = rng.choice(np.setdiff1d(np.arange(len(df)), targets), count)
+    edits = [' Pty Ltd', ' Ltd', ' Australia', '.', ' (AU)', '']
+    for target, source in zip(targets, sources):
+        name = df.at[source, 'name']
+        edited = name.upper() if rng.random() < 0.3 else name + edits[rng.integers(len(edits))]
+        df.at[target, 'name'] = edited
+        df.at[target, 'Company Name'] = edited
+        df.at[target, 'LinkedIn URL'] = df.at[source, 'LinkedIn URL']
+        df.at[target, 'website'] = df.at[source, 'website']
+    return df
+
+def write_dataset(df, path):
+    """Write as .xlsx (what app.py reads in production) or .parquet (much faster for large sizes)."""
+    if path.endswith('.parquet'):
+        # Mixed-type object columns (e.g. hq_is_hq) have to be one type for Arrow
+        mixed = {c: 'str' for c in df.columns if df[c].dtype == object}
+        df.astype(mixed).to_parquet(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('rows', type=int)
+    parser.add_argument('output', help='.xlsx or .parquet')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    write_dataset(generate_companies(args.rows, args.seed, duplicate_rate=args.duplicate_rate), args.output)
+    print(f'Wrote {args.rows} companies to {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Memory cost of adding gunicorn workers, with and without preloading the dataset in the master.
+
+For each worker count the server is started from gunicorn.conf.py, every /api route is hit
+a few times so the workers are warm, and the proportional set size (PSS) of the master plus
+workers is summed from /proc. PSS splits shared pages between the processes that map them,
+so the total is the real memory footprint of the deployment. Linux only.
+
+    python -m benchmarks.worker_memory [--workers 1 4 8]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROUTES = [
+    'company_size_distribution', 'industry_breakdown', 'geographical_distribution',
+    'follower_count_analysis', 'top_companies_by_followers', 'founded_year_timeline',
+    'top_companies_followers', 'specialties_wordcloud', 'company_type_distribution',
+    'funding_analysis', 'employee_follower_correlation', 'company_names'
+]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def smaps_rollup(pid):
+    # Values in /proc/<pid>/smaps_rollup are in kB
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[0].endswith(':'):
+                fields[parts[0][:-1]] = int(parts[1]) * 1024
+    return fields
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+def wait_until_ready(base_url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{base_url}/company_names', timeout=30).ok:
+                return
+        except (requests.ConnectionError, requests.Timeout):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError('gunicorn did not become ready')
+
+def measure(workers, preload, requests_per_route=None):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        return measure_server(workers, preload, requests_per_route, os.path.join(cache_dir, 'aggregates.sqlite'))
+
+def measure_server(workers, preload, requests_per_route, cache_file):
+    # Each server gets an empty shared aggregate cache, so no run starts from another's results
+    port = free_port()
+    env = dict(os.environ, GUNICORN_PRELOAD='1' if preload else '0', WEB_CONCURRENCY=str(workers),
+               AGGREGATE_CACHE_FILE=cache_file)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base_url = f'http://127.0.0.1:{port}/api'
+        wait_until_ready(base_url)
+        while len(children(server.pid)) < workers:
+            time.sleep(0.2)
+
+        # Enough requests (one connection each) that every worker has served every route
+        for _ in range(requests_per_route or workers * 4):
+            for route in ROUTES:
+                requests.get(f'{base_url}/{route}', headers={'Connection': 'close'}).raise_for_status()
+        time.sleep(1)
+
+        master = smaps_rollup(server.pid)
+        worker_stats = [smaps_rollup(pid) for pid in children(server.pid)]
+        return {
+            'workers': workers,
+            'preload': preload,
+            'total_pss': master['Pss'] + sum(w['Pss'] for w in worker_stats),
+            'worker_private': sum(w['Private_Clean'] + w['Private_Dirty'] for w in worker_stats) / len(worker_stats)
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    print(f"{'workers':>7} {'preload':>8} {'total PSS MB':>13} {'private MB/worker':>18}")
+    for preload in (False, True):
+        for workers in args.workers:
+            r = measure(workers, preload)
+            print(f"{r['workers']:>7} {str(r['preload']):>8} {r['total_pss'] / mb:>13.1f} {r['worker_private'] / mb:>18.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Two-tier cache for aggregates. Each dataset version keeps the aggregates it uses in a bounded
+in-process LRU; behind it, a SQLite file shared by every worker and instance on the machine
+keeps them pickled, so a worker that starts (or reloads) after another one has computed an
+aggregate reads it instead of computing it again.
+
+Entries in the shared store are namespaced by the dataset version and a hash of the code that
+computes them, so a new deploy never serves payloads of the old code. A process about to
+compute an aggregate first takes a lease on it in the store; the others wait for its result
+instead of computing the same thing at the same time.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_ENTRIES = 512
+# Aggregates keyed by values a client picks (?bins=, ?n=); kept apart so they cannot evict the others
+REQUEST_CACHE_ENTRIES = 64
+# How long a lease protects an aggregate being computed; a crashed process frees it after this
+LEASE_SECONDS = 120
+POLL_SECONDS = 0.05
+# Larger pickles are only kept in process
+MAX_SHARED_BYTES = 256 * 2**20
+
+MISSING = object()
+
+def code_version(paths):
+    """Short hash of the given source files."""
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+class LRUCache:
+    """Mapping of at most maxsize entries that forgets the least recently used one; thread-safe."""
+
+    def __init__(self, maxsize=CACHE_ENTRIES):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        with self.lock:
+            if key not in self.entries:
+                return default
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+class SharedStore:
+    """Pickled aggregates in a SQLite file, with leases so only one process computes each."""
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS, max_bytes=MAX_SHARED_BYTES):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self.connection()
+        connection.execute('CREATE TABLE IF NOT EXISTS aggregates '
+                           '(namespace TEXT, key TEXT, value BLOB, created REAL, PRIMARY KEY (namespace, key))')
+        connection.execute('CREATE TABLE IF NOT EXISTS leases '
+                           '(namespace TEXT, key TEXT, owner TEXT, expires REAL, PRIMARY KEY (namespace, key))')
+
+    def connection(self):
+        # One connection per thread and process: SQLite connections must not cross either
+        if getattr(self.local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.local.connection, self.local.pid = connection, os.getpid()
+        return self.local.connection
+
+    def get(self, namespace, key):
+        row = self.connection().execute('SELECT value FROM aggregates WHERE namespace = ? AND key = ?',
+                                        (namespace, repr(key))).fetchone()
+        return MISSING if row is None else pickle.loads(row[0])
+
+    def set(self, namespace, key, value):
+        """Store a value; returns False if it cannot be pickled or is larger than max_bytes."""
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        if len(data) > self.max_bytes:
+            return False
+        self.connection().execute('INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?, ?)',
+                                  (namespace, repr(key), sqlite3.Binary(data), time.time()))
+        return True
+
+    @staticmethod
+    def owner():
+        return f'{os.getpid()}-{threading.get_ident()}'
+
+    def claim(self, namespace, key):
+        """Take the lease on computing an aggregate; False if another live process holds it."""
+        connection, now = self.connection(), time.time()
+        connection.execute('DELETE FROM leases WHERE namespace = ? AND key = ? AND expires < ?',
+                           (namespace, repr(key), now))
+        cursor = connection.execute('INSERT OR IGNORE INTO leases VALUES (?, ?, ?, ?)',
+                                    (namespace, repr(key), self.owner(), now + self.lease_seconds))
+        return cursor.rowcount == 1
+
+    def release(self, namespace, key):
+        """Give up this thread's lease; a lease that expired and was claimed by another process is left alone."""
+        self.connection().execute('DELETE FROM leases WHERE namespace = ? AND key = ? AND owner = ?',
+                                  (namespace, repr(key), self.owner()))
+
+    def wait(self, namespace, key):
+        """The value another process is computing, once stored; MISSING if its lease ends without one."""
+        while True:
+            value = self.get(namespace, key)
+            if value is not MISSING:
+                return value
+            leased = self.connection().execute(
+                'SELECT 1 FROM leases WHERE namespace = ? AND key = ? AND expires >= ?',
+                (namespace, repr(key), time.time())).fetchone()
+            if not leased:
+                return self.get(namespace, key)
+            time.sleep(POLL_SECONDS)
+
+    def prune(self, keep):
+        """Drop every namespace but the given ones; returns the number of entries removed."""
+        placeholders = ', '.join('?' * len(keep))
+        connection = self.connection()
+        cursor = connection.execute(f'DELETE FROM aggregates WHERE namespace NOT IN ({placeholders})', tuple(keep))
+        connection.execute(f'DELETE FROM leases WHERE namespace NOT IN ({placeholders})', tuple(keep))
+        return cursor.rowcount
+
+    def stats(self):
+        entries, size = self.connection().execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM aggregates').fetchone()
+        namespaces = [row[0] for row in self.connection().execute('SELECT DISTINCT namespace FROM aggregates')]
+        return {'path': self.path, 'entries': entries, 'bytes': size, 'namespaces': namespaces}
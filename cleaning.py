@@ -0,0 +1,224 @@
+"""
+Cleaning and deduplication of the company table, done once when a snapshot is built
+instead of at request time (replaces the steps in data_processing.ipynb).
+
+clean_companies() normalizes names, websites and LinkedIn URLs, parses the numeric and JSON
+columns, and merges duplicate companies: rows with the same LinkedIn URL, and rows whose
+normalized names are near-identical. Near-identical names are found by sorted-neighbourhood
+blocking: the rows are sorted by name key (and by reversed name key, to catch differences at
+the start) and each row is only compared with the next few rows, instead of all pairs.
+"""
+import difflib
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset import NUMERIC_COLUMNS
+
+# Legal forms that do not tell two companies apart
+LEGAL_SUFFIXES = r'\b(?:pty|ltd|limited|inc|incorporated|corp|corporation|llc|plc|gmbh|co)\b'
+# List columns company.py stores as JSON: left as they are, and the ones below parsed and validated
+JSON_COLUMNS = ['specialities', 'locations', 'funding_data', 'acquisitions_acquired', 'categories',
+                'similar_companies', 'affiliated_companies', 'updates', 'exit_data']
+PARSED_JSON_COLUMNS = ['specialities', 'locations', 'funding_data', 'acquisitions_acquired']
+DEFAULT_WINDOW = 5
+DEFAULT_THRESHOLD = 0.92
+
+def normalize_names(names):
+    """Lower-case name keys without punctuation, legal forms or repeated spaces; missing for empty names."""
+    keys = (names.astype('str').str.lower()
+            .str.replace('&', ' and ', regex=False)
+            .str.replace(r'[^\w\s]', ' ', regex=True)
+            .str.replace(LEGAL_SUFFIXES, ' ', regex=True)
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.strip())
+    return keys.where(names.notna() & (keys != ''))
+
+def normalize_websites(websites):
+    """Bare domain of each website: no scheme, www., port, path or query."""
+    domains = (websites.astype('str').str.strip().str.lower()
+               .str.replace(r'^[a-z][a-z0-9+.-]*://', '', regex=True)
+               .str.replace(r'^www\d*\.', '', regex=True)
+               .str.replace(r'[/?#].*$', '', regex=True)
+               .str.replace(r':\d+$', '', regex=True))
+    return domains.where(websites.notna() & domains.str.contains('.', regex=False))
+
+def normalize_linkedin_urls(urls):
+    """linkedin.com/company/<slug> for each LinkedIn URL, whatever scheme, subdomain or query it came with."""
+    keys = (urls.astype('str').str.strip().str.lower()
+            .str.replace(r'^[a-z]+://', '', regex=True)
+            .str.replace(r'^(?:[a-z]{2,3}\.)?(?:www\.)?', '', regex=True)
+            .str.replace(r'[?#].*$', '', regex=True)
+            .str.rstrip('/'))
+    return keys.where(urls.notna() & keys.str.startswith('linkedin.com/'))
+
+def parse_json_column(series):
+    # Every distinct value is parsed once; values that are not valid JSON become missing
+    parsed = {}
+    for text in series.dropna().unique():
+        try:
+            parsed[text] = json.loads(text)
+        except (TypeError, ValueError):
+            parsed[text] = None
+    return series.map(parsed)
+
+def _list_length(value):
+    return len(value) if isinstance(value, list) else 0
+
+def _country_count(value):
+    if not isinstance(value, list):
+        return 0
+    return len({office.get('country') for office in value if isinstance(office, dict) and office.get('country')})
+
+def connected_components(n, left, right):
+    """Component label (smallest member position) for n items joined by the (left[i], right[i]) pairs."""
+    labels = np.arange(n)
+    while True:
+        before = labels
+        low = np.minimum(labels[left], labels[right])
+        labels = labels.copy()
+        np.minimum.at(labels, left, low)
+        np.minimum.at(labels, right, low)
+        labels = labels[labels]
+        if np.array_equal(labels, before):
+            return labels
+
+def _similar(a, b, threshold):
+    matcher = difflib.SequenceMatcher(None, a, b)
+    return matcher.quick_ratio() >= threshold and matcher.ratio() >= threshold
+
+def sorted_neighbourhood_pairs(keys, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD):
+    """
+    (left, right) positions of rows whose keys are at least `threshold` similar, comparing
+    each row only with the next window - 1 rows in key order. keys is an array of strings
+    (None for rows to skip).
+    """
+    present = np.flatnonzero(pd.notna(keys))
+    if len(present) < 2:
+        return np.empty(0, int), np.empty(0, int)
+    left, right = [], []
+    values = keys[present].astype(str)
+    # A second pass on reversed keys catches names that only differ in their first characters
+    for sort_keys in (values, np.array([v[::-1] for v in values])):
+        order = np.argsort(sort_keys, kind='stable')
+        ordered = values[order]
+        lengths = np.char.str_len(ordered)
+        for offset in range(1, window):
+            a, b = ordered[:-offset], ordered[offset:]
+            la, lb = lengths[:-offset], lengths[offset:]
+            exact = a == b
+            # 2 * shorter / total is an upper bound of the similarity ratio, so it filters pairs for free
+            candidates = np.flatnonzero(~exact & (2 * np.minimum(la, lb) >= threshold * (la + lb)))
+            similar = [i for i in candidates if _similar(a[i], b[i], threshold)]
+            matched = np.concatenate([np.flatnonzero(exact), np.array(similar, dtype=int)])
+            left.append(present[order[matched]])
+            right.append(present[order[matched + offset]])
+    return np.concatenate(left), np.concatenate(right)
+
+def _conflicts(values, left, right):
+    # Both rows have a value and the values differ
+    a, b = values[left], values[right]
+    return pd.notna(a) & pd.notna(b) & (a != b)
+
+def add_match_keys(df):
+    """Add the name_key, website_domain and linkedin_key columns duplicates are matched on."""
+    display_name = df['name'] if 'name' in df else pd.Series(np.nan, index=df.index)
+    if 'Company Name' in df:
+        # Companies whose profile was not found only have the input name
+        display_name = display_name.fillna(df['Company Name'])
+    df['name_key'] = normalize_names(display_name)
+    df['website_domain'] = normalize_websites(df['website']) if 'website' in df else np.nan
+    df['linkedin_key'] = normalize_linkedin_urls(df['LinkedIn URL']) if 'LinkedIn URL' in df else np.nan
+    return df
+
+def duplicate_labels(df, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD):
+    """
+    Company label of every row of a frame with name_key, website_domain and linkedin_key columns.
+    Returns (labels, url_labels): the first joins rows with the same LinkedIn URL or a similar name
+    (unless their LinkedIn URLs or websites disagree), the second only rows with the same LinkedIn URL.
+    """
+    positions = pd.Series(np.arange(len(df)), index=df.index)
+    has_url = df['linkedin_key'].notna()
+    url_left = positions[has_url].to_numpy()
+    url_right = positions[has_url].groupby(df.loc[has_url, 'linkedin_key']).transform('min').to_numpy()
+
+    name_left, name_right = sorted_neighbourhood_pairs(df['name_key'].to_numpy(dtype=object), window, threshold)
+    linkedin_keys = df['linkedin_key'].to_numpy(dtype=object)
+    domains = df['website_domain'].to_numpy(dtype=object)
+    keep = ~(_conflicts(linkedin_keys, name_left, name_right) | _conflicts(domains, name_left, name_right))
+    name_left, name_right = name_left[keep], name_right[keep]
+
+    labels = connected_components(len(df), np.concatenate([url_left, name_left]), np.concatenate([url_right, name_right]))
+    return labels, connected_components(len(df), url_left, url_right)
+
+def clean_companies(df, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD):
+    """
+    Return (clean frame, report). The clean frame has one row per company, parsed numeric
+    columns, stripped text, name_key / website_domain / linkedin_key columns and specialities_count /
+    country_count parsed from the JSON columns. Duplicates are merged into the most complete row,
+    filling its gaps from the others.
+    """
+    timings = {}
+    start = time.perf_counter()
+    df = df.reset_index(drop=True)
+
+    text = [c for c in df.columns if df[c].dtype == object or pd.api.types.is_string_dtype(df[c])]
+    for column in text:
+        if column in JSON_COLUMNS:
+            continue
+        stripped = df[column].astype('str').str.strip()
+        # company.py writes str(None) for missing scalars
+        df[column] = stripped.where(df[column].notna() & ~stripped.isin(['', 'None', 'nan']))
+    if 'name' in df:
+        df['name'] = df['name'].str.replace(r'\s+', ' ', regex=True)
+    for column in NUMERIC_COLUMNS + ['linkedin_internal_id']:
+        if column in df:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    timings['normalize'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for column in PARSED_JSON_COLUMNS:
+        if column not in df:
+            continue
+        parsed = parse_json_column(df[column])
+        df[column] = df[column].where(parsed.notna())
+        if column == 'specialities':
+            df['specialities_count'] = parsed.map(_list_length).astype('int32')
+        elif column == 'locations':
+            df['country_count'] = parsed.map(_country_count).astype('int32')
+    timings['parse_json'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    add_match_keys(df)
+    timings['keys'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels, url_labels = duplicate_labels(df, window, threshold)
+    timings['match'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # Labels are the smallest position in each company, so the row at that position stands for it.
+    # Most rows are unique; only the duplicated companies are coalesced column by column,
+    # with their most complete row first.
+    clean = df.iloc[np.flatnonzero(labels == np.arange(len(df)))]
+    duplicated = np.flatnonzero(pd.Series(labels).duplicated(keep=False).to_numpy())
+    if len(duplicated):
+        rows = df.iloc[duplicated]
+        followers = rows['follower_count'].fillna(-1).to_numpy() if 'follower_count' in rows else np.zeros(len(rows))
+        order = np.lexsort((-followers, -rows.notna().sum(axis=1).to_numpy(), labels[duplicated]))
+        merged = rows.iloc[order].groupby(labels[duplicated][order], sort=False).first()
+        clean.update(merged)
+    clean = clean.reset_index(drop=True)
+    timings['merge'] = time.perf_counter() - start
+
+    report = {
+        'rows_in': len(df),
+        'rows_out': len(clean),
+        'linkedin_duplicates': int(len(df) - len(np.unique(url_labels))),
+        'name_duplicates': int(len(np.unique(url_labels)) - len(clean)),
+        'name_comparisons': 2 * sum(max(int(df['name_key'].notna().sum()) - offset, 0) for offset in range(1, window)),
+        'seconds': {step: round(seconds, 4) for step, seconds in timings.items()},
+    }
+    return clean, report
@@ -15,15 +15,22 @@ logging.basicConfig(filename='company_info_extraction.log', level=logging.INFO,
 # Load environment variables
 load_dotenv()
 
-# ProxyCurl API endpoints and your API key
-LOOKUP_ENDPOINT = "https://nubela.co/proxycurl/api/linkedin/company/resolve"
-PROFILE_ENDPOINT = "https://nubela.co/proxycurl/api/linkedin/company"
+# Input and output workbooks
+INPUT_FILE = 'busa3021.xlsx'
+INPUT_SHEET = 'Sheet2'
+OUTPUT_FILE = 'company_information_full.xlsx'
+
+# ProxyCurl API endpoints and your API key (PROXYCURL_BASE_URL can point at a local fake server)
+PROXYCURL_BASE_URL = os.getenv("PROXYCURL_BASE_URL", "https://nubela.co/proxycurl/api")
+LOOKUP_ENDPOINT = f"{PROXYCURL_BASE_URL}/linkedin/company/resolve"
+PROFILE_ENDPOINT = f"{PROXYCURL_BASE_URL}/linkedin/company"
 PROXYCURL_API = os.getenv("PROXYCURL_API")
-logging.info(f"API Key: {PROXYCURL_API[:5]}...")  # Log first 5 characters of API key for verification
+logging.info(f"API Key: {(PROXYCURL_API or '')[:5]}...")  # Log first 5 characters of API key for verification
 
 # Rate limiting variables
-RATE_LIMIT = 2  # requests per minute
+RATE_LIMIT = float(os.getenv("PROXYCURL_RATE_LIMIT", "2"))  # requests per minute
 RATE_LIMIT_PERIOD = 60  # seconds
+BACKOFF_BASE = float(os.getenv("PROXYCURL_BACKOFF_SECONDS", "60"))  # first backoff after a 429, doubles per attempt
 last_request_time = 0
 
 def wait_for_rate_limit():
@@ -37,7 +44,7 @@ def wait_for_rate_limit():
     last_request_time = time.time()
 
 def exponential_backoff(attempt, max_delay=300):
-    delay = min(60 * (2 ** attempt) + random.uniform(0, 1), max_delay)
+    delay = min(BACKOFF_BASE * (2 ** attempt) + random.uniform(0, 1), max_delay)
     logging.info(f"Rate limit reached. Backing off for {delay:.2f} seconds")
     time.sleep(delay)
 
@@ -97,63 +104,69 @@ def flatten_dict(d, parent_key='', sep='_'):
             items.append((new_key, str(v)))
     return dict(items)
 
-# Read company names from the input Excel file
-input_workbook = openpyxl.load_workbook('busa3021.xlsx')
-input_sheet = input_workbook['Sheet2']
-
-company_names = [cell.value for cell in input_sheet['A'][1:] if cell.value]  # Assuming company names are in column A
-
-# Create a new workbook for output
-output_workbook = openpyxl.Workbook()
-output_sheet = output_workbook.active
-output_sheet.title = "Company Information"
+def read_company_names(input_file=INPUT_FILE, sheet_name=INPUT_SHEET, column='A'):
+    # Company names from one column of the input Excel file, skipping the header
+    input_workbook = openpyxl.load_workbook(input_file)
+    input_sheet = input_workbook[sheet_name]
+    return [cell.value for cell in input_sheet[column][1:] if cell.value]
+
+def main(input_file=INPUT_FILE, sheet_name=INPUT_SHEET, output_file=OUTPUT_FILE):
+    company_names = read_company_names(input_file, sheet_name)  # Assuming company names are in column A
+
+    # Create a new workbook for output
+    output_workbook = openpyxl.Workbook()
+    output_sheet = output_workbook.active
+    output_sheet.title = "Company Information"
+
+    # Initialize headers
+    headers = ["Company Name", "LinkedIn URL", "Status", "Error Details"]
+    header_row = 1
+    for col, header in enumerate(headers, start=1):
+        output_sheet.cell(row=header_row, column=col, value=header)
+
+    # Process companies and update Excel file in real-time
+    for row, company_name in enumerate(company_names, start=2):
+        logging.info(f"Processing: {company_name}")
+
+        output_sheet.cell(row=row, column=1, value=company_name)
+
+        company_url = lookup_company_url(company_name)
+        if not company_url:
+            logging.error(f"Could not find LinkedIn URL for {company_name}")
+            output_sheet.cell(row=row, column=3, value="URL not found")
+            output_sheet.cell(row=row, column=4, value="Company LinkedIn profile not found")
+            output_workbook.save(output_file)
+            continue
+
+        output_sheet.cell(row=row, column=2, value=company_url)
+
+        company_info = get_company_info(company_url)
+
+        if company_info:
+            flattened_info = flatten_dict(company_info)
+            output_sheet.cell(row=row, column=3, value="Data fetched successfully")
+
+            # Dynamically add new columns for each piece of data
+            for key, value in flattened_info.items():
+                if key not in headers:
+                    headers.append(key)
+                    col = len(headers)
+                    output_sheet.cell(row=header_row, column=col, value=key)
+                else:
+                    col = headers.index(key) + 1
+
+                output_sheet.cell(row=row, column=col, value=value)
+        else:
+            logging.error(f"Could not fetch information for {company_name}")
+            output_sheet.cell(row=row, column=3, value="Data fetch failed")
+            output_sheet.cell(row=row, column=4, value="API request failed or returned no data")
 
-# Initialize headers
-headers = ["Company Name", "LinkedIn URL", "Status", "Error Details"]
-header_row = 1
-for col, header in enumerate(headers, start=1):
-    output_sheet.cell(row=header_row, column=col, value=header)
+        # Save after each company
+        output_workbook.save(output_file)
+        logging.info(f"Updated information for {company_name}")
 
-# Process companies and update Excel file in real-time
-for row, company_name in enumerate(company_names, start=2):
-    logging.info(f"Processing: {company_name}")
-    
-    output_sheet.cell(row=row, column=1, value=company_name)
-    
-    company_url = lookup_company_url(company_name)
-    if not company_url:
-        logging.error(f"Could not find LinkedIn URL for {company_name}")
-        output_sheet.cell(row=row, column=3, value="URL not found")
-        output_sheet.cell(row=row, column=4, value="Company LinkedIn profile not found")
-        output_workbook.save('company_information_full.xlsx')
-        continue
-    
-    output_sheet.cell(row=row, column=2, value=company_url)
-    
-    company_info = get_company_info(company_url)
-    
-    if company_info:
-        flattened_info = flatten_dict(company_info)
-        output_sheet.cell(row=row, column=3, value="Data fetched successfully")
-        
-        # Dynamically add new columns for each piece of data
-        for key, value in flattened_info.items():
-            if key not in headers:
-                headers.append(key)
-                col = len(headers)
-                output_sheet.cell(row=header_row, column=col, value=key)
-            else:
-                col = headers.index(key) + 1
-            
-            output_sheet.cell(row=row, column=col, value=value)
-    else:
-        logging.error(f"Could not fetch information for {company_name}")
-        output_sheet.cell(row=row, column=3, value="Data fetch failed")
-        output_sheet.cell(row=row, column=4, value="API request failed or returned no data")
-    
-    # Save after each company
-    output_workbook.save('company_information_full.xlsx')
-    logging.info(f"Updated information for {company_name}")
+    logging.info(f"Process completed. Final results saved in '{output_file}'")
+    print(f"Process completed. Check '{output_file}' for results and 'company_info_extraction.log' for details.")
 
-logging.info("Process completed. Final results saved in 'company_information_full.xlsx'")
-print("Process completed. Check 'company_information_full.xlsx' for results and 'company_info_extraction.log' for details.")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
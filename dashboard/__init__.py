@@ -0,0 +1,46 @@
+"""
+Pages of the Streamlit dashboard. Each page lives in its own module, imported the first time
+the page is visited, so a session only pays for the libraries of the pages it opens (the
+word cloud page alone pulls in wordcloud and matplotlib). Import times are recorded per
+module for the startup report in visualization.py.
+"""
+import importlib
+import sys
+import time
+
+# Sidebar title -> (module in this package, page function)
+PAGES = {
+    "Company Comparison": ("comparison", "company_comparison_page"),
+    "Company Size": ("distributions", "plot_company_size_distribution"),
+    "Industry": ("distributions", "plot_industry_breakdown"),
+    "Geography": ("geography", "plot_geographical_distribution"),
+    "Top Companies by Followers": ("followers", "plot_top_companies_by_followers"),
+    "Founded Year": ("distributions", "plot_founded_year_timeline"),
+    "Specialties": ("specialties", "plot_specialties_wordcloud"),
+    "Company Type": ("distributions", "plot_company_type_distribution"),
+    "Funding": ("scatter", "plot_funding_analysis"),
+    "Employee vs Followers": ("scatter", "plot_employee_follower_correlation"),
+}
+
+# Module -> {'seconds': first import time, 'packages': top-level packages it imported first}
+import_times = {}
+
+def _packages():
+    # Third-party and project packages only: the standard library is cheap and always there
+    names = {name.split('.', 1)[0] for name in sys.modules}
+    return {name for name in names if not name.startswith('_') and name not in sys.stdlib_module_names}
+
+def timed_import(name):
+    """Import a module, recording how long the first import took and which packages it brought in."""
+    if name in sys.modules:
+        return sys.modules[name]
+    before = _packages()
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    import_times[name] = {'seconds': time.perf_counter() - start, 'packages': sorted(_packages() - before)}
+    return module
+
+def load_page(title):
+    """The function rendering a page, importing its module on first use."""
+    module, function = PAGES[title]
+    return getattr(timed_import(f"{__name__}.{module}"), function)
@@ -0,0 +1,72 @@
+"""
+Requests to the API for every dashboard page. Responses are cached by Streamlit across pages
+and sessions, so pages showing the same data share a single fetch.
+"""
+import os
+import requests
+import streamlit as st
+from urllib.parse import quote
+
+API_URL = "https://ausjobmarket.onrender.com/api"
+
+# Fetch pre-built figures from /api/figures instead of building them from raw data
+USE_FIGURE_API = os.getenv("USE_FIGURE_API", "").lower() in ("1", "true", "yes")
+
+class ApiError(Exception):
+    def __init__(self, status, text):
+        super().__init__(status, text)
+        self.status = status
+        self.text = text
+
+# Only successful responses are cached: Streamlit does not cache a call that raises, so a
+# 503 under load or a 404 during a reload is fetched again next time
+@st.cache_data
+def fetch_ok_response(endpoint, params=None, text=False):
+    response = requests.get(f"{API_URL}/{endpoint}", params=params)
+    if response.status_code != 200:
+        raise ApiError(response.status_code, response.text)
+    return response.text if text else response.json()
+
+def stop_on_error(error):
+    st.error(f"The API could not answer ({error.status}), please try again shortly.")
+    st.stop()
+
+def fetch_data(endpoint):
+    try:
+        return fetch_ok_response(endpoint)
+    except ApiError as e:
+        stop_on_error(e)
+
+def fetch_figure(chart):
+    try:
+        return fetch_ok_response(f"figures/{chart}", text=True)
+    except ApiError as e:
+        stop_on_error(e)
+
+# Status code and body, for endpoints whose errors the page reports itself
+def fetch_response(endpoint, params=None):
+    try:
+        return 200, fetch_ok_response(endpoint, params)
+    except ApiError as e:
+        return e.status, e.text
+
+def chart_figure(chart, endpoint, build_figure):
+    if USE_FIGURE_API:
+        import plotly.io as pio
+        return pio.from_json(fetch_figure(chart))
+    return build_figure(fetch_data(endpoint))
+
+def fetch_company_names():
+    return fetch_data("company_names")
+
+def fetch_company_details(company_name):
+    status, body = fetch_response(f"company_details/{quote(company_name)}")
+    if status == 200:
+        return body
+    else:
+        st.error(f"Error fetching company details: {body}")
+        return None
+
+def fetch_similar_companies(company_name, k=10):
+    status, body = fetch_response(f"similar/{quote(company_name)}", {"k": k})
+    return body if status == 200 else []
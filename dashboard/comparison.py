@@ -0,0 +1,159 @@
+import streamlit as st
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import pandas as pd
+from dashboard.api import fetch_company_details, fetch_company_names, fetch_similar_companies
+
+def plot_company_comparison(company_data):
+    # Create subplots
+    fig = make_subplots(rows=2, cols=2, subplot_titles=("Follower Count", "Company Size", "Founded Year", "Specialties and Countries"))
+
+    # Follower Count
+    fig.add_trace(go.Bar(x=['Company', 'Average'], 
+                         y=[company_data['follower_count'], company_data['avg_follower_count']],
+                         name='Follower Count'), row=1, col=1)
+
+    # Company Size
+    fig.add_trace(go.Bar(x=['Company', 'Average'], 
+                         y=[company_data['company_size'], company_data['avg_company_size']],
+                         name='Company Size'), row=1, col=2)
+
+    # Founded Year
+    fig.add_trace(go.Bar(x=['Company', 'Average'], 
+                         y=[company_data['founded_year'], company_data['avg_founded_year']],
+                         name='Founded Year'), row=2, col=1)
+
+    # Number of Specialties and Countries
+    fig.add_trace(go.Bar(x=['Specialties', 'Countries'], 
+                         y=[company_data['num_specialties'], company_data['num_countries']],
+                         name='Company'), row=2, col=2)
+    fig.add_trace(go.Bar(x=['Specialties', 'Countries'], 
+                         y=[company_data['avg_num_specialties'], company_data['avg_num_countries']],
+                         name='Average'), row=2, col=2)
+
+    # Update layout
+    fig.update_layout(height=700, width=1000, title_text="Company Comparison", showlegend=False)
+    fig.update_traces(marker_color='#636EFA', selector=dict(name='Company'))
+    fig.update_traces(marker_color='#EF553B', selector=dict(name='Average'))
+
+    return fig
+
+PEER_METRIC_LABELS = {
+    'follower_count': "Follower Count",
+    'company_size': "Company Size",
+    'founded_year': "Founded Year",
+    'num_specialties': "Number of Specialties",
+    'num_countries': "Number of Countries",
+}
+
+def plot_peer_percentiles(peers):
+    # Percentile of the company within its industry and within its size bucket, per metric
+    labels = list(PEER_METRIC_LABELS.values())
+    fig = go.Figure()
+    for dimension, color in (('industry', '#636EFA'), ('size_bucket', '#00CC96')):
+        peer_group = peers[dimension]
+        if peer_group['group'] is None:
+            continue
+        fig.add_trace(go.Bar(
+            y=labels,
+            x=[peer_group['percentiles'][metric] for metric in PEER_METRIC_LABELS],
+            customdata=[peer_group['peers'][metric] for metric in PEER_METRIC_LABELS],
+            orientation='h',
+            name=f"vs {peer_group['group']}",
+            marker_color=color,
+            hovertemplate="%{x:.0f}th percentile of %{customdata} companies<extra></extra>"
+        ))
+    fig.add_vline(x=50, line_dash="dash", line_color="gray")
+    fig.update_layout(
+        title_text="Position Among Peers (percentile)",
+        barmode='group',
+        height=400,
+        xaxis=dict(range=[0, 100]),
+        yaxis=dict(autorange="reversed")
+    )
+    return fig
+
+def company_comparison_page():
+    st.title("Company Comparison")
+    
+    company_names = fetch_company_names()
+    selected_company = st.selectbox("Select a company", company_names)
+    
+    if selected_company:
+        company_data = fetch_company_details(selected_company)
+        
+        if company_data:
+            col1, col2 = st.columns([1, 3])
+            
+            with col1:
+                if company_data.get('Image_Path'):
+                    st.image(company_data['Image_Path'], width=200)
+                
+                st.subheader(company_data['name'])
+                st.write(f"Industry: {company_data.get('industry', 'N/A')}")
+                st.write(f"Website: {company_data.get('website', 'N/A')}")
+            
+            with col2:
+                description = company_data.get('description', '')
+                if description:
+                    if len(description) > 300:
+                        st.write(description[:300] + "...")
+                        if st.button('Read more'):
+                            st.write(description)
+                    else:
+                        st.write(description)
+                else:
+                    st.write("No description available.")
+            
+            fig = plot_company_comparison(company_data)
+            st.plotly_chart(fig, use_container_width=True)
+            
+            metrics = [
+                ("Follower Count", 'follower_count', 'avg_follower_count'),
+                ("Company Size", 'company_size', 'avg_company_size'),
+                ("Founded Year", 'founded_year', 'avg_founded_year'),
+                ("Number of Specialties", 'num_specialties', 'avg_num_specialties'),
+                ("Number of Countries", 'num_countries', 'avg_num_countries')
+            ]
+            
+            cols = st.columns(len(metrics))
+            for col, (label, company_key, avg_key) in zip(cols, metrics):
+                company_value = company_data.get(company_key)
+                avg_value = company_data.get(avg_key)
+                if company_value is not None and avg_value is not None:
+                    diff = company_value - avg_value
+                    col.metric(
+                        label,
+                        f"{company_value:,}",
+                        f"{diff:+,.0f} compared to average"
+                    )
+                else:
+                    col.metric(label, "N/A", "N/A")
+
+            peers = company_data.get('peers')
+            if peers:
+                st.plotly_chart(plot_peer_percentiles(peers), use_container_width=True)
+
+                industry = peers['industry']
+                if industry['group'] is not None:
+                    cols = st.columns(len(PEER_METRIC_LABELS))
+                    for col, (metric, label) in zip(cols, PEER_METRIC_LABELS.items()):
+                        percentile = industry['percentiles'][metric]
+                        median = industry['medians'][metric]
+                        if percentile is not None and median is not None:
+                            col.metric(f"{label} (industry median)", f"{median:,.0f}",
+                                       f"{percentile:.0f}th percentile", delta_color="off")
+                        else:
+                            col.metric(f"{label} (industry median)", "N/A")
+
+            similar = fetch_similar_companies(selected_company)
+            if similar:
+                st.subheader("Similar Companies")
+                columns = ['name', 'industry', 'company_size', 'follower_count', 'similarity']
+                similar_df = pd.DataFrame(similar, columns=columns).rename(columns={
+                    'name': 'Company', 'industry': 'Industry', 'company_size': 'Company Size',
+                    'follower_count': 'Followers', 'similarity': 'Similarity'
+                })
+                st.dataframe(similar_df, hide_index=True, use_container_width=True)
+        else:
+            st.error("Failed to fetch company details. Please try again.")
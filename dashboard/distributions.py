@@ -0,0 +1,23 @@
+import streamlit as st
+import figures
+from dashboard.api import chart_figure
+
+# Company Size Distribution
+def plot_company_size_distribution():
+    fig = chart_figure("company_size", "company_size_distribution", figures.company_size_figure)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Industry Breakdown
+def plot_industry_breakdown():
+    fig = chart_figure("industry", "industry_breakdown", figures.industry_figure)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Founded Year Timeline
+def plot_founded_year_timeline():
+    fig = chart_figure("founded_year", "founded_year_timeline", figures.founded_year_figure)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Company Type Distribution
+def plot_company_type_distribution():
+    fig = chart_figure("company_type", "company_type_distribution", figures.company_type_figure)
+    st.plotly_chart(fig, use_container_width=True)
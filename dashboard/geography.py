@@ -0,0 +1,106 @@
+import streamlit as st
+import plotly.express as px
+import pandas as pd
+from dashboard.api import fetch_data
+
+# Geographical Distribution
+def plot_geographical_distribution():
+    data = fetch_data("geographical_distribution")
+    
+    if not data:
+        st.error("Failed to fetch geographical distribution data.")
+        return
+
+    df_countries = pd.DataFrame(data['countries'])
+    df_australia_states = pd.DataFrame(data['australia_states'])
+    australia_geojson = data['australia_geojson']
+
+    # Create a dropdown for selecting the view
+    view_options = ['World', 'Australia']
+    selected_view = st.selectbox("Select view", view_options)
+
+    # Create a dropdown for attribute selection
+    attributes = {
+        'Company Count': 'company_count',
+        'Average Follower Count': 'avg_follower_count',
+        'Average Company Size': 'avg_company_size',
+        'Median Founding Year': 'median_founding_year'
+    }
+    selected_attribute = st.selectbox("Select attribute to visualize", list(attributes.keys()))
+
+    if selected_view == 'World':
+        fig = px.choropleth(
+            df_countries,
+            locations='country',
+            locationmode="country names",
+            color=attributes[selected_attribute], 
+            hover_name='country',
+            color_continuous_scale="YlOrRd",
+            title=f"{selected_attribute} by Country",
+            range_color=[df_countries[attributes[selected_attribute]].min(), df_countries[attributes[selected_attribute]].max()]
+        )
+    else:
+        fig = px.choropleth(
+            df_australia_states,
+            geojson=australia_geojson,
+            locations='state_code',
+            featureidkey="properties.STATE_CODE",
+            color=attributes[selected_attribute],
+            hover_name='state_name',
+            color_continuous_scale="YlOrRd",
+            title=f"{selected_attribute} by Australian State",
+            range_color=[df_australia_states[attributes[selected_attribute]].min(), df_australia_states[attributes[selected_attribute]].max()]
+        )
+        fig.update_geos(fitbounds="locations", visible=False)
+
+    fig.update_layout(
+        height=600,
+        geo=dict(showframe=False, showcoastlines=True),
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Display statistics
+    if selected_view == 'World':
+        df = df_countries
+        location_column = 'country'
+    else:
+        df = df_australia_states
+        location_column = 'state_name'
+
+    st.subheader(f"Top 10 {location_column.title()}s by {selected_attribute}")
+    top_10 = df.sort_values(attributes[selected_attribute], ascending=False).head(10)
+    for _, row in top_10.iterrows():
+        st.write(f"{row[location_column]}: {row[attributes[selected_attribute]]}")
+
+    st.write(f"Average {selected_attribute.lower()}: {df[attributes[selected_attribute]].mean():.2f}")
+
+    if selected_view == 'Australia':
+        plot_office_density_map()
+
+# Office density from /api/geo_tiles: one marker per map tile instead of one per company
+def plot_office_density_map():
+    st.subheader("Office Density")
+    zoom = st.select_slider("Detail level (map zoom)", options=list(range(3, 13)), value=6)
+    data = fetch_data(f"geo_tiles?zoom={zoom}")
+    cells = pd.DataFrame(data['cells'])
+    if cells.empty:
+        st.write("No office locations available.")
+        return
+
+    fig = px.scatter_geo(
+        cells,
+        lat='lat',
+        lon='lng',
+        size='companies',
+        color='avg_follower_count',
+        hover_data={'companies': True, 'offices': True, 'avg_follower_count': ':,.0f', 'lat': False, 'lng': False},
+        color_continuous_scale="YlOrRd",
+        labels={'companies': 'Companies', 'offices': 'Offices', 'avg_follower_count': 'Avg Followers'},
+        title=f"Companies with Australian offices ({data['tiles']} tiles at zoom {zoom})"
+    )
+    fig.update_geos(fitbounds="locations", showcountries=True, showland=True, landcolor="#f2f2f2")
+    fig.update_layout(height=600)
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{data['located_companies']} of {data['companies']} companies have an office located in Australia "
+               f"({data['precision'].get('state', 0)} offices placed at their state capital).")
@@ -0,0 +1,37 @@
+import streamlit as st
+import pandas as pd
+import figures
+from dashboard.api import chart_figure, fetch_data
+
+# Scatter pages default to server-side binning so large datasets stay responsive
+SCATTER_DISPLAY_MODES = ["Density", "Sample", "All points"]
+
+# Funding Analysis
+def plot_funding_analysis():
+    display = st.radio("Display", SCATTER_DISPLAY_MODES, horizontal=True)
+    if display == "Density":
+        fig = chart_figure("funding_density", "funding_analysis?mode=bins", figures.funding_density_figure)
+    elif display == "Sample":
+        fig = figures.funding_figure(fetch_data("funding_analysis?mode=sample"))
+    else:
+        fig = chart_figure("funding", "funding_analysis", figures.funding_figure)
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.plotly_chart(figures.round_sizes_figure(fetch_data("funding_round_sizes")), use_container_width=True)
+
+    st.subheader("Most Active Investors")
+    investors = pd.DataFrame(fetch_data("investor_frequency?limit=20"),
+                             columns=['name', 'type', 'rounds', 'companies', 'rounds_raised'])
+    st.dataframe(investors, hide_index=True, use_container_width=True)
+
+# Employee Count vs Follower Count
+def plot_employee_follower_correlation():
+    display = st.radio("Display", SCATTER_DISPLAY_MODES, horizontal=True)
+    if display == "Density":
+        fig = chart_figure("employee_follower_density", "employee_follower_correlation?mode=bins",
+                           figures.employee_follower_density_figure)
+    elif display == "Sample":
+        fig = figures.employee_follower_figure(fetch_data("employee_follower_correlation?mode=sample"))
+    else:
+        fig = chart_figure("employee_follower", "employee_follower_correlation", figures.employee_follower_figure)
+    st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,180 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+from cache import CACHE_ENTRIES, REQUEST_CACHE_ENTRIES, LRUCache
+from funding import FundingTables
+
+# Load-time schema: the columns the API reads and how each is held in memory.
+# Everything else company.py flattens into the workbook (funding_*, acquisitions_*, extra_*, ...) is dropped,
+# except the funding and acquisition lists, which are kept as tables (FUNDING_COLUMNS).
+CATEGORY_COLUMNS = ['industry', 'company_type', 'hq_country']
+NUMERIC_COLUMNS = [
+    'company_size_on_linkedin',
+    'founded_year',
+    'follower_count',
+    'extra_number_of_funding_rounds',
+    'extra_total_funding_amount'
+]
+TEXT_COLUMNS = ['name', 'website', 'company_size', 'specialities', 'locations', 'Image_Path']
+# Large free text kept out of the frame, in a TextStore
+SIDE_STORE_COLUMNS = ['description']
+
+API_COLUMNS = CATEGORY_COLUMNS + NUMERIC_COLUMNS + TEXT_COLUMNS + SIDE_STORE_COLUMNS
+# JSON lists parsed at load into funding.FundingTables; their text is not kept
+FUNDING_COLUMNS = ['funding_data', 'acquisitions_acquired']
+
+class TextStore:
+    """
+    A text column packed into a single UTF-8 buffer plus an offsets array.
+    Values are only decoded when they are read, which avoids one Python string object per row.
+    """
+
+    def __init__(self, values):
+        encoded = [None if pd.isna(v) else str(v).encode('utf-8') for v in values]
+        self.missing = np.array([v is None for v in encoded], dtype=bool)
+        lengths = np.array([0 if v is None else len(v) for v in encoded], dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(lengths)))
+        self.buffer = b''.join(v for v in encoded if v is not None)
+
+    def __len__(self):
+        return len(self.missing)
+
+    def get(self, position):
+        if self.missing[position]:
+            return None
+        return self.buffer[self.offsets[position]:self.offsets[position + 1]].decode('utf-8')
+
+    @property
+    def nbytes(self):
+        return len(self.buffer) + self.offsets.nbytes + self.missing.nbytes
+
+def downcast_numeric(series):
+    """Parse to numbers and use float32 when that loses nothing, otherwise keep float64."""
+    values = pd.to_numeric(series, errors='coerce').astype('float64')
+    candidate = values.astype('float32')
+    if np.array_equal(candidate.to_numpy('float64'), values.to_numpy(), equal_nan=True):
+        return candidate
+    return values
+
+def read_company_table(path, columns=None):
+    """Read the company table from the .xlsx workbook or a .parquet snapshot with the same columns."""
+    if path.endswith('.parquet'):
+        if columns is None:
+            return pd.read_parquet(path)
+        import pyarrow.parquet as pq
+        available = set(pq.read_schema(path).names)
+        return pd.read_parquet(path, columns=[c for c in columns if c in available])
+    return pd.read_excel(path, usecols=None if columns is None else (lambda column: column in columns))
+
+def load_company_frame(path):
+    """Read the company table into the compact in-memory layout. Returns (frame, side_stores)."""
+    return company_frame(read_company_table(path, API_COLUMNS))
+
+def company_frame(raw):
+    # The compact frame and side stores of a table read with read_company_table
+    df = pd.DataFrame(index=pd.RangeIndex(len(raw)))
+    for column in TEXT_COLUMNS:
+        df[column] = raw[column] if column in raw else pd.Series(np.nan, index=df.index, dtype=object)
+    for column in CATEGORY_COLUMNS:
+        df[column] = raw[column].astype('category') if column in raw else pd.Categorical([np.nan] * len(raw))
+    for column in NUMERIC_COLUMNS:
+        df[column] = downcast_numeric(raw[column]) if column in raw else np.nan
+
+    side_stores = {
+        column: TextStore(raw[column] if column in raw else [np.nan] * len(raw))
+        for column in SIDE_STORE_COLUMNS
+    }
+    return df, side_stores
+
+def frame_memory(df, side_stores=None):
+    """Deep memory usage of a frame (and its side stores) in bytes."""
+    total = int(df.memory_usage(index=True, deep=True).sum())
+    if side_stores:
+        total += sum(store.nbytes for store in side_stores.values())
+    return total
+
+def file_version(path):
+    # Short content hash, so every worker agrees on the version of the same file
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+class Dataset:
+    """
+    One version of the company data. The frame and side stores are never modified after loading;
+    aggregates and indexes derived from them are cached in self.aggregates, so replacing the
+    Dataset object replaces everything derived from it at once.
+    """
+
+    def __init__(self, path, frame, side_stores, version, load_seconds=0.0, funding=None, cache_entries=CACHE_ENTRIES):
+        self.path = path
+        self.frame = frame
+        self.side_stores = side_stores
+        # Round-level funding and acquisition tables (funding.FundingTables)
+        self.funding = funding if funding is not None else FundingTables(None, None, len(frame))
+        self.version = version
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.aggregates = LRUCache(cache_entries)
+        # Aggregates for parameters chosen by clients, never written to the shared store
+        self.request_aggregates = LRUCache(REQUEST_CACHE_ENTRIES)
+        # (lock, requests holding or waiting for it) per aggregate being computed, so concurrent
+        # misses compute it only once
+        self.aggregate_locks = {}
+        self.aggregate_locks_lock = threading.Lock()
+
+def load_dataset(path, cache_entries=CACHE_ENTRIES):
+    start = time.perf_counter()
+    version = file_version(path)
+    raw = read_company_table(path, API_COLUMNS + FUNDING_COLUMNS)
+    frame, side_stores = company_frame(raw)
+    funding = FundingTables(raw.get('funding_data'), raw.get('acquisitions_acquired'), len(frame))
+    return Dataset(path, frame, side_stores, version, time.perf_counter() - start, funding, cache_entries)
+
+class DatasetWatcher(threading.Thread):
+    """
+    Poll a file and call on_change(path) once it has changed and then stayed the same
+    for one more interval, so files that are still being written are not picked up.
+    """
+
+    def __init__(self, path, on_change, interval=5.0):
+        super().__init__(name='dataset-watcher', daemon=True)
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def run(self):
+        loaded = self._signature()
+        pending = None
+        while not self.stopped.wait(self.interval):
+            signature = self._signature()
+            if signature is None or signature == loaded:
+                pending = None
+                continue
+            if signature != pending:
+                # Changed since the last check, wait for it to settle
+                pending = signature
+                continue
+            try:
+                self.on_change(self.path)
+            except Exception:
+                logging.exception("Dataset watcher callback failed for %s", self.path)
+            loaded, pending = signature, None
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,76 @@
+import numpy as np
+
+DEFAULT_BINS = 50
+DEFAULT_SAMPLE_SIZE = 2000
+
+def _finite_pairs(x, y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = np.isfinite(x) & np.isfinite(y)
+    return x, y, mask
+
+def _log_scale(values):
+    # log1p keeps zero counts (e.g. 0 funding rounds) on the chart
+    return np.log10(1 + np.clip(values, 0, None))
+
+def log_histogram2d(x, y, bins=DEFAULT_BINS):
+    """Bin (x, y) on log-scaled axes and return only the non-empty cells."""
+    x, y, mask = _finite_pairs(x, y)
+    counts, x_edges, y_edges = np.histogram2d(_log_scale(x[mask]), _log_scale(y[mask]), bins=bins)
+    ix, iy = np.nonzero(counts)
+
+    return {
+        'mode': 'bins',
+        'bins': bins,
+        'total': int(mask.sum()),
+        # Edges are converted back to the original units
+        'x_edges': (10 ** x_edges - 1).tolist(),
+        'y_edges': (10 ** y_edges - 1).tolist(),
+        'cells': {
+            'x': ix.tolist(),
+            'y': iy.tolist(),
+            'count': counts[ix, iy].astype(int).tolist()
+        }
+    }
+
+def _robust_distance(values):
+    # Distance from the median in units of the interquartile range
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    return np.abs(values - median) / max(q3 - q1, 1e-9)
+
+def stratified_sample(x, y, n=DEFAULT_SAMPLE_SIZE, bins=20, outlier_fraction=0.2, seed=0):
+    """
+    Return row positions for a sample of about n points that follows the 2-D density
+    of (x, y). outlier_fraction of the budget is spent on the points furthest from the
+    median on either axis, which are always kept.
+    """
+    x, y, mask = _finite_pairs(x, y)
+    positions = np.flatnonzero(mask)
+    if len(positions) <= n:
+        return positions
+
+    lx, ly = _log_scale(x[positions]), _log_scale(y[positions])
+
+    extremeness = np.maximum(_robust_distance(lx), _robust_distance(ly))
+    n_outliers = max(int(n * outlier_fraction), 1)
+    outliers = np.zeros(len(positions), dtype=bool)
+    outliers[np.argpartition(extremeness, -n_outliers)[-n_outliers:]] = True
+
+    # Assign every point to a cell of a coarse log-scaled grid
+    x_cell = np.digitize(lx, np.linspace(lx.min(), lx.max(), bins + 1)[1:-1])
+    y_cell = np.digitize(ly, np.linspace(ly.min(), ly.max(), bins + 1)[1:-1])
+    cell = x_cell * bins + y_cell
+
+    # Proportional allocation of the remaining budget, at least one point per non-empty cell
+    budget = max(n - int(outliers.sum()), 0)
+    cell_counts = np.bincount(cell, minlength=bins * bins)
+    quota = np.where(cell_counts > 0, np.maximum(1, cell_counts * budget // len(cell)), 0)
+
+    # Rank points inside their cell in random order and keep the first quota[cell] of them
+    order = np.lexsort((np.random.default_rng(seed).random(len(cell)), cell))
+    cell_starts = np.concatenate(([0], np.cumsum(cell_counts)[:-1]))
+    rank = np.empty(len(cell), dtype=np.int64)
+    rank[order] = np.arange(len(cell)) - cell_starts[cell[order]]
+
+    keep = outliers | (rank < quota[cell])
+    return positions[keep]
@@ -0,0 +1,75 @@
+"""
+The ABS Average Weekly Earnings tables in data/ as one long table: one row per release,
+table (sector, industry or state), category and measure, with the dollar value and, for the
+sector tables, the yearly change in percent.
+"""
+import glob
+import os
+import re
+
+import openpyxl
+import pandas as pd
+
+EARNINGS_DIR = 'data'
+EARNINGS_COLUMNS = ['period', 'table', 'category', 'measure', 'earnings', 'change_percent']
+# The release month is in the file name (Nov2022...); files without one are May releases
+FILE_PATTERN = re.compile(r'^(?P<month>May|Nov)?(?P<year>\d{4})Average weekly (?P<title>.*), original\.xlsx$')
+
+def _table_name(title):
+    return 'sector' if title.endswith('by sector') else 'industry' if 'industry' in title else 'state'
+
+def _number(value):
+    return value if isinstance(value, (int, float)) else None
+
+def read_earnings_file(path):
+    """Rows of one ABS workbook, as dicts with EARNINGS_COLUMNS."""
+    match = FILE_PATTERN.match(os.path.basename(path))
+    if not match:
+        return []
+    period = pd.Timestamp(f"{match['month'] or 'May'} {match['year']}")
+    table = _table_name(match['title'])
+
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    rows = list(workbook[workbook.sheetnames[0]].iter_rows(values_only=True))
+    workbook.close()
+
+    records = []
+    if table == 'sector':
+        # Category in the first column of its first row only; measure, value and change after it
+        category = None
+        for row in rows:
+            label, measure, value, change = (list(row) + [None] * 4)[:4]
+            if label:
+                category = str(label).strip()
+            if category and measure and _number(value) is not None:
+                records.append({'category': category, 'measure': str(measure).strip(),
+                                'earnings': value, 'change_percent': _number(change)})
+    else:
+        # A header row of measures (Persons ($), Males ($), ...) then one row per industry or state
+        measures = None
+        for row in rows:
+            if measures is None:
+                if any(isinstance(cell, str) and '($)' in cell for cell in row[1:]):
+                    measures = [str(cell).replace('($)', '').strip() if cell else None for cell in row[1:]]
+                continue
+            if not row[0] or _number(row[1]) is None:
+                continue
+            for measure, value in zip(measures, row[1:]):
+                if measure and _number(value) is not None:
+                    records.append({'category': str(row[0]).strip(), 'measure': measure,
+                                    'earnings': value, 'change_percent': None})
+
+    for record in records:
+        record.update(period=period, table=table)
+    return records
+
+def load_earnings(directory=EARNINGS_DIR):
+    """Every ABS earnings workbook in the directory as one frame, sorted by table, category, measure and period."""
+    records = [r for path in sorted(glob.glob(os.path.join(directory, '*.xlsx'))) for r in read_earnings_file(path)]
+    frame = pd.DataFrame.from_records(records, columns=EARNINGS_COLUMNS)
+    frame['period'] = pd.to_datetime(frame['period'])
+    for column in ('table', 'category', 'measure'):
+        frame[column] = frame[column].astype('category')
+    frame['earnings'] = frame['earnings'].astype('float64')
+    frame['change_percent'] = frame['change_percent'].astype('float64')
+    return frame.sort_values(['table', 'category', 'measure', 'period'], ignore_index=True)
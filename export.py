@@ -0,0 +1,138 @@
+"""
+Streaming export of a frame as Arrow IPC or Parquet. Filters are evaluated on the in-memory
+columns first, then only the selected columns of the matching rows are converted to Arrow,
+CHUNK_ROWS at a time, and written out as each chunk is ready: memory stays bounded by one
+chunk whatever the size of the export.
+"""
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 50000
+FORMATS = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+OPERATORS = {
+    '==': operator.eq, '!=': operator.ne, '>=': operator.ge, '<=': operator.le, '>': operator.gt, '<': operator.lt,
+}
+FILTER_PATTERN = re.compile(r'^\s*(?P<column>[\w ]+?)\s*(?P<op>==|!=|>=|<=|>|<)\s*(?P<value>.*?)\s*$')
+
+def parse_filters(expressions, frame, columns):
+    """(column, operator, value) of each column<op>value expression, with the value parsed as the column's type."""
+    filters = []
+    for expression in expressions:
+        match = FILTER_PATTERN.match(expression)
+        if not match or match['column'] not in columns:
+            raise ValueError(f"Invalid filter {expression!r}: expected <column><op><value> on an exported column")
+        column, value = match['column'], match['value']
+        series = frame[column]
+        numeric = pd.api.types.is_numeric_dtype(series.dtype)
+        dated = pd.api.types.is_datetime64_any_dtype(series.dtype)
+        if not (numeric or dated) and match['op'] not in ('==', '!='):
+            raise ValueError(f"Invalid filter {expression!r}: {column} only supports == and !=")
+        try:
+            value = float(value) if numeric else pd.Timestamp(value) if dated else value
+        except ValueError:
+            raise ValueError(f"Invalid filter {expression!r}: {value!r} is not a valid {column} value")
+        filters.append((column, OPERATORS[match['op']], value))
+    return filters
+
+def row_mask(frame, filters):
+    """Boolean array of the rows matching every filter; missing values never match."""
+    mask = np.ones(len(frame), dtype=bool)
+    for column, compare, value in filters:
+        series = frame[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Compare the categories once, then look the codes up
+            matches = np.append(compare(series.cat.categories.astype(str), value), False)
+            mask &= matches[series.cat.codes.to_numpy()]
+        else:
+            mask &= compare(series, value).fillna(False).to_numpy(dtype=bool)
+    return mask
+
+class StreamSink:
+    """Write-only file object for the Arrow writers that hands out what was written so far."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def record_batches(frame, columns, positions, schema, text_columns=None, chunk_rows=CHUNK_ROWS):
+    # Arrow batches of the given rows and columns; text_columns are side stores read per row
+    text_columns = text_columns or {}
+    for start in range(0, len(positions), chunk_rows):
+        chunk = positions[start:start + chunk_rows]
+        data = {}
+        for column in columns:
+            if column in text_columns:
+                data[column] = pa.array([text_columns[column].get(p) for p in chunk], type=pa.large_string())
+            else:
+                data[column] = pa.Array.from_pandas(frame[column].take(chunk), type=schema.field(column).type)
+        yield pa.RecordBatch.from_pydict(data, schema=schema)
+
+def _is_text(dtype):
+    return pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+
+def arrow_type(series):
+    # Text is large_string whatever the pandas version: before pandas 3 an empty object column
+    # infers as null, and the first chunk with values would not fit the schema
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        if _is_text(dtype.categories.dtype):
+            return pa.dictionary(pa.from_numpy_dtype(series.cat.codes.dtype), pa.large_string())
+    elif _is_text(dtype):
+        return pa.large_string()
+    return pa.Array.from_pandas(series.iloc[:0]).type
+
+def export_schema(frame, columns, text_columns=None):
+    text_columns = text_columns or {}
+    fields = []
+    for column in columns:
+        if column in text_columns:
+            fields.append(pa.field(column, pa.large_string()))
+        else:
+            fields.append(pa.field(column, arrow_type(frame[column])))
+    return pa.schema(fields)
+
+def stream(frame, columns, filters=(), fmt='arrow', text_columns=None, chunk_rows=CHUNK_ROWS, metadata=None):
+    """Bytes of the export, chunk by chunk: an Arrow IPC stream or a Parquet file with one row group per chunk."""
+    positions = np.flatnonzero(row_mask(frame, filters))
+    schema = export_schema(frame, columns, text_columns).with_metadata(metadata or {})
+    sink = StreamSink()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    for batch in record_batches(frame, columns, positions, schema, text_columns, chunk_rows):
+        if fmt == 'parquet':
+            writer.write_table(pa.Table.from_batches([batch], schema))
+        else:
+            writer.write_batch(batch)
+        yield sink.take()
+    writer.close()
+    yield sink.take()
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Scatter charts are decimated to this many points before they are sent to the browser
+MAX_SCATTER_POINTS = 5000
+
+SIZE_COLOR_MAP = {
+    "Micro (< 30)": "#FFA07A",
+    "Small (30-99)": "#98FB98",
+    "Medium (100-499)": "#87CEFA",
+    "Large (500+)": "#DDA0DD"
+}
+
+def _log_axis(edges):
+    # Bins are uniform in log10(1 + value); place ticks at 0 and at the powers of ten in range
+    positions = np.log10(1 + np.asarray(edges))
+    decades = np.arange(0, int(np.floor(positions[-1])) + 1)
+    values = np.concatenate(([0], 10.0 ** decades))
+    return positions, dict(tickvals=np.log10(1 + values).tolist(), ticktext=[f"{v:,.0f}" for v in values])
+
+def density_figure(data, title, x_title, y_title):
+    """Heatmap of the sparse log-scaled bins returned by the scatter endpoints in mode=bins."""
+    z = np.full((data['bins'], data['bins']), np.nan)
+    cells = data['cells']
+    z[cells['x'], cells['y']] = cells['count']
+
+    x, x_ticks = _log_axis(data['x_edges'])
+    y, y_ticks = _log_axis(data['y_edges'])
+
+    fig = go.Figure(go.Heatmap(x=x, y=y, z=z.T, colorscale="YlOrRd", colorbar=dict(title="Companies"),
+                               hovertemplate="%{z} companies<extra></extra>"))
+    fig.update_layout(title=title, height=600,
+                      xaxis=dict(title=x_title, **x_ticks), yaxis=dict(title=y_title, **y_ticks))
+    return fig
+
+def decimate_points(df, y, max_points=MAX_SCATTER_POINTS):
+    """Keep at most max_points rows, evenly spaced along y so the min, max and overall shape survive."""
+    if len(df) <= max_points:
+        return df
+    ordered = df.sort_values(y, kind='stable')
+    positions = np.linspace(0, len(ordered) - 1, max_points).round().astype(int)
+    return ordered.iloc[np.unique(positions)]
+
+# Company Size Distribution
+def company_size_figure(data):
+    categories = list(data.keys())
+    values = list(data.values())
+
+    fig = px.pie(
+        values=values,
+        names=categories,
+        title="Company Size Distribution",
+        color=categories,
+        color_discrete_map=SIZE_COLOR_MAP
+    )
+
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    fig.update_layout(
+        height=600,
+        legend_title_text='Company Size',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+# Industry Breakdown
+def industry_figure(data):
+    fig = px.treemap(names=list(data.keys()), parents=[""] * len(data), values=list(data.values()), title="Industry Breakdown")
+    fig.update_layout(height=600)
+    return fig
+
+# Founded Year Timeline
+def founded_year_figure(data):
+    fig = px.line(x=list(data.keys()), y=list(data.values()), title="Companies Founded by Year")
+    fig.update_layout(height=600)
+    return fig
+
+# Company Type Distribution
+def company_type_figure(data):
+    fig = px.pie(values=list(data.values()), names=list(data.keys()), title="Company Type Distribution")
+    fig.update_layout(height=600)
+    return fig
+
+# Funding Analysis
+def funding_figure(data):
+    df = decimate_points(pd.DataFrame(data), 'extra_total_funding_amount')
+    fig = px.scatter(df, x='extra_number_of_funding_rounds', y='extra_total_funding_amount',
+                     hover_name='name', title="Funding Analysis", render_mode='webgl')
+    fig.update_layout(height=600)
+    return fig
+
+# Median round size per funding type, with the interquartile range as error bars
+def round_sizes_figure(data):
+    df = pd.DataFrame(data, columns=['funding_type', 'rounds', 'rounds_with_amount', 'median', 'p25', 'p75'])
+    df = df.dropna(subset=['median'])
+    fig = px.bar(df, x='funding_type', y='median', error_y=df['p75'] - df['median'],
+                 error_y_minus=df['median'] - df['p25'], hover_data=['rounds', 'rounds_with_amount'],
+                 labels={'funding_type': 'Funding Type', 'median': 'Median Round Size'},
+                 title="Median Round Size by Funding Type", log_y=True)
+    fig.update_layout(height=500)
+    return fig
+
+# Employee Count vs Follower Count
+def employee_follower_figure(data):
+    df = decimate_points(pd.DataFrame(data), 'follower_count')
+    fig = px.scatter(df, x='company_size', y='follower_count', title="Employee Count vs Follower Count",
+                     render_mode='webgl')
+    fig.update_layout(height=600)
+    return fig
+
+def funding_density_figure(data):
+    return density_figure(data, "Funding Analysis", "Number of Funding Rounds", "Total Funding Amount")
+
+def employee_follower_density_figure(data):
+    return density_figure(data, "Employee Count vs Follower Count", "Employees on LinkedIn", "Follower Count")
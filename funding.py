@@ -0,0 +1,144 @@
+"""
+Funding rounds and acquisitions as tables. company.py stores ProxyCurl's `funding_data` and
+`acquisitions.acquired` lists as JSON text in one cell per company; they are parsed once, when
+a dataset version is loaded, into one row per round, per investor in a round and per
+acquisition, with typed amounts and dates. Aggregates are then plain group-bys over these
+tables and never touch JSON.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+def _parse_lists(series):
+    # List in each cell (one json.loads per distinct text); anything else counts as empty
+    parsed = {}
+    for text in series.dropna().unique():
+        try:
+            value = json.loads(text)
+        except (TypeError, ValueError):
+            value = None
+        parsed[text] = [item for item in value if isinstance(item, dict)] if isinstance(value, list) else []
+    return [parsed.get(text, []) if isinstance(text, str) else [] for text in series]
+
+def _dates(dates):
+    # ProxyCurl dates are {day, month, year} dicts; a known year with no month or day counts as January 1st
+    parts = pd.DataFrame([d if isinstance(d, dict) else {} for d in dates], columns=['year', 'month', 'day'])
+    parts = parts.apply(pd.to_numeric, errors='coerce')
+    parts[['month', 'day']] = parts[['month', 'day']].fillna(1)
+    return pd.to_datetime(parts, errors='coerce')
+
+def _labels(values):
+    # Categorical of stripped text: some funding types come with stray spaces and newlines
+    labels = pd.Series(values, dtype=object)
+    stripped = labels.astype('str').str.strip()
+    return stripped.where(labels.notna() & (stripped != '')).astype('category')
+
+def _amounts(values):
+    return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').astype('float64')
+
+class FundingTables:
+    """
+    rounds: position (company row), funding_type, money_raised, announced_date, number_of_investor
+    round_investors: round (row of rounds), position, name, type
+    acquisitions: position (acquiring company row), acquired_url, announced_date, price
+    """
+
+    def __init__(self, funding_data, acquisitions, companies):
+        self.companies = companies
+        per_company = _parse_lists(funding_data) if funding_data is not None else [[]] * companies
+        counts = np.array([len(rounds) for rounds in per_company])
+        rounds = [r for company_rounds in per_company for r in company_rounds]
+        self.rounds = pd.DataFrame({
+            'position': np.repeat(np.arange(companies, dtype=np.int32), counts),
+            'funding_type': _labels([r.get('funding_type') for r in rounds]),
+            'money_raised': _amounts([r.get('money_raised') for r in rounds]),
+            'announced_date': _dates([r.get('announced_date') for r in rounds]),
+            'number_of_investor': _amounts([r.get('number_of_investor') for r in rounds]),
+        })
+
+        investors = [r.get('investor_list') if isinstance(r.get('investor_list'), list) else [] for r in rounds]
+        investors = [[i for i in round_investors if isinstance(i, dict) and i.get('name')] for round_investors in investors]
+        investor_counts = np.array([len(round_investors) for round_investors in investors], dtype=np.int64)
+        flat = [i for round_investors in investors for i in round_investors]
+        round_rows = np.repeat(np.arange(len(rounds), dtype=np.int32), investor_counts)
+        self.round_investors = pd.DataFrame({
+            'round': round_rows,
+            'position': self.rounds['position'].to_numpy()[round_rows],
+            'name': _labels([i['name'] for i in flat]),
+            'type': _labels([i.get('type') for i in flat]),
+        })
+
+        per_company = _parse_lists(acquisitions) if acquisitions is not None else [[]] * companies
+        counts = np.array([len(acquired) for acquired in per_company])
+        acquired = [a for company_acquired in per_company for a in company_acquired]
+        self.acquisitions = pd.DataFrame({
+            'position': np.repeat(np.arange(companies, dtype=np.int32), counts),
+            'acquired_url': pd.Series([a.get('linkedin_profile_url') or a.get('crunchbase_profile_url') for a in acquired],
+                                      dtype=object).astype('str'),
+            'announced_date': _dates([a.get('announced_date') for a in acquired]),
+            'price': _amounts([a.get('price') for a in acquired]),
+        })
+
+    @property
+    def nbytes(self):
+        return int(sum(table.memory_usage(index=True, deep=True).sum()
+                       for table in (self.rounds, self.round_investors, self.acquisitions)))
+
+def records(frame):
+    """Rows of an aggregate as dicts, with None for missing values so they serialize as JSON null."""
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
+def _with_year(table):
+    # Rows with a known announcement date, and its year
+    table = table[table['announced_date'].notna()]
+    return table.assign(year=table['announced_date'].dt.year.astype('int32'))
+
+def _unknown_totals(summary, total, known):
+    # A sum over no known amounts is unknown, not zero
+    summary[total] = summary[total].where(summary[known] > 0)
+    return summary
+
+def funding_by_industry_year(tables, industries):
+    """Rounds, funded companies, total and median round size per industry and year announced."""
+    rounds = tables.rounds.assign(industry=industries.to_numpy()[tables.rounds['position'].to_numpy()])
+    rounds = _with_year(rounds.dropna(subset=['industry']))
+    grouped = rounds.groupby(['industry', 'year'], observed=True, sort=True)
+    summary = grouped.agg(rounds=('position', 'size'), companies=('position', 'nunique'),
+                          rounds_with_amount=('money_raised', 'count'), total_raised=('money_raised', 'sum'),
+                          median_round=('money_raised', 'median'))
+    return _unknown_totals(summary, 'total_raised', 'rounds_with_amount').reset_index()
+
+def round_sizes(tables):
+    """Rounds, rounds with a known amount, median and quartiles of the amount per funding type."""
+    rounds = tables.rounds
+    money = rounds['money_raised']
+    grouped = money.groupby(rounds['funding_type'], observed=True)
+    summary = pd.DataFrame({
+        'rounds': rounds.groupby('funding_type', observed=True).size(),
+        'rounds_with_amount': grouped.count(),
+        'median': grouped.median(),
+        'p25': grouped.quantile(0.25),
+        'p75': grouped.quantile(0.75),
+        'total_raised': grouped.sum(),
+    })
+    summary = _unknown_totals(summary, 'total_raised', 'rounds_with_amount')
+    return summary.sort_values('rounds', ascending=False, kind='stable').reset_index()
+
+def investor_frequency(tables):
+    """Per investor: rounds joined, distinct companies backed and the amount of those rounds, most active first."""
+    investors = tables.round_investors
+    money = tables.rounds['money_raised'].to_numpy()[investors['round'].to_numpy()]
+    summary = investors.assign(money_raised=money).groupby('name', observed=True).agg(
+        type=('type', 'first'), rounds=('round', 'size'), companies=('position', 'nunique'),
+        rounds_with_amount=('money_raised', 'count'), rounds_raised=('money_raised', 'sum'))
+    summary = _unknown_totals(summary, 'rounds_raised', 'rounds_with_amount')
+    return summary.sort_values(['rounds', 'companies'], ascending=False, kind='stable').reset_index()
+
+def acquisitions_by_year(tables):
+    """Acquisitions, acquiring companies, total and median known price per year announced."""
+    grouped = _with_year(tables.acquisitions).groupby('year', sort=True)
+    summary = grouped.agg(acquisitions=('position', 'size'), acquirers=('position', 'nunique'),
+                          acquisitions_with_price=('price', 'count'), total_price=('price', 'sum'),
+                          median_price=('price', 'median'))
+    return _unknown_totals(summary, 'total_price', 'acquisitions_with_price').reset_index()
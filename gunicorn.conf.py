@@ -0,0 +1,50 @@
+import gc
+import os
+import tempfile
+
+# gunicorn -c gunicorn.conf.py
+# SERVING_MODE=async serves asgi.py (bounded handler threads and backpressure) on uvicorn workers
+serving_mode = os.getenv('SERVING_MODE', 'sync')
+if serving_mode == 'async':
+    wsgi_app = 'asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'app:app'
+bind = f"0.0.0.0:{os.getenv('PORT', '5050')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+
+# Load app.py (the company frame, GeoJSON and side stores) once in the master before forking,
+# so workers share those pages copy-on-write instead of each loading its own copy.
+# Set GUNICORN_PRELOAD=0 to get the old one-copy-per-worker behaviour.
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') != '0'
+
+# Every worker writes its metrics here so /metrics reports the whole server, whichever worker answers
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f"ausjobmarket-metrics-{bind.rsplit(':', 1)[-1]}"))
+
+def on_starting(server):
+    # Counts of an earlier run of the server are not this one's
+    import metrics
+    os.makedirs(os.environ['METRICS_DIR'], exist_ok=True)
+    metrics.clear_directory(os.environ['METRICS_DIR'])
+
+def when_ready(server):
+    if not preload_app:
+        return
+    import app
+    app.precompute_aggregates()
+    # Move everything allocated so far out of the garbage collector's reach. Otherwise the
+    # first collection in each worker writes to every object header and un-shares the pages.
+    gc.freeze()
+    server.log.info("Dataset %s preloaded with %d cached aggregates",
+                    app.current_dataset.version, len(app.current_dataset.aggregates))
+    # The master's load and precompute counts, reported once rather than by every worker
+    app.registry.flush()
+
+def post_fork(server, worker):
+    # Threads do not survive fork, so every worker runs its own watcher. A reload builds
+    # the new version inside that worker; the preloaded copy stays shared until then.
+    import app
+    app.start_dataset_watcher()
+    if preload_app:
+        app.registry.after_fork()
+    app.registry.start_flushing()
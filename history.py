@@ -0,0 +1,233 @@
+"""
+Append-only history of the company table, one Parquet partition per crawl date, so follower
+counts and headcounts can be compared over time even though each crawl overwrites the
+served table.
+
+Only the tracked metrics are kept, keyed by company name (the first row of each name, like
+the API's lookups). Every FULL_EVERY-th partition is a full copy of them; the partitions in
+between are deltas holding only the companies whose metrics changed, new companies and
+companies that disappeared (`removed`). The state on any date is therefore the last full
+partition up to it plus the deltas after it: a leaderboard between two dates reads at most
+FULL_EVERY partitions per date, and only the metric it ranks by, however many snapshots
+accumulate. Partitions are sorted by name in small row groups, so a company's history reads
+one row group of each partition in its date range.
+
+    python history.py company_information_full.xlsx --date 2024-05-01
+"""
+import argparse
+import functools
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from dataset import read_company_table
+
+HISTORY_DIR = 'history'
+MANIFEST_FILE = 'manifest.json'
+# Metrics whose history is kept
+HISTORY_METRICS = ['follower_count', 'company_size_on_linkedin']
+# A full partition every FULL_EVERY crawls, or sooner when a delta would be at least half the table
+FULL_EVERY = 8
+ROW_GROUP_ROWS = 1024
+# Leaderboard comparisons kept until the next crawl is appended
+GROWTH_CACHE_SIZE = 64
+
+def history_table(frame):
+    """Name and metrics of each company, one row per name, sorted by name."""
+    table = frame.loc[frame['name'].notna(), ['name'] + HISTORY_METRICS]
+    table = table.drop_duplicates('name', keep='first').astype({'name': str})
+    for column in HISTORY_METRICS:
+        table[column] = pd.to_numeric(table[column], errors='coerce').astype('float64')
+    return table.sort_values('name', ignore_index=True)
+
+def delta_rows(previous, current):
+    """Rows of `current` that are new or changed since `previous`, plus `removed` rows for missing names."""
+    merged = current.merge(previous, on='name', how='outer', suffixes=('', '_previous'), indicator=True)
+    changed = merged['_merge'] == 'left_only'
+    for column in HISTORY_METRICS:
+        now, before = merged[column], merged[f'{column}_previous']
+        # Missing on both sides counts as unchanged
+        changed |= (merged['_merge'] == 'both') & (now != before) & ~(now.isna() & before.isna())
+    removed = merged['_merge'] == 'right_only'
+    delta = merged.loc[changed | removed, ['name'] + HISTORY_METRICS].copy()
+    delta['removed'] = removed[changed | removed].to_numpy()
+    return delta.sort_values('name', ignore_index=True)
+
+def partition_schema():
+    return pa.schema([pa.field('name', pa.string())] +
+                     [pa.field(column, pa.float64()) for column in HISTORY_METRICS] +
+                     [pa.field('removed', pa.bool_())])
+
+@functools.lru_cache(maxsize=32)
+def read_partition(path, columns):
+    # Partitions never change once written, so a read can be reused by any later query
+    return pq.read_table(path, columns=list(columns)).to_pandas()
+
+@functools.lru_cache(maxsize=256)
+def name_ranges(path):
+    # {row group: (first, last) name}, from the footer statistics; empty row groups are left out
+    metadata = pq.read_metadata(path)
+    column = metadata.schema.names.index('name')
+    ranges = {}
+    for i in range(metadata.num_row_groups):
+        statistics = metadata.row_group(i).column(column).statistics
+        if metadata.row_group(i).num_rows:
+            ranges[i] = (statistics.min, statistics.max) if statistics and statistics.has_min_max else (None, None)
+    return ranges
+
+def read_company_rows(path, name):
+    # Rows of one company in a partition: only the row groups whose name range covers it are read
+    groups = [i for i, (first, last) in name_ranges(path).items() if first is None or first <= name <= last]
+    if not groups:
+        return []
+    table = pq.ParquetFile(path).read_row_groups(groups)
+    return table.filter(pc.equal(table['name'], name)).to_pylist()
+
+class SnapshotHistory:
+    """
+    The partitions in a history directory, described by its manifest. Shared by request threads:
+    refresh() swaps in the partitions of a new manifest together with an empty growth cache, and
+    readers take both once, so a query never mixes two versions of the manifest.
+    """
+
+    def __init__(self, directory=HISTORY_DIR, full_every=FULL_EVERY):
+        self.directory = directory
+        self.full_every = full_every
+        self.manifest_path = os.path.join(directory, MANIFEST_FILE)
+        self.manifest_mtime = None
+        # (partitions, growth cache of those partitions), replaced as a whole
+        self.current = ([], {})
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """Re-read the manifest if it changed; returns whether any snapshot exists."""
+        with self.lock:
+            try:
+                mtime = os.stat(self.manifest_path).st_mtime_ns
+            except FileNotFoundError:
+                self.current, self.manifest_mtime = ([], {}), None
+                return False
+            if mtime != self.manifest_mtime:
+                with open(self.manifest_path) as f:
+                    self.current = (json.load(f)['partitions'], {})
+                self.manifest_mtime = mtime
+            return bool(self.partitions)
+
+    @property
+    def partitions(self):
+        return self.current[0]
+
+    @property
+    def dates(self):
+        return [partition['crawl_date'] for partition in self.partitions]
+
+    def path(self, partition):
+        return os.path.join(self.directory, partition['file'])
+
+    def partitions_for(self, since=None, until=None, partitions=None):
+        # The last full partition at or before `since` (or the first partition), then every partition up to `until`
+        partitions = self.partitions if partitions is None else partitions
+        until = until or partitions[-1]['crawl_date']
+        start = 0
+        for index, partition in enumerate(partitions):
+            if since is not None and partition['crawl_date'] <= since and partition['kind'] == 'full':
+                start = index
+        return [p for p in partitions[start:] if p['crawl_date'] <= until]
+
+    def state(self, date, columns=tuple(HISTORY_METRICS), partitions=None):
+        """Name and the given metrics of every company present in the crawl of `date` (or the last before it)."""
+        partitions = self.partitions_for(since=date, until=date, partitions=partitions)
+        if not partitions:
+            return pd.DataFrame({'name': pd.Series(dtype=str), **{c: pd.Series(dtype='float64') for c in columns}})
+        frames = [read_partition(self.path(p), ('name', *columns, 'removed')) for p in partitions]
+        state = pd.concat(frames, ignore_index=True).drop_duplicates('name', keep='last')
+        return state.loc[~state['removed'], ['name', *columns]].reset_index(drop=True)
+
+    def company(self, name, since=None, until=None):
+        """The company's metrics on every crawl date from `since` to `until` it was present, oldest first."""
+        partitions = self.partitions_for(since, until)
+        rows, current = [], None
+        for partition in partitions:
+            changes = read_company_rows(self.path(partition), name)
+            if changes:
+                current = None if changes[-1]['removed'] else changes[-1]
+            elif partition['kind'] == 'full':
+                current = None
+            if current is not None and (since is None or partition['crawl_date'] >= since):
+                rows.append({'crawl_date': partition['crawl_date'],
+                             **{column: current[column] for column in HISTORY_METRICS}})
+        return rows
+
+    def growth(self, metric, since, until=None):
+        """Each company's metric on `since` and `until` and the change between them, for companies present on both."""
+        partitions, cache = self.current
+        until = until or partitions[-1]['crawl_date']
+        key = (metric, since, until)
+        growth = cache.get(key)
+        if growth is None:
+            growth = self.compute_growth(metric, since, until, partitions)
+            # Stored in the cache of the partitions it was computed from, even if refresh() has moved on
+            with self.lock:
+                if len(cache) >= GROWTH_CACHE_SIZE:
+                    cache.clear()
+                cache[key] = growth
+        return growth
+
+    def compute_growth(self, metric, since, until, partitions=None):
+        start = self.state(since, (metric,), partitions).rename(columns={metric: 'start'})
+        end = self.state(until, (metric,), partitions).rename(columns={metric: 'end'})
+        growth = start.merge(end, on='name').dropna(subset=['start', 'end'])
+        growth['change'] = growth['end'] - growth['start']
+        growth['change_percent'] = np.where(growth['start'] > 0, growth['change'] / growth['start'] * 100, np.nan)
+        return growth
+
+    def append(self, frame, crawl_date):
+        """Add the crawl of `crawl_date` (YYYY-MM-DD), which must be later than every crawl already kept."""
+        crawl_date = pd.Timestamp(crawl_date).strftime('%Y-%m-%d')
+        self.refresh()
+        if self.partitions and crawl_date <= self.dates[-1]:
+            raise ValueError(f"History already has a crawl on or after {crawl_date} (latest {self.dates[-1]})")
+
+        current = history_table(frame)
+        since_full = next((i for i, p in enumerate(reversed(self.partitions)) if p['kind'] == 'full'), None)
+        table, kind = current.assign(removed=False), 'full'
+        if since_full is not None and since_full + 1 < self.full_every:
+            delta = delta_rows(self.state(self.dates[-1]), current)
+            if len(delta) * 2 < len(current):
+                table, kind = delta, 'delta'
+
+        os.makedirs(self.directory, exist_ok=True)
+        partition = {'crawl_date': crawl_date, 'kind': kind, 'file': f'crawl_date={crawl_date}.parquet',
+                     'rows': len(table), 'companies': len(current)}
+        path = self.path(partition)
+        pq.write_table(pa.Table.from_pandas(table, schema=partition_schema(), preserve_index=False),
+                       f'{path}.tmp', row_group_size=ROW_GROUP_ROWS, compression='zstd')
+        os.replace(f'{path}.tmp', path)
+
+        # The manifest is written last: a partition only exists once it is listed
+        with open(f'{self.manifest_path}.tmp', 'w') as f:
+            json.dump({'metrics': HISTORY_METRICS, 'partitions': self.partitions + [partition]}, f, indent=2)
+        os.replace(f'{self.manifest_path}.tmp', self.manifest_path)
+        self.refresh()
+        return partition
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('table', help='company workbook or Parquet snapshot of one crawl')
+    parser.add_argument('--date', default=pd.Timestamp.today().strftime('%Y-%m-%d'), help='crawl date (default today)')
+    parser.add_argument('--history', default=HISTORY_DIR)
+    args = parser.parse_args()
+
+    partition = SnapshotHistory(args.history).append(read_company_table(args.table, ['name'] + HISTORY_METRICS),
+                                                     args.date)
+    print(f"{partition['crawl_date']}: {partition['kind']} partition, {partition['rows']} rows "
+          f"for {partition['companies']} companies")
+
+if __name__ == '__main__':
+    main()
@@ -10,10 +10,14 @@ load_dotenv()
 
 # Get Google API key from environment variable
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+# GOOGLE_MAPS_BASE_URL can point at a local fake server
+GOOGLE_MAPS_BASE_URL = os.getenv("GOOGLE_MAPS_BASE_URL", "https://maps.googleapis.com/maps/api")
+REQUEST_INTERVAL = float(os.getenv("GOOGLE_REQUEST_INTERVAL", "0.5"))  # seconds between companies
+OUTPUT_FILE = "collected_data/australian_companies_data.xlsx"
 
 def geocode_company(company_name: str) -> Dict:
     """Geocode a company name using Google Geocoding API."""
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
+    url = f"{GOOGLE_MAPS_BASE_URL}/geocode/json"
     params = {
         "address": f"{company_name}, Australia",
         "key": GOOGLE_API_KEY
@@ -21,14 +25,14 @@ def geocode_company(company_name: str) -> Dict:
     response = requests.get(url, params=params)
     data = response.json()
     
-    if data['status'] == 'OK':
+    if data.get('status') == 'OK':
         location = data['results'][0]['geometry']['location']
         return {"latitude": location['lat'], "longitude": location['lng']}
     return None
 
 def get_nearby_places(lat: float, lon: float, place_type: str) -> List[Dict]:
     """Get nearby places using Google Places API."""
-    url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+    url = f"{GOOGLE_MAPS_BASE_URL}/place/nearbysearch/json"
     params = {
         "location": f"{lat},{lon}",
         "radius": 1000,
@@ -40,46 +44,53 @@ def get_nearby_places(lat: float, lon: float, place_type: str) -> List[Dict]:
     
     return [{'name': place['name'], 'type': place_type} for place in data.get('results', [])]
 
-def main(companies: List[str]):
+def company_location(company: str) -> Dict:
+    """Geocode a company and count the malls, restaurants and bus/train stations around it."""
+    location = geocode_company(company)
+    if not location:
+        return None
+
+    lat, lon = location['latitude'], location['longitude']
+
+    malls = get_nearby_places(lat, lon, "shopping_mall")
+    restaurants = get_nearby_places(lat, lon, "restaurant")
+    bus_stations = get_nearby_places(lat, lon, "bus_station")
+    train_stations = get_nearby_places(lat, lon, "train_station")
+
+    return {
+        "Company": company,
+        "Latitude": lat,
+        "Longitude": lon,
+        "Nearby Malls": len(malls),
+        "Nearby Restaurants": len(restaurants),
+        "Nearby Bus Stations": len(bus_stations),
+        "Nearby Train Stations": len(train_stations),
+        "Mall Names": ", ".join([mall['name'] for mall in malls]),
+        "Restaurant Names": ", ".join([restaurant['name'] for restaurant in restaurants]),
+        "Bus Station Names": ", ".join([station['name'] for station in bus_stations]),
+        "Train Station Names": ", ".join([station['name'] for station in train_stations])
+    }
+
+def main(companies: List[str], output_file: str = OUTPUT_FILE):
     results = []
 
     for company in companies:
         print(f"Processing {company}...")
-        location = geocode_company(company)
-        
-        if location:
-            lat, lon = location['latitude'], location['longitude']
-            
-            malls = get_nearby_places(lat, lon, "shopping_mall")
-            restaurants = get_nearby_places(lat, lon, "restaurant")
-            bus_stations = get_nearby_places(lat, lon, "bus_station")
-            train_stations = get_nearby_places(lat, lon, "train_station")
-            
-            results.append({
-                "Company": company,
-                "Latitude": lat,
-                "Longitude": lon,
-                "Nearby Malls": len(malls),
-                "Nearby Restaurants": len(restaurants),
-                "Nearby Bus Stations": len(bus_stations),
-                "Nearby Train Stations": len(train_stations),
-                "Mall Names": ", ".join([mall['name'] for mall in malls]),
-                "Restaurant Names": ", ".join([restaurant['name'] for restaurant in restaurants]),
-                "Bus Station Names": ", ".join([station['name'] for station in bus_stations]),
-                "Train Station Names": ", ".join([station['name'] for station in train_stations])
-            })
-            
-            print(f"Added {company} with {len(malls)} nearby malls, {len(restaurants)} nearby restaurants, "
-                  f"{len(bus_stations)} nearby bus stations, and {len(train_stations)} nearby train stations.")
+        result = company_location(company)
+
+        if result:
+            results.append(result)
+            print(f"Added {company} with {result['Nearby Malls']} nearby malls, {result['Nearby Restaurants']} nearby restaurants, "
+                  f"{result['Nearby Bus Stations']} nearby bus stations, and {result['Nearby Train Stations']} nearby train stations.")
         else:
             print(f"Couldn't find location for {company}")
         
-        time.sleep(0.5)  # To avoid hitting API rate limits
+        time.sleep(REQUEST_INTERVAL)  # To avoid hitting API rate limits
 
     # Save results to Excel file
     df = pd.DataFrame(results)
-    df.to_excel("collected_data/australian_companies_data.xlsx", index=False)
-    print("Data saved to australian_companies_data.xlsx")
+    df.to_excel(output_file, index=False)
+    print(f"Data saved to {output_file}")
 
 if __name__ == "__main__":
     australian_companies = [
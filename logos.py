@@ -15,11 +15,12 @@ load_dotenv()
 
 # Configuration
 EXCEL_FILE = 'company_information_full.xlsx'
-API_ENDPOINT = 'https://nubela.co/proxycurl/api/linkedin/company/profile-picture'
+PROXYCURL_BASE_URL = os.getenv("PROXYCURL_BASE_URL", "https://nubela.co/proxycurl/api")
+API_ENDPOINT = f'{PROXYCURL_BASE_URL}/linkedin/company/profile-picture'
 PROXYCURL_API = os.getenv("PROXYCURL_API")
 OUTPUT_FOLDER = 'company_images'
 MAX_WORKERS = 1
-RATE_LIMIT_PER_MINUTE = 5
+RATE_LIMIT_PER_MINUTE = float(os.getenv("LOGO_RATE_LIMIT_PER_MINUTE", "5"))
 RETRY_STRATEGY = Retry(
     total=5,
     status_forcelist=[429, 500, 502, 503, 504],
@@ -96,10 +97,10 @@ def rate_limited_api_call(row):
     time.sleep(60 / RATE_LIMIT_PER_MINUTE)  # Wait to respect rate limit
     return get_company_image(row)
 
-def main():
-    logging.info(f"Starting process. Reading Excel file: {EXCEL_FILE}")
+def main(excel_file=EXCEL_FILE):
+    logging.info(f"Starting process. Reading Excel file: {excel_file}")
     # Read the Excel file
-    df = pd.read_excel(EXCEL_FILE)
+    df = pd.read_excel(excel_file)
     
     logging.info(f"Total companies to process: {len(df)}")
     
@@ -116,8 +117,8 @@ def main():
                 df.at[company_id, 'Image Path'] = image_path
     
     # Save the updated DataFrame back to Excel
-    df.to_excel(EXCEL_FILE, index=False)
-    logging.info(f"Updated Excel file saved: {EXCEL_FILE}")
+    df.to_excel(excel_file, index=False)
+    logging.info(f"Updated Excel file saved: {excel_file}")
     
     # Print summary
     total_companies = len(df)
@@ -0,0 +1,226 @@
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+
+# Request latency buckets in seconds and payload size buckets in bytes
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+# How often each process writes its values for the others to report
+FLUSH_SECONDS = 1.0
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def snapshot(self):
+        # Copy under the lock so a scrape never iterates while a request thread updates
+        with self.lock:
+            return sorted(self.values.items(), key=lambda item: [str(label) for label in item[0]])
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels):
+        return self.values.get(labels, 0)
+
+    def render(self, snapshot=None, labelnames=None):
+        lines = self.header()
+        labelnames = self.labelnames if labelnames is None else labelnames
+        for labels, value in self.snapshot() if snapshot is None else snapshot:
+            lines.append(f'{self.name}{_format_labels(labelnames, labels)} {_format_value(value)}')
+        return lines
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, *labels, value):
+        with self.lock:
+            self.values[labels] = value
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def snapshot(self):
+        with self.lock:
+            return sorted(((labels, {'counts': list(state['counts']), 'sum': state['sum']})
+                           for labels, state in self.values.items()),
+                          key=lambda item: [str(label) for label in item[0]])
+
+    def observe(self, *labels, value):
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            state['counts'][bisect.bisect_left(self.buckets, value)] += 1
+            state['sum'] += value
+
+    def render(self, snapshot=None, labelnames=None):
+        lines = self.header()
+        names = self.labelnames + ('le',)
+        for labels, state in self.snapshot() if snapshot is None else snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state['counts']):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(state["sum"])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def clear_directory(directory):
+    """Remove the files of an earlier server from a metrics directory; call once before the processes start."""
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+        os.remove(path)
+
+class Registry:
+    """
+    Metrics in the Prometheus text exposition format. Without a directory they are the values of
+    this process. With one, every process (each gunicorn worker and the master) writes its values
+    to a file there, and a scrape adds up every file: whichever worker answers reports the whole
+    server, and counters never go backwards, including the counts of workers that have exited.
+    Gauges are reported per live process with a `pid` label.
+    """
+
+    def __init__(self, directory=None):
+        self.metrics = []
+        self.directory = directory
+        self.flush_lock = threading.Lock()
+        self.flusher = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def flush(self):
+        """Write this process's values to its file in the directory."""
+        if not self.directory:
+            return
+        values = {metric.name: [[list(labels), value] for labels, value in metric.snapshot()] for metric in self.metrics}
+        path = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        with self.flush_lock:
+            with open(f'{path}.tmp', 'w') as f:
+                json.dump(values, f)
+            os.replace(f'{path}.tmp', path)
+
+    def after_fork(self):
+        """
+        In a process forked from one that already counted (gunicorn's preloading master): drop the
+        inherited counts, which stay in the parent's file, so they are not added up twice.
+        """
+        for metric in self.metrics:
+            if metric.kind != 'gauge':
+                metric.clear()
+
+    def start_flushing(self, interval=FLUSH_SECONDS):
+        """Write this process's values every `interval` seconds and at exit, in a daemon thread."""
+        if not self.directory or self.flusher is not None:
+            return
+        stopped = threading.Event()
+
+        def run():
+            while not stopped.wait(interval):
+                self.flush()
+
+        self.flusher = threading.Thread(target=run, name='metrics-flusher', daemon=True)
+        self.flusher.start()
+        atexit.register(self.flush)
+
+    def collect(self):
+        # {metric name: snapshot} over every process's file: counters and histograms are added up,
+        # gauges are kept per live process
+        if not self.directory:
+            return {metric.name: metric.snapshot() for metric in self.metrics}
+        self.flush()
+        by_name = {metric.name: metric for metric in self.metrics}
+        merged = {name: {} for name in by_name}
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            pid = int(os.path.basename(path)[len('metrics-'):-len('.json')])
+            try:
+                with open(path) as f:
+                    values = json.load(f)
+            except (OSError, ValueError):
+                continue
+            live = _alive(pid)
+            for name, entries in values.items():
+                metric = by_name.get(name)
+                if metric is None:
+                    continue
+                totals = merged[name]
+                for labels, value in entries:
+                    labels = tuple(labels)
+                    if metric.kind == 'gauge':
+                        if live:
+                            totals[labels + (pid,)] = value
+                    elif metric.kind == 'histogram':
+                        state = totals.setdefault(labels, {'counts': [0] * len(value['counts']), 'sum': 0.0})
+                        state['counts'] = [a + b for a, b in zip(state['counts'], value['counts'])]
+                        state['sum'] += value['sum']
+                    else:
+                        totals[labels] = totals.get(labels, 0) + value
+        return {name: sorted(totals.items(), key=lambda item: [str(label) for label in item[0]])
+                for name, totals in merged.items()}
+
+    def render(self):
+        lines = []
+        collected = self.collect()
+        for metric in self.metrics:
+            labelnames = metric.labelnames + ('pid',) if self.directory and metric.kind == 'gauge' else None
+            lines.extend(metric.render(collected[metric.name], labelnames))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+# Metrics companies are ranked on, in column order of the rank arrays
+METRICS = ['follower_count', 'company_size', 'founded_year', 'num_specialties', 'num_countries']
+
+# The buckets of /api/company_size_distribution
+SIZE_BUCKET_EDGES = [30, 100, 500]
+SIZE_BUCKET_LABELS = ["Micro (< 30)", "Small (30-99)", "Medium (100-499)", "Large (500+)"]
+
+def size_buckets(sizes):
+    """Size bucket code of every company, -1 where the size is unknown."""
+    sizes = np.asarray(sizes, dtype=float)
+    return np.where(np.isfinite(sizes), np.searchsorted(SIZE_BUCKET_EDGES, sizes, side='right'), -1)
+
+def percentile_ranks(values, groups):
+    """
+    Percentile rank of every value among the values of its group: the share of the group
+    below it, counting ties as half, from 0 to 100. One sort of (group, value) and two
+    searchsorted calls rank every group at once. Missing values and group -1 get NaN and
+    do not count towards any group.
+    """
+    values = np.asarray(values, dtype=float)
+    groups = np.asarray(groups, dtype=np.int64)
+    valid = np.isfinite(values) & (groups >= 0)
+    ranks = np.full(len(values), np.nan, dtype=np.float32)
+    if not valid.any():
+        return ranks
+
+    # Replace values by their order among all distinct values so (group, value) fits in one int64
+    distinct, value_codes = np.unique(values[valid], return_inverse=True)
+    keys = groups[valid] * (len(distinct) + 1) + value_codes
+    ordered = np.sort(keys)
+
+    below = np.searchsorted(ordered, keys, side='left')
+    through = np.searchsorted(ordered, keys, side='right')
+    group_keys = groups[valid] * (len(distinct) + 1)
+    group_start = np.searchsorted(ordered, group_keys, side='left')
+    group_size = np.searchsorted(ordered, group_keys + len(distinct), side='right') - group_start
+
+    ranks[valid] = 100 * ((below - group_start) + 0.5 * (through - below)) / group_size
+    return ranks
+
+def _group_sizes(values, groups):
+    # Number of companies with a value in each company's group
+    valid = np.isfinite(values) & (groups >= 0)
+    counts = np.bincount(groups[valid], minlength=int(groups.max(initial=-1)) + 1)
+    return np.where(groups >= 0, counts[np.maximum(groups, 0)] if len(counts) else 0, 0).astype(np.int32)
+
+def _group_medians(values, groups, n_groups):
+    medians = np.full(n_groups, np.nan, dtype=np.float32)
+    valid = np.isfinite(values) & (groups >= 0)
+    if valid.any():
+        medians[:] = pd.Series(values[valid]).groupby(groups[valid]).median().reindex(range(n_groups)).to_numpy()
+    return medians
+
+class PeerTable:
+    """
+    Percentile ranks of every company within its industry and within its size bucket, built once
+    per dataset version. Each peer dimension holds a float32 (companies x metrics) rank array, an
+    int32 array with the number of peers each rank was computed over and float32 per-group medians.
+    """
+
+    def __init__(self, metrics, industries, sizes):
+        values = np.column_stack([np.asarray(metrics[m], dtype=float) for m in METRICS])
+        industries = pd.Categorical(industries)
+        self.dimensions = {
+            'industry': (industries.codes.astype(np.int64), list(industries.categories)),
+            'size_bucket': (size_buckets(sizes), SIZE_BUCKET_LABELS),
+        }
+        self.ranks, self.peer_counts, self.medians = {}, {}, {}
+        for name, (groups, labels) in self.dimensions.items():
+            columns = range(len(METRICS))
+            self.ranks[name] = np.column_stack([percentile_ranks(values[:, i], groups) for i in columns])
+            self.peer_counts[name] = np.column_stack([_group_sizes(values[:, i], groups) for i in columns])
+            self.medians[name] = np.column_stack([_group_medians(values[:, i], groups, len(labels)) for i in columns])
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for arrays in (self.ranks, self.peer_counts, self.medians) for a in arrays.values())
+
+    def company(self, position):
+        """Peer positioning of the company at this row position, ready for JSON."""
+        result = {}
+        for name, (groups, labels) in self.dimensions.items():
+            group = int(groups[position])
+            ranks = self.ranks[name][position]
+            counts = self.peer_counts[name][position]
+            medians = self.medians[name][group] if group >= 0 else np.full(len(METRICS), np.nan)
+            result[name] = {
+                'group': labels[group] if group >= 0 else None,
+                'percentiles': {m: None if np.isnan(r) else round(float(r), 1) for m, r in zip(METRICS, ranks)},
+                'peers': {m: int(c) for m, c in zip(METRICS, counts)},
+                'medians': {m: None if np.isnan(v) else float(v) for m, v in zip(METRICS, medians)},
+            }
+        return result
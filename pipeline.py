@@ -0,0 +1,290 @@
+"""
+Ingestion pipeline: from the input workbook of company names to the snapshot the API serves.
+
+    lookup ──> profile ──┐
+       └────> logos ─────┼──> clean ──> snapshot
+    geocode ─────────────┘
+
+Each stage reads the Parquet artifacts of the stages it depends on and writes one typed
+Parquet artifact to the artifact directory, named after a hash of everything that determines
+its output: the stage version, its parameters and the content of its inputs. A stage whose
+artifact already exists is skipped, so re-running after a change only redoes the stages
+downstream of it, and only if their inputs actually changed. Stages whose dependencies are
+done run concurrently, so logos and geocoding overlap with the profile fetch.
+
+    python pipeline.py --sheet Sheet1 --column C --limit 50
+    python pipeline.py --force profile --xlsx company_information_full.xlsx
+
+Each crawl date is also recorded in the crawl history (history.py), today unless
+--crawl-date says otherwise. An explicit --crawl-date is also part of the fetch stages' keys,
+so a re-crawl on a new date calls the APIs again; without it, unchanged inputs reuse the
+fetched artifacts whatever the day (--force re-fetches).
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from dataset import CATEGORY_COLUMNS, file_version
+import history
+
+INPUT_FILE = 'busa3021.xlsx'
+INPUT_SHEET = 'Sheet2'
+INPUT_COLUMN = 'A'
+ARTIFACT_DIR = 'pipeline_artifacts'
+SNAPSHOT_FILE = 'company_snapshot.parquet'
+
+def write_artifact(df, path):
+    # Mixed-type object columns have to be one type for Arrow; written atomically
+    mixed = {c: 'str' for c in df.columns if df[c].dtype == object}
+    temp_path = f'{path}.tmp'
+    df.astype(mixed).to_parquet(temp_path, index=False)
+    os.replace(temp_path, path)
+
+# Stages. Each takes the pipeline and a dict of input frames and returns its output frame.
+# The scripts are imported inside the stages: they configure logging and read the API keys on import.
+
+def lookup_stage(pipeline, inputs):
+    import company
+    names = company.read_company_names(pipeline.input_file, pipeline.sheet_name, pipeline.column)
+    names = names[:pipeline.limit] if pipeline.limit else names
+    urls = [company.lookup_company_url(name) for name in names]
+    return pd.DataFrame({
+        'Company Name': names,
+        'LinkedIn URL': urls,
+        'Status': ['URL found' if url else 'URL not found' for url in urls],
+    })
+
+def profile_stage(pipeline, inputs):
+    import company
+    rows = []
+    for name, url in zip(inputs['lookup']['Company Name'], inputs['lookup']['LinkedIn URL']):
+        row = {'Company Name': name, 'LinkedIn URL': url}
+        if pd.isna(url):
+            row.update({'Status': 'URL not found', 'Error Details': 'Company LinkedIn profile not found'})
+        else:
+            info = company.get_company_info(url)
+            if info:
+                row['Status'] = 'Data fetched successfully'
+                row.update(company.flatten_dict(info))
+            else:
+                row.update({'Status': 'Data fetch failed', 'Error Details': 'API request failed or returned no data'})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def logos_stage(pipeline, inputs):
+    import logos
+    found = inputs['lookup'][inputs['lookup']['LinkedIn URL'].notna()]
+    paths = {}
+    for _, row in found.iterrows():
+        company_id, image_path = logos.rate_limited_api_call(row)
+        paths[company_id] = image_path
+    return pd.DataFrame({
+        'Company Name': found['Company Name'],
+        'Image_Path': [paths.get(company_id) for company_id in found.index],
+    })
+
+def geocode_stage(pipeline, inputs):
+    import company
+    import location_money
+    names = company.read_company_names(pipeline.input_file, pipeline.sheet_name, pipeline.column)
+    names = names[:pipeline.limit] if pipeline.limit else names
+    rows = []
+    for name in names:
+        rows.append(location_money.company_location(name) or {'Company': name})
+        time.sleep(location_money.REQUEST_INTERVAL)
+    return pd.DataFrame(rows).rename(columns={'Company': 'Company Name'})
+
+def clean_stage(pipeline, inputs):
+    import cleaning
+    df = inputs['profile']
+    df = df.merge(inputs['logos'], on='Company Name', how='left')
+    geocoded = inputs['geocode'][['Company Name'] + [c for c in ('Latitude', 'Longitude') if c in inputs['geocode']]]
+    df = df.merge(geocoded, on='Company Name', how='left')
+    for column in ('Latitude', 'Longitude'):
+        if column in df:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    clean, report = cleaning.clean_companies(df)
+    logging.info("clean: %s", report)
+    return clean
+
+def snapshot_stage(pipeline, inputs):
+    # The table the API loads: category columns dictionary-encoded in the Parquet file
+    df = inputs['clean'].copy()
+    for column in CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    return df
+
+class Stage:
+    def __init__(self, name, run, inputs=(), params=(), version=1):
+        self.name = name
+        self.run = run
+        self.inputs = tuple(inputs)
+        self.params = tuple(params)  # pipeline attributes that change the output
+        self.version = version  # bump when the stage's code changes what it produces
+
+SOURCE_PARAMS = ('input_digest', 'sheet_name', 'column', 'limit')
+# Stages fetching from the APIs: a crawl on an explicitly given date fetches again even if the input is unchanged
+CRAWL_PARAMS = ('fetch_date',)
+
+STAGES = [
+    Stage('lookup', lookup_stage, params=SOURCE_PARAMS + CRAWL_PARAMS),
+    Stage('profile', profile_stage, inputs=['lookup'], params=CRAWL_PARAMS),
+    Stage('logos', logos_stage, inputs=['lookup'], params=CRAWL_PARAMS),
+    Stage('geocode', geocode_stage, params=SOURCE_PARAMS + CRAWL_PARAMS),
+    Stage('clean', clean_stage, inputs=['profile', 'logos', 'geocode'], version=2),
+    Stage('snapshot', snapshot_stage, inputs=['clean']),
+]
+
+class Artifact:
+    def __init__(self, stage, key, path, rows, seconds, cached):
+        self.stage = stage
+        self.key = key
+        self.path = path
+        self.rows = rows
+        self.seconds = seconds
+        self.cached = cached
+        self.digest = file_version(path)
+
+class Pipeline:
+    def __init__(self, input_file=INPUT_FILE, sheet_name=INPUT_SHEET, column=INPUT_COLUMN, limit=None,
+                 artifact_dir=ARTIFACT_DIR, snapshot_file=SNAPSHOT_FILE, xlsx_file=None, workers=4, stages=STAGES,
+                 history_dir=history.HISTORY_DIR, crawl_date=None):
+        self.input_file = input_file
+        self.sheet_name = sheet_name
+        self.column = column
+        self.limit = limit
+        self.artifact_dir = artifact_dir
+        self.snapshot_file = snapshot_file
+        self.xlsx_file = xlsx_file
+        self.workers = workers
+        self.stages = {stage.name: stage for stage in stages}
+        self.history_dir = history_dir
+        self.crawl_date = pd.Timestamp(crawl_date or 'today').strftime('%Y-%m-%d')
+        # Only a date asked for invalidates the fetched artifacts; the default must not re-buy them every day
+        self.fetch_date = self.crawl_date if crawl_date else None
+        self.input_digest = file_version(input_file)
+
+    def cache_key(self, stage, artifacts):
+        description = {
+            'stage': stage.name,
+            'version': stage.version,
+            # An unset fetch date leaves the key as it was before crawl dates existed
+            'params': {name: getattr(self, name) for name in stage.params
+                       if not (name in CRAWL_PARAMS and getattr(self, name) is None)},
+            'inputs': {name: artifacts[name].digest for name in stage.inputs},
+        }
+        return hashlib.sha1(json.dumps(description, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    def run_stage(self, stage, artifacts, force):
+        key = self.cache_key(stage, artifacts)
+        path = os.path.join(self.artifact_dir, f'{stage.name}-{key}.parquet')
+        if os.path.exists(path) and stage.name not in force:
+            logging.info("%s: inputs unchanged, using %s", stage.name, path)
+            return Artifact(stage.name, key, path, pq.read_metadata(path).num_rows, 0.0, True)
+
+        start = time.perf_counter()
+        inputs = {name: pd.read_parquet(artifacts[name].path) for name in stage.inputs}
+        output = stage.run(self, inputs)
+        write_artifact(output, path)
+        seconds = time.perf_counter() - start
+        logging.info("%s: %d rows in %.1fs -> %s", stage.name, len(output), seconds, path)
+        return Artifact(stage.name, key, path, len(output), seconds, False)
+
+    def run(self, force=()):
+        """Run every stage once its inputs are ready. Returns {stage name: Artifact}."""
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        artifacts, pending, running = {}, dict(self.stages), {}
+        with ThreadPoolExecutor(self.workers) as pool:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dependency in artifacts for dependency in stage.inputs):
+                        running[pool.submit(self.run_stage, stage, dict(artifacts), force)] = name
+                        del pending[name]
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    artifacts[running.pop(future)] = future.result()
+
+        self.publish(artifacts['snapshot'])
+        self.write_manifest(artifacts)
+        return artifacts
+
+    def publish(self, snapshot):
+        # Replace the served files only when the snapshot changed, so the API's watcher does not reload for nothing
+        if not os.path.exists(self.snapshot_file) or file_version(self.snapshot_file) != snapshot.digest:
+            shutil.copyfile(snapshot.path, f'{self.snapshot_file}.tmp')
+            os.replace(f'{self.snapshot_file}.tmp', self.snapshot_file)
+            logging.info("Published %s", self.snapshot_file)
+            if self.xlsx_file:
+                pd.read_parquet(snapshot.path).to_excel(f'{self.xlsx_file}.tmp.xlsx', index=False)
+                os.replace(f'{self.xlsx_file}.tmp.xlsx', self.xlsx_file)
+                logging.info("Published %s", self.xlsx_file)
+        # Recorded even if the snapshot did not change: an unchanged crawl is still a data point
+        if self.history_dir:
+            self.append_history(snapshot)
+
+    def append_history(self, snapshot):
+        crawl_date = self.crawl_date
+        snapshots = history.SnapshotHistory(self.history_dir)
+        snapshots.refresh()
+        if crawl_date in snapshots.dates:
+            logging.info("History already has the crawl of %s", crawl_date)
+            return
+        try:
+            partition = snapshots.append(
+                pd.read_parquet(snapshot.path, columns=['name'] + history.HISTORY_METRICS), crawl_date)
+        except ValueError as e:
+            # A crawl dated before the latest one: history is append-only
+            logging.warning("History not updated: %s", e)
+            return
+        logging.info("History: %s partition for %s (%d rows)", partition['kind'], crawl_date, partition['rows'])
+
+    def write_manifest(self, artifacts):
+        manifest = {
+            name: {'key': a.key, 'path': a.path, 'digest': a.digest, 'rows': a.rows,
+                   'seconds': round(a.seconds, 3), 'cached': a.cached}
+            for name, a in artifacts.items()
+        }
+        with open(os.path.join(self.artifact_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default=INPUT_FILE)
+    parser.add_argument('--sheet', default=INPUT_SHEET)
+    parser.add_argument('--column', default=INPUT_COLUMN, help='column of the sheet holding company names')
+    parser.add_argument('--limit', type=int, help='only the first N companies')
+    parser.add_argument('--artifacts', default=ARTIFACT_DIR)
+    parser.add_argument('--snapshot', default=SNAPSHOT_FILE, help='where the API-ready Parquet table is published')
+    parser.add_argument('--xlsx', help='also publish the snapshot as a workbook, e.g. company_information_full.xlsx')
+    parser.add_argument('--workers', type=int, default=4, help='stages run at the same time')
+    parser.add_argument('--history', default=history.HISTORY_DIR, help="crawl history directory, '' to skip it")
+    parser.add_argument('--crawl-date', help='date the published snapshot is recorded under (default today); '
+                                              'given explicitly, the API stages fetch again for it')
+    parser.add_argument('--force', nargs='*', default=[], choices=[stage.name for stage in STAGES],
+                        help='re-run these stages even if their inputs are unchanged')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    pipeline = Pipeline(args.input, args.sheet, args.column, args.limit, args.artifacts,
+                        args.snapshot, args.xlsx, args.workers, history_dir=args.history,
+                        crawl_date=args.crawl_date)
+    start = time.perf_counter()
+    artifacts = pipeline.run(force=set(args.force))
+
+    print(f"{'stage':<10} {'rows':>6} {'seconds':>8}  status")
+    for stage in STAGES:
+        a = artifacts[stage.name]
+        print(f"{stage.name:<10} {a.rows:>6} {a.seconds:>8.1f}  {'cached' if a.cached else 'ran'}")
+    print(f'Total {time.perf_counter() - start:.1f}s, snapshot {pipeline.snapshot_file}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the threads that are currently serving requests.
+
+    One daemon thread wakes up every `interval` seconds and records the Python stack of each
+    tracked thread. When tracking stops the samples are returned as collapsed stacks
+    ("frame;frame;frame count" per line), the input format of flamegraph.pl, speedscope and
+    similar flame graph tools.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.tracked = {}
+        self.thread = None
+
+    def _ensure_started(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self.thread.start()
+
+    def start(self, thread_id=None):
+        thread_id = thread_id or threading.get_ident()
+        with self.lock:
+            self._ensure_started()
+            self.tracked[thread_id] = Counter()
+
+    def stop(self, thread_id=None):
+        thread_id = thread_id or threading.get_ident()
+        with self.lock:
+            return self.tracked.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for thread_id, samples in self.tracked.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[collapse_stack(frame)] += 1
+
+def collapse_stack(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+def write_collapsed(samples, directory, label):
+    """Write samples to <directory>/<timestamp>-<label>.folded and return the path."""
+    os.makedirs(directory, exist_ok=True)
+    safe_label = re.sub(r'[^\w.-]+', '_', label).strip('_') or 'request'
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_label}.folded")
+    with open(path, 'w') as f:
+        for stack, count in samples.most_common():
+            f.write(f'{stack} {count}\n')
+    return path
@@ -0,0 +1,211 @@
+"""
+"Companies like this": cosine similarity over TF-IDF weighted specialities, industry and office
+countries plus standardized size and country count, with an inverted-file (IVF) index for
+fast nearest-neighbour queries.
+
+Each company is a sparse TF-IDF vector (L2-normalized) concatenated with NUMERIC_WEIGHT times
+its standardized numeric features. For the index the sparse part is projected onto its top
+EMBEDDING_DIMS principal directions (computed from the term co-occurrence matrix, which is
+small), the embeddings are clustered with k-means, and a query only scores the companies in
+the `probes` clusters closest to it, re-ranking them with the exact sparse similarity. The
+sparse matrix is stored with the companies of each cluster next to each other, so scoring a
+cluster reads one contiguous slice.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+EMBEDDING_DIMS = 64
+# Terms in the embedding used for cluster assignment; rarer terms only count in the exact re-ranking
+MAX_EMBEDDED_TERMS = 4000
+NUMERIC_WEIGHT = 0.5
+DEFAULT_K = 10
+DEFAULT_PROBES = 32
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 20000
+
+def _parse_list(text):
+    try:
+        value = json.loads(text)
+    except (TypeError, ValueError):
+        return [part for part in str(text).split(',')]
+    return value if isinstance(value, list) else [value]
+
+def company_terms(df):
+    """Term list of every company: spec:<speciality>, industry:<industry> and country:<code>."""
+    specialities = {text: [f'spec:{str(s).strip().lower()}' for s in _parse_list(text) if str(s).strip()]
+                    for text in df['specialities'].dropna().unique()}
+    countries = {}
+    for text in df['locations'].dropna().unique():
+        offices = _parse_list(text)
+        countries[text] = sorted({f"country:{o['country']}" for o in offices if isinstance(o, dict) and o.get('country')})
+
+    terms = []
+    for spec, industry, locations in zip(df['specialities'], df['industry'], df['locations']):
+        row = list(specialities.get(spec, [])) if isinstance(spec, str) else []
+        if pd.notna(industry):
+            row.append(f'industry:{industry}')
+        row.extend(countries.get(locations, []) if isinstance(locations, str) else [])
+        terms.append(sorted(set(row)))
+    return terms
+
+def tfidf_matrix(terms):
+    """CSR arrays (indptr, indices, data) of L2-normalized TF-IDF rows, plus the vocabulary."""
+    lengths = np.array([len(row) for row in terms], dtype=np.int64)
+    flat = pd.Series([t for row in terms for t in row], dtype=object)
+    codes, vocabulary = pd.factorize(flat)
+    indptr = np.concatenate(([0], np.cumsum(lengths)))
+    document_frequency = np.bincount(codes, minlength=len(vocabulary))
+    idf = np.log((1 + len(terms)) / (1 + document_frequency)) + 1
+    data = idf[codes].astype(np.float32)
+    # Row norms with reduceat; empty rows are skipped by masking
+    squares = np.zeros(len(terms), dtype=np.float64)
+    nonempty = lengths > 0
+    squares[nonempty] = np.add.reduceat(data.astype(np.float64) ** 2, indptr[:-1][nonempty])
+    norms = np.sqrt(squares)
+    data /= np.repeat(np.where(norms > 0, norms, 1), lengths).astype(np.float32)
+    return indptr, codes.astype(np.int32), data, np.asarray(vocabulary, dtype=object)
+
+def _row_ranges(indptr, rows):
+    # Positions in indices/data of every entry of the given rows, and the row each one belongs to
+    starts, ends = indptr[rows], indptr[rows + 1]
+    lengths = ends - starts
+    owner = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets, owner
+
+class SimilarityIndex:
+    def __init__(self, df, dims=EMBEDDING_DIMS, numeric_weight=NUMERIC_WEIGHT, seed=0):
+        rng = np.random.default_rng(seed)
+        self.n = len(df)
+        self.indptr, self.indices, self.data, self.vocabulary = tfidf_matrix(company_terms(df))
+
+        sizes = np.log1p(pd.to_numeric(df['company_size_on_linkedin'], errors='coerce').to_numpy(dtype=float))
+        country_terms = np.array([str(t).startswith('country:') for t in self.vocabulary], dtype=bool)
+        country_counts = np.bincount(np.repeat(np.arange(self.n), np.diff(self.indptr)),
+                                     weights=country_terms[self.indices], minlength=self.n)
+        numeric = np.column_stack([sizes, np.log1p(country_counts)])
+        stds = np.nanstd(numeric, axis=0)
+        # Standardized; unknown sizes sit at the mean
+        numeric = np.nan_to_num((numeric - np.nanmean(numeric, axis=0)) / np.where(stds > 0, stds, 1))
+        self.numeric = (numeric_weight * numeric).astype(np.float32)
+
+        # Norm of the whole vector: the sparse part is already unit length (or empty)
+        sparse_norms = (np.diff(self.indptr) > 0).astype(np.float32)
+        self.norms = np.sqrt(sparse_norms + (self.numeric ** 2).sum(axis=1))
+        self.norms[self.norms == 0] = 1
+
+        self.embeddings = self._embed(dims)
+        self._cluster(rng)
+        self._group_lists()
+
+    def _dense_chunks(self, columns, chunk_size=5000):
+        # Blocks of rows as dense arrays over the given term columns (other terms dropped)
+        column_of = np.full(len(self.vocabulary), -1, dtype=np.int64)
+        column_of[columns] = np.arange(len(columns))
+        for start in range(0, self.n, chunk_size):
+            chunk = np.arange(start, min(start + chunk_size, self.n))
+            entries, owner = _row_ranges(self.indptr, chunk)
+            keep = column_of[self.indices[entries]] >= 0
+            dense = np.zeros((len(chunk), len(columns)), dtype=np.float32)
+            dense[owner[keep], column_of[self.indices[entries[keep]]]] = self.data[entries[keep]]
+            yield chunk, dense
+
+    def _embed(self, dims):
+        # Top principal directions of the most frequent terms, from their Gram matrix
+        frequency = np.bincount(self.indices, minlength=len(self.vocabulary))
+        columns = np.sort(np.argsort(-frequency, kind='stable')[:MAX_EMBEDDED_TERMS])
+        dims = min(dims, len(columns))
+        gram = np.zeros((len(columns), len(columns)), dtype=np.float64)
+        for _, dense in self._dense_chunks(columns):
+            gram += dense.T @ dense
+        _, vectors = np.linalg.eigh(gram)
+        projection = vectors[:, ::-1][:, :dims].astype(np.float32)
+
+        embeddings = np.zeros((self.n, dims), dtype=np.float32)
+        for chunk, dense in self._dense_chunks(columns):
+            embeddings[chunk] = dense @ projection
+        return (np.hstack([embeddings, self.numeric]) / self.norms[:, None]).astype(np.float32)
+
+    def _cluster(self, rng):
+        # Spherical k-means on a sample, then every company goes to its nearest centroid
+        n_lists = max(1, int(np.sqrt(self.n)))
+        sample = self.embeddings[rng.choice(self.n, min(self.n, KMEANS_SAMPLE), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            lengths = np.linalg.norm(sums, axis=1)
+            # Clusters that lost all their members keep their old centroid
+            centroids = np.where(lengths[:, None] > 0, sums / np.maximum(lengths, 1e-12)[:, None], centroids)
+        self.centroids = centroids.astype(np.float32)
+        assignment = np.concatenate([np.argmax(self.embeddings[start:start + 10000] @ self.centroids.T, axis=1)
+                                     for start in range(0, self.n, 10000)])
+        # slot -> position: companies ordered by list, so each list is one contiguous range of slots
+        self.positions = np.argsort(assignment, kind='stable')
+        self.list_starts = np.searchsorted(assignment[self.positions], np.arange(n_lists + 1))
+
+    def _group_lists(self):
+        # Rows of every array in slot order, so scoring a list reads one slice of the sparse matrix
+        entries, _ = _row_ranges(self.indptr, self.positions)
+        lengths = np.diff(self.indptr)[self.positions]
+        self.indptr = np.concatenate(([0], np.cumsum(lengths)))
+        self.indices, self.data = self.indices[entries], self.data[entries]
+        self.entry_slots = np.repeat(np.arange(self.n, dtype=np.int32), lengths)
+        self.numeric, self.norms, self.embeddings = (a[self.positions] for a in (self.numeric, self.norms, self.embeddings))
+        self.slots = np.empty(self.n, dtype=np.int64)
+        self.slots[self.positions] = np.arange(self.n)
+
+    @property
+    def nbytes(self):
+        arrays = [self.indptr, self.indices, self.data, self.entry_slots, self.numeric, self.norms,
+                  self.embeddings, self.centroids, self.positions, self.slots, self.list_starts]
+        return sum(a.nbytes for a in arrays)
+
+    def _query_vector(self, slot):
+        # Dense TF-IDF vector of one company, to look up the weight of each term it shares with another
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        first, last = self.indptr[slot], self.indptr[slot + 1]
+        vector[self.indices[first:last]] = self.data[first:last]
+        return vector
+
+    def _scores(self, slot, vector, start, end):
+        # Exact cosine similarity of the company in `slot` with the slots start..end
+        first, last = self.indptr[start], self.indptr[end]
+        sparse = np.bincount(self.entry_slots[first:last] - start,
+                             weights=self.data[first:last] * vector[self.indices[first:last]], minlength=end - start)
+        dense = self.numeric[start:end] @ self.numeric[slot]
+        return (sparse + dense) / (self.norms[start:end] * self.norms[slot])
+
+    def scores(self, position, positions):
+        """Exact cosine similarity of the company at `position` with each of `positions`."""
+        slot = self.slots[position]
+        return self._scores(slot, self._query_vector(slot), 0, self.n)[self.slots[positions]]
+
+    def _top(self, slot, ranges, k):
+        # The k best (position, similarity) pairs over the slot ranges, without the company itself
+        vector = self._query_vector(slot)
+        scores = np.concatenate([self._scores(slot, vector, start, end) for start, end in ranges])
+        positions = self.positions[np.concatenate([np.arange(start, end) for start, end in ranges])]
+        keep = positions != self.positions[slot]
+        scores, positions = scores[keep], positions[keep]
+        if len(scores) > k:
+            # Everything tied with the k-th score stays in, so ties are broken by position, not by argpartition
+            kth = -np.partition(-scores, k - 1)[k - 1]
+            top = np.flatnonzero(scores >= kth)
+        else:
+            top = np.arange(len(scores))
+        top = top[np.lexsort((positions[top], -scores[top]))][:k]
+        return [(int(positions[i]), float(scores[i])) for i in top]
+
+    def brute_force(self, position, k=DEFAULT_K):
+        """The exact k most similar companies, scoring every company: (position, similarity) pairs."""
+        return self._top(self.slots[position], [(0, self.n)], k)
+
+    def query(self, position, k=DEFAULT_K, probes=DEFAULT_PROBES):
+        """The k most similar companies among those in the `probes` clusters nearest to the company."""
+        slot = self.slots[position]
+        closest = np.argsort(-(self.centroids @ self.embeddings[slot]))[:probes]
+        return self._top(slot, [(self.list_starts[c], self.list_starts[c + 1]) for c in closest], k)
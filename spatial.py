@@ -0,0 +1,173 @@
+"""
+Office density on a multi-resolution grid. Each company's Australian offices in `locations`
+are placed at the coordinates of their city in data/map/au.csv, then binned into the Web
+Mercator tiles of every zoom level from MIN_ZOOM to MAX_ZOOM (a quadtree: each tile splits
+into four at the next level). Per tile the number of offices, the number of distinct
+companies and their mean follower count are computed once per dataset version, so a map
+at any zoom is served from a small table without sending individual points.
+"""
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+CITIES_FILE = 'data/map/au.csv'
+MIN_ZOOM = 3
+MAX_ZOOM = 12
+# Offices are located at their city; below that precision, at the capital of their state
+PRECISIONS = ['city', 'state']
+
+# State or territory of an Australian postcode, by range
+POSTCODE_STATES = [
+    ((200, 299), 'Australian Capital Territory'), ((2600, 2618), 'Australian Capital Territory'),
+    ((2900, 2920), 'Australian Capital Territory'), ((1000, 2999), 'New South Wales'),
+    ((3000, 3999), 'Victoria'), ((8000, 8999), 'Victoria'), ((4000, 4999), 'Queensland'),
+    ((9000, 9999), 'Queensland'), ((5000, 5999), 'South Australia'), ((6000, 6999), 'Western Australia'),
+    ((7000, 7999), 'Tasmania'), ((800, 999), 'Northern Territory'),
+]
+STATE_ABBREVIATIONS = {
+    'nsw': 'New South Wales', 'vic': 'Victoria', 'qld': 'Queensland', 'sa': 'South Australia',
+    'wa': 'Western Australia', 'tas': 'Tasmania', 'nt': 'Northern Territory', 'act': 'Australian Capital Territory',
+}
+
+def _key(text):
+    return re.sub(r'\s+', ' ', str(text)).strip().lower()
+
+class CityGazetteer:
+    """Coordinates of Australian cities, and of each state's capital, from au.csv."""
+
+    def __init__(self, path=CITIES_FILE):
+        cities = pd.read_csv(path).sort_values('population', ascending=False)
+        # Largest city first, so a name shared by two towns resolves to the bigger one
+        self.cities = {}
+        for city, lat, lng in zip(cities['city'], cities['lat'], cities['lng']):
+            self.cities.setdefault(_key(city), (lat, lng))
+        capitals = cities[cities['capital'].isin(['primary', 'admin'])]
+        self.capitals = {_key(state): (lat, lng) for state, lat, lng in zip(capitals['admin_name'], capitals['lat'], capitals['lng'])}
+        self.states = {_key(state): _key(state) for state in self.capitals}
+        self.states.update({abbreviation: _key(state) for abbreviation, state in STATE_ABBREVIATIONS.items()})
+
+    def city(self, name):
+        if not name:
+            return None
+        key = _key(name)
+        if key in self.cities:
+            return self.cities[key]
+        # Suburbs named after their city: North Sydney, Port Melbourne, West Perth
+        words = key.split(' ')
+        for size in range(len(words) - 1, 0, -1):
+            for start in range(len(words) - size + 1):
+                part = ' '.join(words[start:start + size])
+                if part in self.cities:
+                    return self.cities[part]
+        return None
+
+    def state(self, state, postal_code):
+        if state and _key(state) in self.states:
+            return self.capitals[self.states[_key(state)]]
+        try:
+            code = int(str(postal_code).strip())
+        except (TypeError, ValueError):
+            return None
+        for (low, high), name in POSTCODE_STATES:
+            if low <= code <= high:
+                return self.capitals[_key(name)]
+        return None
+
+    def locate(self, office):
+        """(lat, lng, precision) of an office dict from `locations`, None outside Australia or if unknown."""
+        if not isinstance(office, dict) or office.get('country') != 'AU':
+            return None
+        point = self.city(office.get('city'))
+        if point:
+            return point + ('city',)
+        point = self.state(office.get('state'), office.get('postal_code'))
+        return point + ('state',) if point else None
+
+def locate_offices(locations, gazetteer):
+    """One row per located office: the company's row position, lat, lng and precision."""
+    located = {}
+    for text in locations.dropna().unique():
+        try:
+            offices = json.loads(text)
+        except (TypeError, ValueError):
+            offices = []
+        points = [gazetteer.locate(office) for office in offices] if isinstance(offices, list) else []
+        located[text] = [point for point in points if point]
+
+    per_company = locations.map(located).to_numpy()
+    counts = np.array([len(points) if isinstance(points, list) else 0 for points in per_company])
+    rows = [point for points in per_company if isinstance(points, list) for point in points]
+    offices = pd.DataFrame(rows, columns=['lat', 'lng', 'precision'])
+    offices.insert(0, 'position', np.repeat(np.arange(len(locations)), counts))
+    return offices
+
+def tile_xy(lat, lng, zoom):
+    """Web Mercator (slippy map) tile of each point at a zoom level."""
+    n = 2 ** zoom
+    lat = np.radians(np.clip(np.asarray(lat, dtype=float), -85.0511, 85.0511))
+    x = ((np.asarray(lng, dtype=float) + 180) / 360 * n).astype(np.int64)
+    y = ((1 - np.arcsinh(np.tan(lat)) / np.pi) / 2 * n).astype(np.int64)
+    return np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+def tile_bounds(x, y, zoom):
+    """(west, south, east, north) in degrees of each tile."""
+    n = 2 ** zoom
+    x, y = np.asarray(x), np.asarray(y)
+    north = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n))))
+    south = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + 1) / n))))
+    return x / n * 360 - 180, south, (x + 1) / n * 360 - 180, north
+
+class TileAggregates:
+    """
+    Per-zoom tile tables of the located offices. Each level holds, for every non-empty tile,
+    its x/y, the mean lat/lng of its offices (where to draw it), the office and company
+    counts and the mean follower count of those companies.
+    """
+
+    def __init__(self, offices, follower_counts, companies, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+        self.companies = companies
+        self.located_companies = int(offices['position'].nunique())
+        self.precision_counts = offices['precision'].value_counts().to_dict()
+        followers = np.asarray(follower_counts, dtype=float)[offices['position'].to_numpy()]
+        self.levels = {}
+        for zoom in range(min_zoom, max_zoom + 1):
+            x, y = tile_xy(offices['lat'], offices['lng'], zoom)
+            tiles = pd.DataFrame({'x': x, 'y': y, 'position': offices['position'].to_numpy(),
+                                  'lat': offices['lat'].to_numpy(), 'lng': offices['lng'].to_numpy(),
+                                  'followers': followers})
+            cells = tiles.groupby(['x', 'y'], sort=True).agg(
+                lat=('lat', 'mean'), lng=('lng', 'mean'), offices=('position', 'size'), companies=('position', 'nunique'))
+            # Each company counts once per tile, however many offices it has there
+            distinct = tiles.drop_duplicates(['x', 'y', 'position'])
+            cells['avg_follower_count'] = distinct.groupby(['x', 'y'], sort=True)['followers'].mean()
+            self.levels[zoom] = cells.reset_index()
+
+    @property
+    def zooms(self):
+        return list(self.levels)
+
+    def level(self, zoom, bbox=None):
+        """Tiles of one zoom level as columns ready for JSON, optionally only those inside (west, south, east, north)."""
+        cells = self.levels[zoom]
+        if bbox is not None:
+            west, south, east, north = bbox
+            tile_west, tile_south, tile_east, tile_north = tile_bounds(cells['x'], cells['y'], zoom)
+            cells = cells[(tile_east >= west) & (tile_west <= east) & (tile_north >= south) & (tile_south <= north)]
+        return {
+            'zoom': zoom,
+            'tiles': len(cells),
+            'located_companies': self.located_companies,
+            'companies': self.companies,
+            'precision': self.precision_counts,
+            'cells': {
+                'x': cells['x'].tolist(),
+                'y': cells['y'].tolist(),
+                'lat': cells['lat'].round(4).tolist(),
+                'lng': cells['lng'].round(4).tolist(),
+                'offices': cells['offices'].tolist(),
+                'companies': cells['companies'].tolist(),
+                'avg_follower_count': [None if np.isnan(v) else round(v) for v in cells['avg_follower_count']],
+            },
+        }